@@ -1,29 +1,55 @@
-from fastapi import FastAPI, HTTPException, status
+import time
+_import_started = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, Query, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel, ValidationError
+import asyncio
 import logging
-from typing import Dict, List, Optional
+import numpy as np
+from functools import partial
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 import os
 import sys
 
 # Add app directory to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from models.match_predictor import MatchPredictor
 from models.feature_engineer import FeatureEngineer
+from models.scoreline_model import (
+    ASIAN_HANDICAP_LINES, OVER_UNDER_LINES, ScorelineModel, expected_goals
+)
 from utils.model_loader import ModelLoader
+from utils.model_registry import ModelBundle, ModelRegistry
+from utils.logging_config import configure_logging, should_sample
+from utils.inference_pool import InferencePool, InferencePoolSaturated
+from utils.micro_batcher import MicroBatcher
+from utils.prediction_cache import PredictionCache
+from utils.metrics import REGISTRY, observe_stage
+from utils.request_timing import TimedRoute, set_model_type
+from utils.json_response import FastJSONResponse, dumps
+from utils.streaming import (
+    BodyStreamingResponse, StreamParseError, iter_chunks, iter_json_array, iter_ndjson
+)
+
+IMPORT_SECONDS = round(time.perf_counter() - _import_started, 4)
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging (levels, format and sampling come from the environment)
+prediction_stats = configure_logging()
 logger = logging.getLogger(__name__)
 
 # Initialize FastAPI app
 app = FastAPI(
     title="FootDash ML Prediction Service",
     description="Machine Learning prediction service for football match outcomes",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
+# Record parse/serialize time for every route registered below
+app.router.route_class = TimedRoute
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -33,18 +59,57 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global variables for model and feature engineer
+# The predictor and feature engineer are served together as one versioned
+# bundle, swapped atomically on reload
 model_loader = ModelLoader()
-predictor: Optional[MatchPredictor] = None
-feature_engineer: Optional[FeatureEngineer] = None
+model_registry = ModelRegistry(lambda: (model_loader.load_model(), FeatureEngineer()))
+
+# "eager" loads the model before serving; "background" starts serving at once
+# and reports "warming" on /health until the model is live. Either way, a
+# request arriving before the model waits for the load instead of failing.
+MODEL_LOAD_MODE = os.getenv('MODEL_LOAD_MODE', 'eager').lower()
+
+# Matches scored per chunk by the streaming batch endpoint
+STREAM_CHUNK_SIZE = int(os.getenv('STREAM_CHUNK_SIZE', '1024'))
+
+# Shared goal-matrix engine behind the BTTS, over/under and multi-market endpoints
+scoreline_model = ScorelineModel()
+
+# Bounded worker pool keeping CPU-bound inference off the event loop
+inference_pool = InferencePool()
+
+# Cache of prediction results keyed on engineered features + model identity
+prediction_cache: Optional[PredictionCache] = PredictionCache.from_env()
+
+# Optional coalescing of concurrent /predict calls into one matrix prediction
+micro_batcher: Optional[MicroBatcher] = (
+    MicroBatcher(lambda requests: _predict_coalesced(requests), inference_pool)
+    if MicroBatcher.enabled_from_env() else None
+)
+
+@app.exception_handler(InferencePoolSaturated)
+async def inference_pool_saturated_handler(request: Request, exc: InferencePoolSaturated):
+    """Shed load with 503 + Retry-After instead of queueing forever."""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
 
 @app.on_event("startup")
 async def startup_event():
-    """Load model and feature engineer on startup."""
-    global predictor, feature_engineer
+    """Load model and feature engineer on startup, or start loading them in the background."""
+    prediction_stats.start()
+    if MODEL_LOAD_MODE == 'background':
+        model_registry.start_loading(_load_initial_model)
+        logger.info("ML prediction service started, model loading in the background")
+    else:
+        await model_registry.ensure_loaded(_load_initial_model)
+
+def _load_initial_model() -> None:
+    """Load, warm and install the first model (runs on the registry's loader thread)."""
     try:
-        predictor = model_loader.load_model()
-        feature_engineer = FeatureEngineer()
+        model_registry.load_and_swap()
         logger.info("ML prediction service started successfully")
     except Exception as e:
         logger.error(f"Failed to load model during startup: {e}")
@@ -52,13 +117,21 @@ async def startup_event():
         from models.match_predictor import MatchPredictor as MP
         from models.feature_engineer import FeatureEngineer as FE
         try:
-            predictor = MP()
-            feature_engineer = FE()
+            model_registry.install(MP(), FE())
             logger.info("Initialized fallback predictor after startup error")
         except Exception as inner_e:
             logger.error(f"Critical failure: could not load fallback: {inner_e}")
-            predictor = None
-            feature_engineer = None
+
+async def _require_model(detail: str) -> None:
+    """Wait for the first model load (starting it if needed), or answer 503."""
+    if await model_registry.ensure_loaded(_load_initial_model) is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=detail)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Drain the inference pool and flush aggregated prediction counters."""
+    inference_pool.shutdown()
+    prediction_stats.stop()
 
 class PredictionRequest(BaseModel):
     """Request model for match prediction."""
@@ -103,6 +176,30 @@ class OverUnderRequest(BaseModel):
     season: str
     line: float = 2.5  # Over/Under line (default 2.5)
 
+class MarketsRequest(BaseModel):
+    """Request model for multi-market prediction from one scoreline matrix."""
+    home_goals_avg: float
+    away_goals_avg: float
+    home_goals_conceded_avg: float
+    away_goals_conceded_avg: float
+    home_form_rating: float
+    away_form_rating: float
+    league_id: int
+    season: str
+    rho: float = 0.0  # Dixon-Coles low-score dependence (0 = independent Poisson)
+
+class BatchMarketsRequest(BaseModel):
+    """Request model for batch multi-market predictions."""
+    matches: List[MarketsRequest]
+
+class BttsBatchRequest(BaseModel):
+    """Request model for batch BTTS predictions."""
+    matches: List[BttsRequest]
+
+class OverUnderBatchRequest(BaseModel):
+    """Request model for batch Over/Under predictions."""
+    matches: List[OverUnderRequest]
+
 class BatchPredictionRequest(BaseModel):
     """Request model for batch predictions."""
     matches: List[PredictionRequest]
@@ -123,6 +220,39 @@ class OverUnderResponse(BaseModel):
     confidence: str
     model_version: str
 
+class OverUnderLine(BaseModel):
+    """Over/Under probabilities for one total-goals line."""
+    line: float
+    over_probability: float
+    under_probability: float
+
+class AsianHandicapLine(BaseModel):
+    """Asian handicap probabilities for one home handicap line."""
+    line: float
+    home_probability: float
+    push_probability: float
+    away_probability: float
+
+class CorrectScore(BaseModel):
+    """Probability of one exact scoreline."""
+    score: str
+    probability: float
+
+class MarketsResponse(BaseModel):
+    """Response model for multi-market prediction."""
+    home_expected_goals: float
+    away_expected_goals: float
+    expected_total_goals: float
+    home_win_probability: float
+    draw_probability: float
+    away_win_probability: float
+    btts_yes_probability: float
+    btts_no_probability: float
+    over_under: List[OverUnderLine]
+    asian_handicap: List[AsianHandicapLine]
+    correct_score: List[CorrectScore]
+    model_version: str
+
 class PredictionResponse(BaseModel):
     """Response model for match prediction."""
     home_win_probability: float
@@ -130,7 +260,8 @@ class PredictionResponse(BaseModel):
     away_win_probability: float
     confidence: str
     model_version: str
-    features_used: List[str]
+    # Omitted in lean mode; the same values are served by /model/info
+    features_used: Optional[List[str]] = None
     feature_importance: Optional[Dict[str, float]] = None
 
 class HealthResponse(BaseModel):
@@ -139,6 +270,7 @@ class HealthResponse(BaseModel):
     model_loaded: bool
     model_version: Optional[str] = None
     timestamp: str
+    startup: Optional[Dict[str, float]] = None
 
 @app.get("/", tags=["Root"])
 async def root():
@@ -154,38 +286,77 @@ async def health_check():
     """Health check endpoint."""
     from datetime import datetime
     
+    bundle = model_registry.current
+    if bundle is not None:
+        health_status = "healthy"
+    elif model_registry.warming:
+        health_status = "warming"
+    else:
+        health_status = "degraded"
+
     return HealthResponse(
-        status="healthy" if predictor is not None else "degraded",
-        model_loaded=predictor is not None,
-        model_version=predictor.version if predictor else None,
-        timestamp=datetime.utcnow().isoformat()
+        status=health_status,
+        model_loaded=bundle is not None,
+        model_version=bundle.version if bundle else None,
+        timestamp=datetime.utcnow().isoformat(),
+        startup={"import_seconds": IMPORT_SECONDS, **model_registry.timings}
     )
 
 @app.post("/predict", response_model=PredictionResponse, tags=["Predictions"])
-async def predict_match(request: PredictionRequest):
-    """Generate match prediction using ML model."""
-    if predictor is None or feature_engineer is None:
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="ML model not available. Service may be starting up or model failed to load."
-        )
+async def predict_match(
+    request: PredictionRequest,
+    lean: bool = Query(False, description="Omit features_used and feature_importance; "
+                                         "fetch them once from /model/info instead")
+):
+    """
+    Generate match prediction using ML model.
+
+    The feature list and importances are the same for every prediction from a
+    given model. With lean=true they are left out and the response is encoded
+    directly, skipping response-model validation.
+    """
+    await _require_model(
+        "ML model not available. Service may be starting up or model failed to load."
+    )
     
     try:
-        # Engineer features from request
-        features = feature_engineer.engineer_features(request)
-        
-        # Generate prediction
-        prediction_result = predictor.predict(features)
+        # Engineer features and generate the prediction on the inference pool,
+        # sharing one model call with concurrent requests when batching is on
+        if micro_batcher is not None:
+            prediction_result = await micro_batcher.submit(request)
+        else:
+            with model_registry.acquire() as bundle:
+                prediction_result = await inference_pool.run(_predict_single, bundle, request)
+        set_model_type(prediction_result['model_type'])
         
         # Determine confidence level
         confidence = _determine_confidence(prediction_result['probabilities'])
+
+        prediction_stats.record("predict")
+        if should_sample():
+            logger.info(
+                "Prediction served",
+                extra={'fields': {
+                    'endpoint': 'predict',
+                    'league_id': request.league_id,
+                    'model_type': prediction_result.get('model_type'),
+                    'confidence': confidence
+                }}
+            )
         
+        probabilities = prediction_result['probabilities']
+        payload = {
+            "home_win_probability": round(probabilities[0] * 100, 2),
+            "draw_probability": round(probabilities[1] * 100, 2),
+            "away_win_probability": round(probabilities[2] * 100, 2),
+            "confidence": confidence,
+            "model_version": prediction_result['model_version']
+        }
+        if lean:
+            return FastJSONResponse(content=payload)
+
         return PredictionResponse(
-            home_win_probability=round(prediction_result['probabilities'][0] * 100, 2),
-            draw_probability=round(prediction_result['probabilities'][1] * 100, 2),
-            away_win_probability=round(prediction_result['probabilities'][2] * 100, 2),
-            confidence=confidence,
-            model_version=predictor.version,
+            **payload,
             features_used=prediction_result['features_used'],
             feature_importance=prediction_result.get('feature_importance')
         )
@@ -195,39 +366,159 @@ async def predict_match(request: PredictionRequest):
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail=f"Feature engineering failed: {str(e)}"
         )
+    except InferencePoolSaturated:
+        raise
     except Exception as e:
+        prediction_stats.record("predict", errors=1)
         logger.error(f"Prediction failed: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Prediction generation failed: {str(e)}"
         )
 
+def _predict_single(bundle: ModelBundle, request: PredictionRequest) -> Dict:
+    """Engineer features and predict one match (runs on the inference pool)."""
+    started = time.perf_counter()
+    features = bundle.feature_engineer.engineer_features(request)
+    engineered = time.perf_counter()
+    batch_result = _predict_rows(bundle, np.atleast_2d(features), use_cache=True)
+    _observe_model_stages("/predict", batch_result['model_type'], started, engineered)
+    return _row_results(bundle, batch_result)[0]
+
+def _predict_coalesced(requests: List[PredictionRequest]) -> List:
+    """Predict a micro-batch of /predict requests with one model call."""
+    with model_registry.acquire() as bundle:
+        if bundle is None:
+            raise RuntimeError("ML model not available")
+        started = time.perf_counter()
+        try:
+            features = bundle.feature_engineer.engineer_features_batch(requests)
+        except Exception:
+            # Isolate the failing request(s) instead of failing the whole batch
+            results = []
+            for request in requests:
+                try:
+                    results.append(_predict_single(bundle, request))
+                except Exception as e:
+                    results.append(e)
+            return results
+
+        engineered = time.perf_counter()
+        batch_result = _predict_rows(bundle, features, use_cache=True)
+        _observe_model_stages("/predict", batch_result['model_type'], started, engineered)
+        return _row_results(bundle, batch_result)
+
+def _observe_model_stages(endpoint: str, model_type: str, started: float, engineered: float) -> None:
+    """Record engineer_features and predict durations of one scoring pass."""
+    finished = time.perf_counter()
+    observe_stage(endpoint, 'engineer_features', model_type, engineered - started)
+    observe_stage(endpoint, 'predict', model_type, finished - engineered)
+
+def _predict_rows(bundle: ModelBundle, features: np.ndarray, use_cache: bool = False) -> Dict:
+    """
+    Score a feature matrix with one model call.
+
+    With use_cache, repeated rows are served from the prediction cache and
+    only the missing ones reach the model. Only /predict and its micro-batches
+    use the cache: for batch endpoints, hashing and looking up every row costs
+    more than scoring it.
+    """
+    predictor = bundle.predictor
+    if prediction_cache is None or not use_cache:
+        return predictor.predict_batch(features)
+
+    # Fallback results produced after a model error are never cached
+    cacheable_type = 'ml' if predictor.model is not None else 'statistical'
+    keys = prediction_cache.make_keys(features, _cache_namespace(predictor))
+
+    probabilities = np.empty((len(features), 3))
+    model_type = cacheable_type
+    missing = []
+    for index, key in enumerate(keys):
+        cached = prediction_cache.get(key)
+        if cached is None:
+            missing.append(index)
+        else:
+            probabilities[index] = cached
+
+    if missing:
+        batch_result = predictor.predict_batch(features[missing])
+        probabilities[missing] = batch_result['probabilities']
+        model_type = batch_result['model_type']
+        if model_type == cacheable_type:
+            for index, probs in zip(missing, batch_result['probabilities']):
+                prediction_cache.set(keys[index], probs.tolist())
+
+    return {
+        'probabilities': probabilities,
+        'features_used': predictor.feature_names,
+        'model_type': model_type
+    }
+
+def _row_results(bundle: ModelBundle, batch_result: Dict) -> List[Dict]:
+    """Expand a batch result into per-match results shaped like MatchPredictor.predict."""
+    feature_importance = (
+        bundle.predictor.get_feature_importance() if batch_result['model_type'] == 'ml' else None
+    )
+    return [
+        {
+            'probabilities': probs.tolist(),
+            'features_used': batch_result['features_used'],
+            'feature_importance': feature_importance,
+            'model_type': batch_result['model_type'],
+            'model_version': bundle.version,
+            'confidence_raw': float(max(probs))
+        }
+        for probs in batch_result['probabilities']
+    ]
+
+def _cache_namespace(predictor) -> str:
+    """Identity of the loaded model, so cached results never outlive it."""
+    training_info = predictor.training_info or {}
+    trained_at = training_info.get('trained_at') or training_info.get('created_at', '')
+    return f"{predictor.version}:{trained_at}"
+
 @app.get("/model/info", tags=["Model"])
 async def get_model_info():
     """Get information about the loaded model."""
-    if predictor is None:
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="ML model not available"
-        )
-    
-    return {
-        "version": predictor.version,
-        "algorithm": predictor.algorithm,
-        "features": predictor.feature_names,
-        "accuracy": predictor.accuracy,
-        "trained_on": predictor.training_info
-    }
+    await _require_model("ML model not available")
+    with model_registry.acquire() as bundle:
+        if bundle is None:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="ML model not available"
+            )
+
+        predictor = bundle.predictor
+        return {
+            "version": predictor.version,
+            "algorithm": predictor.algorithm,
+            "features": predictor.feature_names,
+            "feature_importance": predictor.get_feature_importance(),
+            "accuracy": predictor.accuracy,
+            "trained_on": predictor.training_info
+        }
 
 @app.post("/model/reload", tags=["Model"])
 async def reload_model():
-    """Reload the ML model (for updates)."""
-    global predictor, feature_engineer
+    """
+    Reload the ML model (for updates).
+
+    The replacement is loaded, warmed and smoke-tested in the background while
+    the current model keeps serving, then swapped in atomically. Requests
+    already in flight finish on the model they started with.
+    """
     try:
-        predictor = model_loader.load_model()
-        feature_engineer = FeatureEngineer()
+        bundle = await model_registry.reload()
+        if prediction_cache is not None:
+            prediction_cache.invalidate()
         logger.info("Model reloaded successfully")
-        return {"status": "success", "message": "Model reloaded successfully"}
+        return {
+            "status": "success",
+            "message": "Model reloaded successfully",
+            "version": bundle.version,
+            "generation": bundle.generation
+        }
     except Exception as e:
         logger.error(f"Model reload failed: {e}")
         raise HTTPException(
@@ -242,32 +533,16 @@ async def reload_model():
 async def predict_btts(request: BttsRequest):
     """Predict Both Teams To Score probability."""
     try:
-        # Calculate BTTS probability from goal-scoring and conceding averages
-        home_scoring_rate = request.home_goals_avg
-        away_scoring_rate = request.away_goals_avg
-        home_concede_rate = request.home_goals_conceded_avg
-        away_concede_rate = request.away_goals_conceded_avg
-
-        # Expected goals for each side (attack meets defence)
-        home_expected = (home_scoring_rate + away_concede_rate) / 2
-        away_expected = (away_scoring_rate + home_concede_rate) / 2
-
-        # Poisson-based probability of scoring at least 1
-        import math
-        p_home_scores = 1 - math.exp(-home_expected)
-        p_away_scores = 1 - math.exp(-away_expected)
-
-        btts_yes = round(p_home_scores * p_away_scores * 100, 2)
-        btts_no = round(100 - btts_yes, 2)
-
-        confidence = "high" if abs(btts_yes - 50) > 20 else ("medium" if abs(btts_yes - 50) > 10 else "low")
-
-        return BttsResponse(
-            btts_yes_probability=btts_yes,
-            btts_no_probability=btts_no,
-            confidence=confidence,
-            model_version=predictor.version if predictor else "statistical-1.0"
-        )
+        # Expected goals for each side (attack meets defence), then the
+        # Poisson scoreline matrix they imply, validated as in the batch endpoint
+        rows = _compute_btts([request])
+        set_model_type("statistical")
+        if rows[0]["status"] == "error":
+            raise HTTPException(status_code=422, detail=rows[0]["error"])
+        rows[0].pop("status")
+        return BttsResponse(**rows[0])
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"BTTS prediction failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -279,68 +554,364 @@ async def predict_btts(request: BttsRequest):
 async def predict_over_under(request: OverUnderRequest):
     """Predict Over/Under total goals probability."""
     try:
-        import math
-
-        home_expected = (request.home_goals_avg + request.away_goals_conceded_avg) / 2
-        away_expected = (request.away_goals_avg + request.home_goals_conceded_avg) / 2
-        expected_total = home_expected + away_expected
-
-        # Poisson CDF for total goals ≤ line
-        lam = expected_total
-        line = request.line
-        # P(X ≤ floor(line)) using Poisson CDF
-        k = int(line)
-        p_under = sum((lam ** i) * math.exp(-lam) / math.factorial(i) for i in range(k + 1))
-        p_over = 1 - p_under
-
-        over_pct = round(p_over * 100, 2)
-        under_pct = round(p_under * 100, 2)
-
-        confidence = "high" if abs(over_pct - 50) > 20 else ("medium" if abs(over_pct - 50) > 10 else "low")
-
-        return OverUnderResponse(
-            over_probability=over_pct,
-            under_probability=under_pct,
-            line=line,
-            expected_total_goals=round(expected_total, 2),
-            confidence=confidence,
-            model_version=predictor.version if predictor else "statistical-1.0"
-        )
+        # P(total goals <= floor(line)) from the scoreline matrix
+        rows = _compute_over_under([request])
+        set_model_type("statistical")
+        if rows[0]["status"] == "error":
+            raise HTTPException(status_code=422, detail=rows[0]["error"])
+        rows[0].pop("status")
+        return OverUnderResponse(**rows[0])
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Over/Under prediction failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/predict/btts/batch", tags=["Predictions"])
+async def predict_btts_batch(request: BttsBatchRequest):
+    """Predict Both Teams To Score for many matches in one vectorized pass."""
+    results = await inference_pool.run(_compute_btts, request.matches) if request.matches else []
+    set_model_type("statistical")
+    return {"predictions": results, "total": len(results)}
+
+@app.post("/predict/over-under/batch", tags=["Predictions"])
+async def predict_over_under_batch(request: OverUnderBatchRequest):
+    """Predict Over/Under for many matches, each at its own line, in one vectorized pass."""
+    results = await inference_pool.run(_compute_over_under, request.matches) if request.matches else []
+    set_model_type("statistical")
+    return {"predictions": results, "total": len(results)}
+
+def _compute_btts(requests: List[BttsRequest]) -> List[Dict]:
+    """BTTS rows shaped like BttsResponse; invalid rows get an error entry."""
+    home_expected, away_expected, results = _expected_goals_or_errors(requests)
+    valid = np.flatnonzero([result is None for result in results])
+    if len(valid):
+        matrix = scoreline_model.goal_matrix(home_expected[valid], away_expected[valid])
+        model_version = _current_version()
+        for index, probability in zip(valid, scoreline_model.btts_probability(matrix)):
+            btts_yes = _percentage(probability)
+            results[index] = {
+                "btts_yes_probability": btts_yes,
+                "btts_no_probability": round(100 - btts_yes, 2),
+                "confidence": _market_confidence(btts_yes),
+                "model_version": model_version,
+                "status": "success"
+            }
+    return results
+
+def _compute_over_under(requests: List[OverUnderRequest]) -> List[Dict]:
+    """Over/Under rows shaped like OverUnderResponse; invalid rows get an error entry."""
+    home_expected, away_expected, results = _expected_goals_or_errors(requests)
+    valid = np.flatnonzero([result is None for result in results])
+    if len(valid):
+        lines = [requests[index].line for index in valid]
+        matrix = scoreline_model.goal_matrix(home_expected[valid], away_expected[valid])
+        under = scoreline_model.under_probability_per_match(matrix, lines)
+        model_version = _current_version()
+        for index, line, p_under in zip(valid, lines, under):
+            over_pct = _percentage(1 - p_under)
+            results[index] = {
+                "over_probability": over_pct,
+                "under_probability": _percentage(p_under),
+                "line": line,
+                "expected_total_goals": round(float(home_expected[index] + away_expected[index]), 2),
+                "confidence": _market_confidence(over_pct),
+                "model_version": model_version,
+                "status": "success"
+            }
+    return results
+
+def _expected_goals_or_errors(requests: List) -> Tuple[np.ndarray, np.ndarray, List[Optional[Dict]]]:
+    """
+    Expected goals for a batch of market requests.
+
+    Returns:
+        (home_expected, away_expected, results) where results holds an error
+        entry for each invalid row and None for rows still to be scored
+    """
+    home_expected, away_expected = expected_goals(
+        [r.home_goals_avg for r in requests], [r.away_goals_avg for r in requests],
+        [r.home_goals_conceded_avg for r in requests], [r.away_goals_conceded_avg for r in requests]
+    )
+    valid = (np.isfinite(home_expected) & np.isfinite(away_expected)
+             & (home_expected >= 0) & (away_expected >= 0))
+    results: List[Optional[Dict]] = [
+        None if ok else {"status": "error", "error": "Goal averages must be finite and non-negative"}
+        for ok in valid
+    ]
+    return home_expected, away_expected, results
+
+
+# ── Multi-market Prediction ──────────────────────────────────────────────────
+
+@app.post("/predict/markets", response_model=MarketsResponse, tags=["Predictions"])
+async def predict_markets(request: MarketsRequest):
+    """
+    Predict every goal market for one match from a single scoreline matrix.
+
+    Covers 1X2, BTTS, over/under 0.5-5.5, Asian handicap -2.5 to +2.5 and
+    the most likely correct scores.
+    """
+    try:
+        rows = _compute_markets([request])
+        set_model_type("statistical")
+        if rows[0]["status"] == "error":
+            raise HTTPException(status_code=422, detail=rows[0]["error"])
+        rows[0].pop("status")
+        return MarketsResponse(**rows[0])
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Market prediction failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/predict/markets/batch", tags=["Predictions"])
+async def predict_markets_batch(request: BatchMarketsRequest):
+    """Predict every goal market for many matches in one vectorized pass."""
+    results = await inference_pool.run(_compute_markets, request.matches) if request.matches else []
+    set_model_type("statistical")
+    return {"predictions": results, "total": len(results)}
+
+def _compute_markets(requests: List[MarketsRequest]) -> List[Dict]:
+    """Score all markets for a list of matches; invalid rows get an error entry."""
+    home_expected, away_expected, results = _expected_goals_or_errors(requests)
+    rho = np.array([r.rho for r in requests], dtype=np.float64)
+    for index in np.flatnonzero(~np.isfinite(rho)):
+        results[index] = {"status": "error", "error": "rho must be finite"}
+
+    valid = np.array([result is None for result in results])
+    if not valid.any():
+        return results
+
+    markets = scoreline_model.markets(home_expected[valid], away_expected[valid], rho[valid])
+    model_version = _current_version()
+    for position, index in enumerate(np.flatnonzero(valid)):
+        results[index] = _format_markets(markets, position, model_version)
+    return results
+
+def _format_markets(markets: Dict, row: int, model_version: str) -> Dict:
+    """Build one successful row of a markets response from ScorelineModel.markets output."""
+    pct = _percentage
+    home_expected = float(markets['home_expected'][row])
+    away_expected = float(markets['away_expected'][row])
+    home_win, draw, away_win = markets['outcome'][row]
+    btts = markets['btts'][row]
+
+    return {
+        "home_expected_goals": round(home_expected, 2),
+        "away_expected_goals": round(away_expected, 2),
+        "expected_total_goals": round(home_expected + away_expected, 2),
+        "home_win_probability": pct(home_win),
+        "draw_probability": pct(draw),
+        "away_win_probability": pct(away_win),
+        "btts_yes_probability": pct(btts),
+        "btts_no_probability": pct(1 - btts),
+        "over_under": [
+            {"line": line, "over_probability": pct(1 - under), "under_probability": pct(under)}
+            for line, under in zip(OVER_UNDER_LINES, markets['under'][row])
+        ],
+        "asian_handicap": [
+            {"line": line, "home_probability": pct(home), "push_probability": pct(push),
+             "away_probability": pct(away)}
+            for line, (home, push, away) in zip(ASIAN_HANDICAP_LINES, markets['asian_handicap'][row])
+        ],
+        "correct_score": [
+            {"score": score, "probability": pct(probability)}
+            for score, probability in markets['correct_score'][row]
+        ],
+        "model_version": model_version,
+        "status": "success"
+    }
+
+
 # ── Batch Prediction ─────────────────────────────────────────────────────────
 
 @app.post("/predict/batch", tags=["Predictions"])
 async def predict_batch(request: BatchPredictionRequest):
     """Generate predictions for multiple matches at once."""
-    if predictor is None or feature_engineer is None:
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="ML model not available."
-        )
+    await _require_model("ML model not available.")
+    with model_registry.acquire() as bundle:
+        if bundle is None:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="ML model not available."
+            )
+        return await _predict_batch(bundle, request)
+
+
+async def _predict_batch(bundle: ModelBundle, request: BatchPredictionRequest) -> Dict:
+    """Score a batch request against one model bundle."""
+    results = await _score_matches(bundle, request.matches, "/predict/batch")
+    prediction_stats.record(
+        "predict_batch",
+        rows=len(results),
+        errors=sum(1 for result in results if result["status"] == "error")
+    )
+    return {"predictions": results, "total": len(results)}
 
-    results = []
-    for match_req in request.matches:
+
+def _engineer_rows(feature_engineer, matches: List[PredictionRequest]
+                   ) -> Tuple[Optional[np.ndarray], List[int], Dict[int, str]]:
+    """
+    Engineer features one match at a time.
+
+    Returns:
+        The feature matrix of the matches that engineered (None if none
+        did), their indices in matches, and the error of every other index
+    """
+    feature_rows = []
+    row_indices = []
+    errors = {}
+    for index, match_req in enumerate(matches):
         try:
-            features = feature_engineer.engineer_features(match_req)
-            result = predictor.predict(features)
-            probs = result['probabilities']
-            confidence = _determine_confidence(probs)
-            results.append({
-                "home_win_probability": round(probs[0] * 100, 2),
-                "draw_probability": round(probs[1] * 100, 2),
-                "away_win_probability": round(probs[2] * 100, 2),
-                "confidence": confidence,
-                "model_version": predictor.version,
-                "status": "success"
-            })
+            feature_rows.append(feature_engineer.engineer_features(match_req))
+            row_indices.append(index)
         except Exception as e:
-            results.append({"status": "error", "error": str(e)})
+            errors[index] = str(e)
+    feature_matrix = np.vstack(feature_rows) if feature_rows else None
+    return feature_matrix, row_indices, errors
+
+
+async def _score_matches(bundle: ModelBundle, matches: List[PredictionRequest],
+                         endpoint: str) -> List[Dict]:
+    """
+    Score matches against one model bundle, one row of batch output per match.
+
+    Raises:
+        InferencePoolSaturated: If the inference pool cannot take the work
+    """
+    feature_engineer = bundle.feature_engineer
+    results: List[Optional[Dict]] = [None] * len(matches)
+
+    row_indices = list(range(len(matches)))
+    feature_matrix = None
+    started = time.perf_counter()
+    if matches:
+        try:
+            feature_matrix = await inference_pool.run(
+                feature_engineer.engineer_features_batch, matches
+            )
+        except InferencePoolSaturated:
+            raise
+        except Exception:
+            # Engineer row by row so a bad row only fails itself
+            feature_matrix, row_indices, errors = await inference_pool.run(
+                _engineer_rows, feature_engineer, matches
+            )
+            for index, error in errors.items():
+                results[index] = {"status": "error", "error": error}
+
+    # Score all valid rows, one model call per chunk, spread across the pool
+    if feature_matrix is not None:
+        engineered = time.perf_counter()
+        try:
+            chunk_results = await inference_pool.map_chunks(
+                partial(_predict_rows, bundle), feature_matrix
+            )
+            model_types = [chunk['model_type'] for chunk in chunk_results]
+            model_type = 'fallback' if 'fallback' in model_types else model_types[0]
+            _observe_model_stages(endpoint, model_type, started, engineered)
+            set_model_type(model_type)
+
+            probabilities = np.vstack([chunk['probabilities'] for chunk in chunk_results])
+            for index, probs in zip(row_indices, probabilities):
+                results[index] = _format_batch_prediction(probs.tolist(), bundle.version)
+        except InferencePoolSaturated:
+            raise
+        except Exception as e:
+            logger.error(f"Batch prediction failed: {e}")
+            for index in row_indices:
+                results[index] = {"status": "error", "error": str(e)}
+
+    return results
+
+
+@app.post("/predict/batch/stream", tags=["Predictions"])
+async def predict_batch_stream(http_request: Request):
+    """
+    Stream predictions for an arbitrarily large batch as NDJSON.
+
+    The body is either NDJSON (Content-Type application/x-ndjson, one match
+    per line) or a JSON array of matches; both are parsed incrementally.
+    Matches are scored in chunks of STREAM_CHUNK_SIZE and each chunk's
+    results are written, one {"index": ..., ...} line per match, as soon as
+    it finishes, so memory stays bounded regardless of request size.
+
+    Rows that fail to parse or validate get an error line of their own; a
+    malformed JSON array ends the stream with one.
+    """
+    await _require_model("ML model not available.")
+    content_type = http_request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        rows = iter_ndjson(http_request.stream())
+    else:
+        rows = iter_json_array(http_request.stream())
+    return BodyStreamingResponse(
+        _stream_predictions(_rows_until_parse_error(rows)), media_type="application/x-ndjson"
+    )
+
+
+async def _rows_until_parse_error(rows: AsyncIterator) -> AsyncIterator:
+    """Pass rows through; a malformed stream ends with its parse error as a final row."""
+    try:
+        async for row in rows:
+            yield row
+    except StreamParseError as e:
+        yield e
+
+
+async def _stream_predictions(rows: AsyncIterator) -> AsyncIterator[bytes]:
+    """Validate, score and serialize streamed rows one chunk at a time."""
+    offset = 0
+    errors = 0
+    with model_registry.acquire() as bundle:
+        try:
+            async for chunk in iter_chunks(rows, STREAM_CHUNK_SIZE):
+                results: List[Optional[Dict]] = [None] * len(chunk)
+                matches, positions = [], []
+                for position, row in enumerate(chunk):
+                    try:
+                        if isinstance(row, Exception):
+                            raise row
+                        matches.append(PredictionRequest.model_validate(row))
+                        positions.append(position)
+                    except (ValueError, ValidationError) as e:
+                        results[position] = {"status": "error", "error": str(e)}
+
+                if matches:
+                    for position, result in zip(positions, await _score_streamed_chunk(bundle, matches)):
+                        results[position] = result
+
+                errors += sum(1 for result in results if result["status"] == "error")
+                yield b"".join(
+                    dumps({"index": offset + position, **result}) + b"\n"
+                    for position, result in enumerate(results)
+                )
+                offset += len(chunk)
+        finally:
+            prediction_stats.record("predict_batch_stream", rows=offset, errors=errors)
+
+
+async def _score_streamed_chunk(bundle: ModelBundle, matches: List[PredictionRequest]) -> List[Dict]:
+    """Score one chunk of a stream, waiting out a saturated pool instead of failing mid-response."""
+    while True:
+        try:
+            return await _score_matches(bundle, matches, "/predict/batch/stream")
+        except InferencePoolSaturated as e:
+            await asyncio.sleep(e.retry_after)
 
-    return {"predictions": results, "total": len(results)}
+
+def _format_batch_prediction(probs: List[float], model_version: str) -> Dict:
+    """Build a single successful row of a batch prediction response."""
+    return {
+        "home_win_probability": round(probs[0] * 100, 2),
+        "draw_probability": round(probs[1] * 100, 2),
+        "away_win_probability": round(probs[2] * 100, 2),
+        "confidence": _determine_confidence(probs),
+        "model_version": model_version,
+        "status": "success"
+    }
 
 
 # ── Model Metrics ────────────────────────────────────────────────────────────
@@ -348,9 +919,15 @@ async def predict_batch(request: BatchPredictionRequest):
 @app.get("/model/metrics", tags=["Model"])
 async def get_model_metrics():
     """Get model performance metrics."""
-    if predictor is None:
-        raise HTTPException(status_code=503, detail="ML model not available")
+    await _require_model("ML model not available")
+    with model_registry.acquire() as bundle:
+        if bundle is None:
+            raise HTTPException(status_code=503, detail="ML model not available")
+        return _model_metrics(bundle.predictor)
+
 
+def _model_metrics(predictor) -> Dict:
+    """Performance metrics for a predictor plus serving-side statistics."""
     return {
         "version": predictor.version,
         "algorithm": predictor.algorithm,
@@ -370,9 +947,38 @@ async def get_model_metrics():
             }
         },
         "training_info": predictor.training_info,
-        "feature_count": len(predictor.feature_names)
+        "feature_count": len(predictor.feature_names),
+        "model_registry": model_registry.stats(),
+        "inference_pool": inference_pool.stats(),
+        "micro_batching": micro_batcher.stats() if micro_batcher is not None else None,
+        "prediction_cache": prediction_cache.stats() if prediction_cache is not None else None
     }
 
+@app.get("/metrics", response_class=PlainTextResponse, tags=["Model"])
+async def metrics():
+    """
+    Prometheus metrics.
+
+    Per-stage latency histograms (parse, engineer_features, predict,
+    serialize) by endpoint and model type, plus the count of predictions that
+    fell back to the statistical model after an ML error.
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+def _market_confidence(percentage: float) -> str:
+    """Confidence of a two-way market from its distance to a coin flip."""
+    distance = abs(percentage - 50)
+    return "high" if distance > 20 else ("medium" if distance > 10 else "low")
+
+def _percentage(probability: float) -> float:
+    """Probability as a percentage rounded for API responses."""
+    return round(float(probability) * 100, 2)
+
+def _current_version() -> str:
+    """Version of the live model, for endpoints that do not use it directly."""
+    bundle = model_registry.current
+    return bundle.version if bundle else "statistical-1.0"
+
 def _determine_confidence(probabilities: List[float]) -> str:
     """Determine confidence level based on prediction probabilities."""
     max_prob = max(probabilities)
@@ -1,11 +1,63 @@
 import numpy as np
-import pandas as pd
-from typing import Dict, List, Any, Tuple
+from operator import attrgetter
+from typing import Dict, List, Any, Sequence, Tuple, Union
 from datetime import datetime
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Request fields copied straight into the feature matrix (plus league_id for lookups)
+RAW_FIELDS = [
+    'home_form_rating',
+    'away_form_rating',
+    'home_win_rate',
+    'away_win_rate',
+    'home_goals_avg',
+    'away_goals_avg',
+    'home_goals_conceded_avg',
+    'away_goals_conceded_avg',
+    'h2h_home_wins',
+    'h2h_away_wins',
+    'h2h_draws',
+    'league_id',
+]
+
+# Simplified league strength mapping
+LEAGUE_STRENGTHS = {
+    39: 1.0,    # Premier League
+    140: 0.95,  # La Liga
+    78: 0.95,   # Bundesliga
+    135: 0.9,   # Serie A
+    61: 0.85,   # Ligue 1
+    94: 0.8,    # Liga NOS
+    88: 0.75,   # Eredivisie
+}
+DEFAULT_LEAGUE_STRENGTH = 0.7  # Default for unknown leagues
+_LEAGUE_IDS = np.array(sorted(LEAGUE_STRENGTHS), dtype=np.float64)
+_LEAGUE_VALUES = np.array([LEAGUE_STRENGTHS[league_id] for league_id in sorted(LEAGUE_STRENGTHS)])
+
+# Recent-form weighting, most recent match first
+FORM_WEIGHTS = [0.4, 0.3, 0.2, 0.1, 0.05]
+FORM_SCORES = {'W': 1.0, 'D': 0.0}  # anything else counts as a loss (-1.0)
+_FORM_WEIGHTS = np.array(FORM_WEIGHTS)
+_NORMALIZED_FORM_WEIGHTS = np.array([w / sum(FORM_WEIGHTS) for w in FORM_WEIGHTS])
+
+def season_stage_for_month(month: int) -> float:
+    """Season stage (0 = early, 0.5 = mid, 1 = late) of a calendar month (1-12)."""
+    # Football seasons typically run August to May
+    if month >= 8:  # August onwards = early season
+        if month <= 10:
+            return 0.0  # Early season
+        elif month <= 2:
+            return 0.5  # Mid season
+        else:
+            return 1.0  # Late season
+    else:  # January to July
+        if month <= 2:
+            return 0.5  # Mid season
+        else:
+            return 1.0  # Late season / end of season
+
 class FeatureEngineer:
     """Feature engineering for football match predictions."""
     
@@ -30,6 +82,7 @@ class FeatureEngineer:
             'league_strength',
             'season_stage'
         ]
+        self._feature_index = {name: i for i, name in enumerate(self.feature_names)}
     
     def engineer_features(self, request) -> np.ndarray:
         """
@@ -86,13 +139,134 @@ class FeatureEngineer:
             # Convert to numpy array in the correct order
             feature_vector = np.array([features[name] for name in self.feature_names])
             
-            logger.info(f"Engineered {len(feature_vector)} features for prediction")
+            logger.debug("Engineered %d features for prediction", len(feature_vector))
             return feature_vector
             
         except Exception as e:
             logger.error(f"Feature engineering failed: {e}")
             raise
-    
+
+    def engineer_features_batch(self, requests: Union[Sequence[Any], np.ndarray],
+                                dtype=np.float64) -> np.ndarray:
+        """
+        Engineer features for many requests using whole-column operations.
+
+        Args:
+            requests: Sequence of PredictionRequest objects, or a NumPy
+                structured array with one field per request attribute
+            dtype: Floating point dtype of the returned matrix
+
+        Returns:
+            np.ndarray: C-contiguous (n_requests, n_features) feature matrix
+        """
+        try:
+            columns, home_forms, away_forms = self._extract_columns(requests)
+            n_rows = len(columns['league_id'])
+            features = np.empty((n_rows, len(self.feature_names)), dtype=dtype)
+            index = self._feature_index
+
+            # Direct features
+            for name in RAW_FIELDS[:-1]:
+                features[:, index[name]] = columns[name]
+
+            # Engineered features
+            features[:, index['form_difference']] = (
+                columns['home_form_rating'] - columns['away_form_rating']
+            )
+            features[:, index['goal_difference']] = (
+                columns['home_goals_avg'] - columns['away_goals_avg']
+            )
+            features[:, index['defensive_strength_difference']] = (
+                columns['away_goals_conceded_avg'] - columns['home_goals_conceded_avg']
+            )
+
+            # Head-to-head advantage (zero when the teams have never met)
+            total_h2h = columns['h2h_home_wins'] + columns['h2h_away_wins'] + columns['h2h_draws']
+            features[:, index['h2h_advantage']] = np.divide(
+                columns['h2h_home_wins'] - columns['h2h_away_wins'],
+                total_h2h,
+                out=np.zeros(n_rows),
+                where=total_h2h > 0
+            )
+
+            # Momentum score (form-based)
+            features[:, index['momentum_score']] = (
+                self._momentum_column(home_forms, columns['home_form_rating'])
+                - self._momentum_column(away_forms, columns['away_form_rating'])
+            )
+
+            features[:, index['league_strength']] = self._league_strength_column(
+                columns['league_id']
+            )
+
+            # Season stage only depends on today's date, so it is shared by every row
+            features[:, index['season_stage']] = self._get_season_stage('')
+
+            return features
+
+        except Exception as e:
+            logger.error(f"Batch feature engineering failed: {e}")
+            raise
+
+    def _extract_columns(self, requests) -> Tuple[Dict[str, np.ndarray], List, List]:
+        """Split requests into float columns plus the raw recent-form lists."""
+        if isinstance(requests, np.ndarray) and requests.dtype.names:
+            columns = {
+                name: np.asarray(requests[name], dtype=np.float64) for name in RAW_FIELDS
+            }
+            fields = requests.dtype.names
+            home_forms = requests['home_recent_form'] if 'home_recent_form' in fields else None
+            away_forms = requests['away_recent_form'] if 'away_recent_form' in fields else None
+            return columns, home_forms, away_forms
+
+        raw = np.array(
+            [attrgetter(*RAW_FIELDS)(request) for request in requests], dtype=np.float64
+        ).reshape(len(requests), len(RAW_FIELDS))
+        columns = {name: raw[:, i] for i, name in enumerate(RAW_FIELDS)}
+        home_forms = [getattr(request, 'home_recent_form', None) for request in requests]
+        away_forms = [getattr(request, 'away_recent_form', None) for request in requests]
+        return columns, home_forms, away_forms
+
+    def _momentum_column(self, recent_forms, form_ratings: np.ndarray) -> np.ndarray:
+        """Vectorized momentum for one side; mirrors _form_to_momentum."""
+        # Fallback to form rating, normalized to [-1, 1]
+        momentum = (form_ratings - 50) / 50
+        if recent_forms is None:
+            return momentum
+
+        rows = [i for i, form in enumerate(recent_forms) if form is not None and len(form) > 0]
+        if not rows:
+            return momentum
+
+        n_weights = len(FORM_WEIGHTS)
+        scores = np.zeros((len(rows), n_weights))
+        lengths = np.empty(len(rows), dtype=np.int64)
+        for r, i in enumerate(rows):
+            form = recent_forms[i]
+            lengths[r] = len(form)
+            head = form[:n_weights]
+            scores[r, :len(head)] = [FORM_SCORES.get(result, -1.0) for result in head]
+
+        # Forms shorter than the weight list use the leading weights as-is;
+        # longer forms only count the first matches, with re-normalized weights
+        positions = np.arange(n_weights)
+        weights = np.where(positions < lengths[:, None], _FORM_WEIGHTS, 0.0)
+        weights[lengths > n_weights] = _NORMALIZED_FORM_WEIGHTS
+
+        # Accumulate column by column to keep the scalar summation order
+        form_momentum = np.zeros(len(rows))
+        for position in range(n_weights):
+            form_momentum += scores[:, position] * weights[:, position]
+
+        momentum[rows] = form_momentum
+        return momentum
+
+    def _league_strength_column(self, league_ids: np.ndarray) -> np.ndarray:
+        """Vectorized league strength lookup with a default for unknown leagues."""
+        positions = np.clip(np.searchsorted(_LEAGUE_IDS, league_ids), 0, len(_LEAGUE_IDS) - 1)
+        return np.where(_LEAGUE_IDS[positions] == league_ids, _LEAGUE_VALUES[positions],
+                        DEFAULT_LEAGUE_STRENGTH)
+
     def _calculate_momentum_score(self, request) -> float:
         """Calculate momentum score based on recent form."""
         if hasattr(request, 'home_recent_form') and request.home_recent_form:
@@ -115,7 +289,7 @@ class FeatureEngineer:
             return 0.0
         
         # Weight recent matches more heavily
-        weights = [0.4, 0.3, 0.2, 0.1, 0.05][:len(recent_form)]
+        weights = FORM_WEIGHTS[:len(recent_form)]
         scores = []
         
         for result in recent_form:
@@ -134,39 +308,12 @@ class FeatureEngineer:
     
     def _get_league_strength(self, league_id: int) -> float:
         """Get league strength rating."""
-        # Simplified league strength mapping
-        league_strengths = {
-            39: 1.0,    # Premier League
-            140: 0.95,  # La Liga
-            78: 0.95,   # Bundesliga
-            135: 0.9,   # Serie A
-            61: 0.85,   # Ligue 1
-            94: 0.8,    # Liga NOS
-            88: 0.75,   # Eredivisie
-        }
-        
-        return league_strengths.get(league_id, 0.7)  # Default for unknown leagues
+        return LEAGUE_STRENGTHS.get(league_id, DEFAULT_LEAGUE_STRENGTH)
     
     def _get_season_stage(self, season: str) -> float:
         """Get season stage as a feature."""
         try:
-            # Extract year from season (e.g., "2023" from "2023-24")
-            current_year = datetime.now().year
-            current_month = datetime.now().month
-            
-            # Football seasons typically run August to May
-            if current_month >= 8:  # August onwards = early season
-                if current_month <= 10:
-                    return 0.0  # Early season
-                elif current_month <= 2:
-                    return 0.5  # Mid season
-                else:
-                    return 1.0  # Late season
-            else:  # January to July
-                if current_month <= 2:
-                    return 0.5  # Mid season
-                else:
-                    return 1.0  # Late season / end of season
+            return season_stage_for_month(datetime.now().month)
         except:
             return 0.5  # Default to mid-season
     
@@ -1,13 +1,143 @@
+import importlib.util
 import numpy as np
-import pandas as pd
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Mapping, NamedTuple, Optional, Sequence, Tuple
 import logging
 import os
-import joblib
 from datetime import datetime
+from types import MappingProxyType
+
+from models.tree_ensemble import TreeEnsemble, compile_booster
+from utils.metrics import PREDICTION_FALLBACKS
 
 logger = logging.getLogger(__name__)
 
+# Ultimate fallback - equal probabilities (home, draw, away)
+FALLBACK_PROBABILITIES = [0.33, 0.34, 0.33]
+
+# Column order of every probability row the predictor returns
+OUTCOME_CLASSES = ('HOME_WIN', 'DRAW', 'AWAY_WIN')
+
+# Inputs of the statistical fallback model and their neutral defaults
+STATISTICAL_INPUTS = [
+    ('home_form_rating', 50.0),
+    ('away_form_rating', 50.0),
+    ('home_win_rate', 50.0),
+    ('away_win_rate', 50.0),
+    ('h2h_home_wins', 0.0),
+    ('h2h_away_wins', 0.0),
+    ('h2h_draws', 0.0),
+]
+
+# Artifact layout written by save_model: the booster is stored in XGBoost's
+# native UBJSON format as a uint8 array and the compiled trees as
+# ENSEMBLE_ARRAYS, all of which joblib keeps outside the pickle stream so the
+# file can be memory-mapped read-only. Version 3 stores the trees in the
+# layout TreeEnsemble traverses
+ARTIFACT_FORMAT_VERSION = 3
+
+# Threads per native Booster call. Requests already run on several inference
+# pool workers, so one thread each avoids oversubscribing the host; raise it
+# when serving few, large batches
+PREDICT_NTHREAD = int(os.getenv('PREDICT_NTHREAD', '1'))
+
+# "numpy" scores artifacts with the compiled tree ensemble, straight from the
+# mapped file, so every worker process serving it shares one copy in the page
+# cache. "xgboost" loads the booster instead, which copies the model into
+# each process's private memory; it is also used for artifacts without a
+# compiled ensemble
+MODEL_EVALUATOR = os.getenv('MODEL_EVALUATOR', 'numpy').lower()
+
+
+def serialize_booster(model) -> np.ndarray:
+    """Raw UBJSON bytes of a fitted XGBoost model, as a uint8 array."""
+    return np.frombuffer(model.get_booster().save_raw(raw_format='ubj'), dtype=np.uint8)
+
+
+def deserialize_booster(raw: np.ndarray):
+    """
+    Rebuild an XGBClassifier from serialize_booster output.
+
+    raw may be a read-only memmap; XGBoost parses it into the process's own
+    memory, so the model is not shared between workers.
+    """
+    import xgboost as xgb
+
+    model = xgb.XGBClassifier()
+    model.load_model(bytearray(raw))
+    return model
+
+class ModelMetadata(NamedTuple):
+    """Lookups derived from a loaded model, built once and shared read-only by every request."""
+    feature_names: Tuple[str, ...]
+    feature_index: Mapping[str, int]
+    feature_importance: Optional[Mapping[str, float]]
+    # Model output column holding each of OUTCOME_CLASSES; None when already in that order
+    class_order: Optional[Tuple[int, ...]]
+    # Column of each STATISTICAL_INPUTS feature, None where the model lacks it
+    statistical_positions: Tuple[Optional[int], ...]
+    # Native XGBoost Booster for inplace_predict, None when the model has none
+    booster: Any
+
+
+def build_metadata(model, feature_names: Sequence[str],
+                   classes: Optional[Sequence[str]]) -> ModelMetadata:
+    """
+    Derive the per-model lookups used on the prediction path.
+
+    Args:
+        model: Fitted estimator, or None for the statistical model
+        feature_names: Model input columns, in order
+        classes: Outcome label of each model output column (the training
+            label encoder's classes_), or None if unknown
+
+    Returns:
+        ModelMetadata with immutable mappings
+    """
+    feature_names = tuple(feature_names)
+    feature_index = {name: position for position, name in enumerate(feature_names)}
+
+    feature_importance = None
+    if model is not None and hasattr(model, 'feature_importances_'):
+        feature_importance = MappingProxyType({
+            name: float(value) for name, value in zip(feature_names, model.feature_importances_)
+        })
+
+    class_order = None
+    if classes is not None:
+        classes = [str(label) for label in classes]
+        if sorted(classes) != sorted(OUTCOME_CLASSES):
+            logger.warning(f"Unexpected model classes {classes}; using output columns as-is")
+        elif tuple(classes) != OUTCOME_CLASSES:
+            class_order = tuple(classes.index(label) for label in OUTCOME_CLASSES)
+
+    return ModelMetadata(
+        feature_names=feature_names,
+        booster=_native_booster(model),
+        feature_index=MappingProxyType(feature_index),
+        feature_importance=feature_importance,
+        class_order=class_order,
+        statistical_positions=tuple(feature_index.get(name) for name, _ in STATISTICAL_INPUTS)
+    )
+
+
+def _native_booster(model):
+    """
+    The fitted Booster behind an XGBClassifier, configured for serving.
+
+    Only multi:softprob models qualify: their raw inplace_predict output is
+    already the (n_rows, n_classes) probability matrix predict_proba returns.
+    """
+    if getattr(model, 'objective', None) != 'multi:softprob' or not hasattr(model, 'get_booster'):
+        return None
+    try:
+        booster = model.get_booster()
+        booster.set_param({'nthread': PREDICT_NTHREAD})
+        return booster
+    except Exception as e:
+        logger.warning(f"Native booster unavailable, using predict_proba: {e}")
+        return None
+
+
 class MatchPredictor:
     """Machine learning model for football match prediction."""
     
@@ -18,6 +148,10 @@ class MatchPredictor:
         self.algorithm = "XGBoost"
         self.accuracy = None
         self.training_info = {}
+        # Outcome label of each model output column, from the training label encoder
+        self.classes: Optional[List[str]] = None
+        self._metadata: Optional[ModelMetadata] = None
+        self._metadata_source: Tuple = ()
         
         if model_path and os.path.exists(model_path):
             self.load_model(model_path)
@@ -60,9 +194,71 @@ class MatchPredictor:
                 return self._predict_statistical(features)
         except Exception as e:
             logger.error(f"Prediction failed: {e}")
+            PREDICTION_FALLBACKS.labels(method='predict', reason='ml_error').inc()
             # Fallback to basic statistical prediction
-            return self._predict_statistical(features)
-    
+            result = self._predict_statistical(features)
+            result['model_type'] = 'fallback'
+            return result
+
+    def predict_batch(self, features: np.ndarray) -> Dict[str, Any]:
+        """
+        Generate predictions for many matches with a single model call.
+
+        Args:
+            features: 2-D feature matrix, one row per match
+
+        Returns:
+            Dict containing an (n_rows, 3) probability matrix and metadata
+        """
+        features = np.atleast_2d(features)
+        try:
+            if self.model is not None:
+                return self._predict_ml_batch(features)
+            else:
+                return self._predict_statistical_batch(features)
+        except Exception as e:
+            logger.error(f"Batch prediction failed: {e}")
+            PREDICTION_FALLBACKS.labels(method='predict_batch', reason='ml_error').inc()
+            # Fallback to basic statistical prediction
+            result = self._predict_statistical_batch(features)
+            result['model_type'] = 'fallback'
+            return result
+
+    def _predict_ml_batch(self, features: np.ndarray) -> Dict[str, Any]:
+        """ML model prediction for a whole feature matrix."""
+        try:
+            metadata = self.metadata
+            probabilities = self._model_probabilities(features, metadata)
+
+            return {
+                'probabilities': probabilities,
+                'features_used': metadata.feature_names,
+                'model_type': 'ml'
+            }
+
+        except Exception as e:
+            logger.error(f"ML batch prediction failed: {e}")
+            raise
+
+    def _model_probabilities(self, features: np.ndarray, metadata: ModelMetadata) -> np.ndarray:
+        """
+        (n_rows, 3) home/draw/away probabilities from the ML model.
+
+        Uses the Booster's inplace_predict on a contiguous float32 matrix when
+        available, skipping the sklearn wrapper's validation and DMatrix
+        construction; XGBoost evaluates in float32 either way.
+        """
+        if metadata.booster is not None:
+            probabilities = metadata.booster.inplace_predict(
+                np.ascontiguousarray(features, dtype=np.float32)
+            )
+        else:
+            probabilities = self.model.predict_proba(features)
+        probabilities = np.asarray(probabilities, dtype=float)
+        if metadata.class_order is not None:
+            probabilities = probabilities[:, metadata.class_order]
+        return probabilities
+
     def _predict_ml(self, features: np.ndarray) -> Dict[str, Any]:
         """ML model prediction."""
         try:
@@ -71,20 +267,13 @@ class MatchPredictor:
                 features = features.reshape(1, -1)
             
             # Get prediction probabilities
-            probabilities = self.model.predict_proba(features)[0]
-            
-            # Get feature importance if available
-            feature_importance = None
-            if hasattr(self.model, 'feature_importances_'):
-                feature_importance = dict(zip(
-                    self.feature_names,
-                    self.model.feature_importances_
-                ))
+            metadata = self.metadata
+            probabilities = self._model_probabilities(features, metadata)[0]
             
             return {
                 'probabilities': probabilities.tolist(),
-                'features_used': self.feature_names,
-                'feature_importance': feature_importance,
+                'features_used': metadata.feature_names,
+                'feature_importance': metadata.feature_importance,
                 'model_type': 'ml',
                 'confidence_raw': float(np.max(probabilities))
             }
@@ -95,92 +284,146 @@ class MatchPredictor:
     
     def _predict_statistical(self, features: np.ndarray) -> Dict[str, Any]:
         """Fallback statistical prediction using the current FootDash algorithm."""
+        result = self._predict_statistical_batch(np.atleast_2d(features), method='predict')
+        probabilities = result['probabilities'][0].tolist()
+
+        return {
+            'probabilities': probabilities,
+            'features_used': self.metadata.feature_names,
+            'feature_importance': None,
+            'model_type': result['model_type'],
+            'confidence_raw': float(max(probabilities))
+        }
+
+    def _predict_statistical_batch(self, features: np.ndarray,
+                                   method: str = 'predict_batch') -> Dict[str, Any]:
+        """
+        Statistical prediction for a whole feature matrix using array operations.
+
+        Rows it cannot score get FALLBACK_PROBABILITIES, counted once per call
+        in PREDICTION_FALLBACKS under method with reason statistical_error.
+        """
+        n_rows = features.shape[0]
         try:
-            # Map features to expected positions
-            feature_dict = dict(zip(self.feature_names, features))
-            
             # Extract key features for statistical calculation
-            home_form = feature_dict.get('home_form_rating', 50)
-            away_form = feature_dict.get('away_form_rating', 50)
-            home_win_rate = feature_dict.get('home_win_rate', 50)
-            away_win_rate = feature_dict.get('away_win_rate', 50)
-            h2h_home_wins = feature_dict.get('h2h_home_wins', 0)
-            h2h_away_wins = feature_dict.get('h2h_away_wins', 0)
-            h2h_draws = feature_dict.get('h2h_draws', 0)
-            
+            (home_form, away_form, home_win_rate, away_win_rate,
+             h2h_home_wins, h2h_away_wins, h2h_draws) = self._statistical_columns(features)
+
             # Apply FootDash statistical algorithm
             home_advantage = 10  # 10% boost for home team
-            
+
             # Calculate base scores
             home_score = home_form * 0.4 + home_win_rate * 0.4 + home_advantage
             away_score = away_form * 0.4 + away_win_rate * 0.4
-            
-            # Head-to-head adjustment
+
+            # Head-to-head adjustment, only where the teams have met before
             total_h2h = h2h_home_wins + h2h_away_wins + h2h_draws
-            if total_h2h > 0:
-                h2h_home_percent = (h2h_home_wins / total_h2h) * 100
-                h2h_away_percent = (h2h_away_wins / total_h2h) * 100
-                home_score += h2h_home_percent * 0.2
-                away_score += h2h_away_percent * 0.2
-            
+            has_h2h = total_h2h > 0
+            home_score += np.divide(h2h_home_wins, total_h2h, out=np.zeros(n_rows), where=has_h2h) * 100 * 0.2
+            away_score += np.divide(h2h_away_wins, total_h2h, out=np.zeros(n_rows), where=has_h2h) * 100 * 0.2
+
             # Normalize and calculate probabilities
             total = home_score + away_score
             win_probability_space = 75  # Reserve 25% for draw
-            
-            home_win = (home_score / total) * win_probability_space
-            away_win = (away_score / total) * win_probability_space
-            draw = 100 - (home_win + away_win)
-            
-            # Ensure draw probability is between 15-30%
-            if draw < 15:
-                adjustment = (15 - draw) / 2
-                home_win -= adjustment
-                away_win -= adjustment
-                draw = 15
-            elif draw > 30:
-                adjustment = (draw - 30) / 2
-                home_win += adjustment
-                away_win += adjustment
-                draw = 30
-            
+
+            probabilities = np.zeros((n_rows, 3))
+            home_win = probabilities[:, 0]
+            draw = probabilities[:, 1]
+            away_win = probabilities[:, 2]
+            np.divide(home_score, total, out=home_win, where=total != 0)
+            np.divide(away_score, total, out=away_win, where=total != 0)
+            home_win *= win_probability_space
+            away_win *= win_probability_space
+            np.subtract(100, home_win + away_win, out=draw)
+
+            # Ensure draw probability is between 15-30%, moving the shortfall
+            # (or excess) evenly off (or onto) both win probabilities
+            # (only one of the two terms is non-zero for any row)
+            adjustment = (15 - np.minimum(draw, 15)) / 2 - (np.maximum(draw, 30) - 30) / 2
+            home_win -= adjustment
+            away_win -= adjustment
+            np.minimum(np.maximum(draw, 15, out=draw), 30, out=draw)
+
             # Convert to probabilities (0-1)
-            probabilities = [home_win / 100, draw / 100, away_win / 100]
-            
+            probabilities /= 100
+
+            # Rows that cannot be normalized get the ultimate fallback
+            invalid = (total == 0) | ~np.isfinite(probabilities).all(axis=1)
+            if invalid.any():
+                logger.error(f"Statistical prediction failed for {int(invalid.sum())} row(s)")
+                PREDICTION_FALLBACKS.labels(method=method, reason='statistical_error').inc()
+                probabilities[invalid] = FALLBACK_PROBABILITIES
+
             return {
                 'probabilities': probabilities,
-                'features_used': self.feature_names,
-                'feature_importance': None,
-                'model_type': 'statistical',
-                'confidence_raw': float(max(probabilities))
+                'features_used': self.metadata.feature_names,
+                'model_type': 'fallback' if n_rows and invalid.all() else 'statistical'
             }
-            
+
         except Exception as e:
             logger.error(f"Statistical prediction failed: {e}")
+            PREDICTION_FALLBACKS.labels(method=method, reason='statistical_error').inc()
             # Ultimate fallback - equal probabilities
             return {
-                'probabilities': [0.33, 0.34, 0.33],
-                'features_used': self.feature_names,
-                'feature_importance': None,
-                'model_type': 'fallback',
-                'confidence_raw': 0.34
+                'probabilities': np.tile(FALLBACK_PROBABILITIES, (n_rows, 1)),
+                'features_used': self.metadata.feature_names,
+                'model_type': 'fallback'
             }
-    
+
+    def _statistical_columns(self, features: np.ndarray) -> np.ndarray:
+        """Gather the statistical model inputs as a (7, n_rows) float64 array."""
+        positions = list(self.metadata.statistical_positions)
+        if None not in positions:
+            return features[:, positions].T.astype(np.float64)
+
+        # Missing features take their neutral defaults
+        columns = np.empty((len(STATISTICAL_INPUTS), features.shape[0]))
+        for row, (position, (_, default)) in enumerate(zip(positions, STATISTICAL_INPUTS)):
+            columns[row] = default if position is None else features[:, position]
+        return columns
+
     def load_model(self, model_path: str):
-        """Load trained ML model from file."""
+        """
+        Load trained ML model from file.
+
+        The artifact is memory-mapped read-only. Its compiled 'tree_ensemble'
+        is scored by the NumPy TreeEnsemble on the mapped arrays, so worker
+        processes loading the same file share its pages through the OS page
+        cache. The booster is deserialized into private memory instead when
+        MODEL_EVALUATOR is "xgboost" (and xgboost is installed) or the
+        artifact has no compiled ensemble. Legacy artifacts holding a pickled
+        estimator under 'model' are still accepted.
+        """
+        import joblib
+
         try:
-            model_data = joblib.load(model_path)
+            model_data = joblib.load(model_path, mmap_mode='r')
             
             if isinstance(model_data, dict):
-                self.model = model_data.get('model')
+                ensemble = model_data.get('tree_ensemble')
+                booster = model_data.get('booster')
+                if ensemble is not None and (MODEL_EVALUATOR == 'numpy' or booster is None
+                                             or importlib.util.find_spec('xgboost') is None):
+                    self.model = TreeEnsemble(ensemble)
+                elif booster is not None:
+                    self.model = deserialize_booster(booster)
+                else:
+                    self.model = model_data.get('model')
                 self.feature_names = model_data.get('feature_names', [])
                 self.version = model_data.get('version', '1.0.0')
                 self.accuracy = model_data.get('accuracy')
                 self.training_info = model_data.get('training_info', {})
+                self.classes = model_data.get('classes')
+                label_encoder = model_data.get('label_encoder')
+                if self.classes is None and label_encoder is not None:
+                    self.classes = list(label_encoder.classes_)
             else:
                 # Assume it's just the model
                 self.model = model_data
                 logger.warning("Loaded model without metadata")
-            
+
+            # Build the prediction-path lookups now rather than on the first request
+            self.metadata
             logger.info(f"Loaded ML model: {self.algorithm} v{self.version}")
             
         except Exception as e:
@@ -189,18 +432,24 @@ class MatchPredictor:
     
     def save_model(self, model_path: str):
         """Save trained model to file."""
+        import joblib
+
         try:
             model_data = {
-                'model': self.model,
+                'format_version': ARTIFACT_FORMAT_VERSION,
+                'booster': serialize_booster(self.model) if hasattr(self.model, 'get_booster') else None,
+                'tree_ensemble': self._export_tree_ensemble(),
                 'feature_names': self.feature_names,
                 'version': self.version,
                 'algorithm': self.algorithm,
                 'accuracy': self.accuracy,
                 'training_info': self.training_info,
+                'classes': self.classes,
                 'created_at': datetime.now().isoformat()
             }
             
-            os.makedirs(os.path.dirname(model_path), exist_ok=True)
+            os.makedirs(os.path.dirname(model_path) or '.', exist_ok=True)
+            # Uncompressed, so the arrays stay mappable
             joblib.dump(model_data, model_path)
             logger.info(f"Model saved to {model_path}")
             
@@ -208,11 +457,36 @@ class MatchPredictor:
             logger.error(f"Failed to save model: {e}")
             raise
     
-    def get_feature_importance(self) -> Optional[Dict[str, float]]:
-        """Get feature importance from the model."""
-        if self.model and hasattr(self.model, 'feature_importances_'):
-            return dict(zip(self.feature_names, self.model.feature_importances_))
-        return None
+    def _export_tree_ensemble(self) -> Optional[Dict[str, np.ndarray]]:
+        """Compiled arrays of the current model, or None if it cannot be compiled."""
+        if isinstance(self.model, TreeEnsemble):
+            return self.model.to_arrays()
+        if getattr(self.model, 'objective', None) != 'multi:softprob':
+            return None
+        try:
+            return compile_booster(self.model.get_booster())
+        except Exception as e:
+            logger.warning(f"Tree ensemble export skipped: {e}")
+            return None
+
+    @property
+    def metadata(self) -> ModelMetadata:
+        """
+        Lookups derived from the current model.
+
+        Built when a model is loaded and rebuilt only if model, feature_names
+        or classes are replaced afterwards.
+        """
+        source = (self.model, self.feature_names, self.classes)
+        if self._metadata is None or any(
+                current is not cached for current, cached in zip(source, self._metadata_source)):
+            self._metadata = build_metadata(self.model, self.feature_names, self.classes)
+            self._metadata_source = source
+        return self._metadata
+
+    def get_feature_importance(self) -> Optional[Mapping[str, float]]:
+        """Get feature importance from the model (read-only, computed once per model)."""
+        return self.metadata.feature_importance
     
     def validate_features(self, features: np.ndarray) -> bool:
         """Validate input features."""
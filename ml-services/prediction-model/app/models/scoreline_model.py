@@ -0,0 +1,192 @@
+import numpy as np
+from typing import Dict, List, Sequence, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Goals per side covered by the scoreline grid; the last row/column holds the
+# remaining tail mass so the grid always sums to one
+MAX_GOALS = 15
+
+OVER_UNDER_LINES = [0.5, 1.5, 2.5, 3.5, 4.5, 5.5]
+ASIAN_HANDICAP_LINES = [-2.5, -2.0, -1.5, -1.0, -0.5, 0.0, 0.5, 1.0, 1.5, 2.0, 2.5]
+CORRECT_SCORE_TOP = 10
+
+
+def expected_goals(home_goals_avg, away_goals_avg,
+                   home_goals_conceded_avg, away_goals_conceded_avg) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Expected goals for each side: a team's attack meets the opponent's defence.
+
+    Accepts scalars or arrays; returns float64 arrays of home and away expectations.
+    """
+    home_expected = (np.asarray(home_goals_avg, dtype=np.float64)
+                     + np.asarray(away_goals_conceded_avg, dtype=np.float64)) / 2
+    away_expected = (np.asarray(away_goals_avg, dtype=np.float64)
+                     + np.asarray(home_goals_conceded_avg, dtype=np.float64)) / 2
+    return np.atleast_1d(home_expected), np.atleast_1d(away_expected)
+
+
+class ScorelineModel:
+    """
+    Scoreline probabilities for a batch of matches from one goal matrix each.
+
+    Home and away goals are independent Poisson variables, optionally with the
+    Dixon-Coles low-score correction (rho != 0). Every market (1X2, BTTS,
+    over/under, Asian handicap, correct score) is read off the same
+    (n_matches, max_goals + 1, max_goals + 1) matrix with array operations.
+    """
+
+    def __init__(self, max_goals: int = MAX_GOALS):
+        self.max_goals = max_goals
+        goals = np.arange(max_goals + 1)
+        self._goals = goals.astype(np.float64)
+        self._log_factorials = np.concatenate(([0.0], np.cumsum(np.log(goals[1:]))))
+
+        home_goals, away_goals = np.meshgrid(goals, goals, indexing='ij')
+        # One-hot maps from grid cells to total goals and goal difference, so
+        # both distributions come out of a single matrix product
+        totals = (home_goals + away_goals).ravel()
+        self._total_map = np.zeros((totals.size, 2 * max_goals + 1))
+        self._total_map[np.arange(totals.size), totals] = 1.0
+
+        differences = (home_goals - away_goals).ravel() + max_goals
+        self._difference_map = np.zeros((differences.size, 2 * max_goals + 1))
+        self._difference_map[np.arange(differences.size), differences] = 1.0
+
+        self._scores = [f"{h}-{a}" for h, a in zip(home_goals.ravel(), away_goals.ravel())]
+
+    def _poisson(self, expected: np.ndarray) -> np.ndarray:
+        """Poisson pmf over 0..max_goals per row, tail mass folded into the last column."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_rate = np.log(expected)[:, None]
+            # 0 * log(0) is taken as 0, so zero expectations put all mass on no goals
+            log_pmf = np.where(self._goals == 0, 0.0, self._goals * log_rate)
+        pmf = np.exp(log_pmf - expected[:, None] - self._log_factorials)
+        pmf[:, -1] = np.maximum(1.0 - pmf[:, :-1].sum(axis=1), 0.0)
+        return pmf
+
+    def goal_matrix(self, home_expected: np.ndarray, away_expected: np.ndarray,
+                    rho=0.0) -> np.ndarray:
+        """
+        Joint probability of every scoreline.
+
+        Args:
+            home_expected: Expected home goals, one per match
+            away_expected: Expected away goals, one per match
+            rho: Dixon-Coles dependence between low scores, scalar or one per
+                match (0 means independent)
+
+        Returns:
+            (n_matches, max_goals + 1, max_goals + 1) array; [m, h, a] is P(h-a)
+        """
+        home_expected = np.atleast_1d(np.asarray(home_expected, dtype=np.float64))
+        away_expected = np.atleast_1d(np.asarray(away_expected, dtype=np.float64))
+        matrix = self._poisson(home_expected)[:, :, None] * self._poisson(away_expected)[:, None, :]
+
+        rho = np.broadcast_to(np.asarray(rho, dtype=np.float64), home_expected.shape)
+        if rho.any():
+            # tau correction of the four low-score cells; it preserves total mass
+            matrix[:, 0, 0] *= 1 - home_expected * away_expected * rho
+            matrix[:, 0, 1] *= 1 + home_expected * rho
+            matrix[:, 1, 0] *= 1 + away_expected * rho
+            matrix[:, 1, 1] *= 1 - rho
+            np.maximum(matrix, 0.0, out=matrix)
+            matrix /= matrix.sum(axis=(1, 2), keepdims=True)
+
+        return matrix
+
+    def outcome_probabilities(self, matrix: np.ndarray) -> np.ndarray:
+        """(n, 3) home win / draw / away win probabilities."""
+        difference = self.goal_difference(matrix)
+        g = self.max_goals
+        return np.stack([
+            difference[:, g + 1:].sum(axis=1),
+            difference[:, g],
+            difference[:, :g].sum(axis=1)
+        ], axis=1)
+
+    def btts_probability(self, matrix: np.ndarray) -> np.ndarray:
+        """(n,) probability that both teams score."""
+        return matrix[:, 1:, 1:].sum(axis=(1, 2))
+
+    def total_goals(self, matrix: np.ndarray) -> np.ndarray:
+        """(n, 2 * max_goals + 1) distribution of total goals."""
+        return matrix.reshape(len(matrix), -1) @ self._total_map
+
+    def goal_difference(self, matrix: np.ndarray) -> np.ndarray:
+        """(n, 2 * max_goals + 1) distribution of home minus away goals, from -max_goals."""
+        return matrix.reshape(len(matrix), -1) @ self._difference_map
+
+    def under_probabilities(self, matrix: np.ndarray, lines: Sequence[float]) -> np.ndarray:
+        """
+        (n, n_lines) probability that total goals do not exceed each line.
+
+        A whole-number line counts the exact total as under, matching
+        /predict/over-under.
+        """
+        cdf = self._total_cdf(matrix)
+        return cdf[:, self._cdf_index(lines, cdf)]
+
+    def under_probability_per_match(self, matrix: np.ndarray, lines: Sequence[float]) -> np.ndarray:
+        """(n,) probability that total goals do not exceed each match's own line."""
+        cdf = self._total_cdf(matrix)
+        return np.take_along_axis(cdf, self._cdf_index(lines, cdf)[:, None], axis=1)[:, 0]
+
+    def _total_cdf(self, matrix: np.ndarray) -> np.ndarray:
+        """P(total <= k - 1) in column k, so column 0 covers negative lines."""
+        return np.concatenate(
+            [np.zeros((len(matrix), 1)), np.cumsum(self.total_goals(matrix), axis=1)], axis=1
+        )
+
+    @staticmethod
+    def _cdf_index(lines: Sequence[float], cdf: np.ndarray) -> np.ndarray:
+        return np.clip(np.floor(np.asarray(lines)).astype(int) + 1, 0, cdf.shape[1] - 1)
+
+    def asian_handicap(self, matrix: np.ndarray, lines: Sequence[float]) -> np.ndarray:
+        """
+        (n, n_lines, 3) home / push / away probabilities for home handicap lines.
+
+        The home side covers when goal difference + line > 0; whole-number
+        lines push when it equals 0.
+        """
+        difference = self.goal_difference(matrix)
+        margins = np.arange(-self.max_goals, self.max_goals + 1)
+        adjusted = margins[None, :] + np.asarray(lines)[:, None]  # (n_lines, n_margins)
+
+        home = difference @ (adjusted > 0).T
+        push = difference @ (adjusted == 0).T
+        away = difference @ (adjusted < 0).T
+        return np.stack([home, push, away], axis=2)
+
+    def correct_scores(self, matrix: np.ndarray, top: int = CORRECT_SCORE_TOP) -> List[List[Tuple[str, float]]]:
+        """Most likely scorelines per match, as (score, probability) pairs."""
+        flat = matrix.reshape(len(matrix), -1)
+        top = min(top, flat.shape[1])
+        best = np.argpartition(-flat, top - 1, axis=1)[:, :top]
+        best = np.take_along_axis(best, np.argsort(-np.take_along_axis(flat, best, axis=1)), axis=1)
+        return [
+            [(self._scores[cell], float(flat[row, cell])) for cell in cells]
+            for row, cells in enumerate(best)
+        ]
+
+    def markets(self, home_expected: np.ndarray, away_expected: np.ndarray, rho=0.0,
+                over_under_lines: Sequence[float] = OVER_UNDER_LINES,
+                asian_lines: Sequence[float] = ASIAN_HANDICAP_LINES,
+                correct_score_top: int = CORRECT_SCORE_TOP) -> Dict[str, object]:
+        """
+        Every supported market for a batch of matches from one goal matrix each.
+
+        Returns:
+            Dict of arrays (and per-match correct-score lists), one row per match
+        """
+        matrix = self.goal_matrix(home_expected, away_expected, rho)
+        return {
+            'home_expected': np.atleast_1d(home_expected),
+            'away_expected': np.atleast_1d(away_expected),
+            'outcome': self.outcome_probabilities(matrix),
+            'btts': self.btts_probability(matrix),
+            'under': self.under_probabilities(matrix, over_under_lines),
+            'asian_handicap': self.asian_handicap(matrix, asian_lines),
+            'correct_score': self.correct_scores(matrix, correct_score_top)
+        }
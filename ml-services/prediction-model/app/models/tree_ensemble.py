@@ -0,0 +1,227 @@
+import json
+import numpy as np
+from typing import Any, Dict, Mapping
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Rows traversed per block; small blocks keep the (rows, trees) node arrays
+# in cache (about 2x faster than 4096 at 100 trees)
+EVALUATION_BLOCK_ROWS = 128
+
+# Arrays making up a compiled ensemble, as stored in the model artifact. They
+# are kept in the dtype and layout traversal indexes with, so an ensemble built
+# on a memory-mapped artifact uses the mapped pages without copying them:
+#   children      intp, 2 per node; children[2 * node + go_right] is the next node
+#   feature       intp feature index per node
+#   missing_right bool per node; missing values go right only where it is set
+#   roots         intp first node of each tree
+#   class_map     float32 (n_trees, n_classes) one-hot, summing leaves into margins
+#   depth         0-d intp, traversal steps needed to reach the deepest leaf
+ENSEMBLE_ARRAYS = ('feature', 'threshold', 'children', 'missing_right', 'value',
+                   'roots', 'class_map', 'base_margin', 'feature_importances', 'depth')
+
+
+def compile_booster(booster, probe_rows: int = 16) -> Dict[str, np.ndarray]:
+    """
+    Compile a multi:softprob XGBoost Booster into flat NumPy arrays.
+
+    Nodes of every tree are concatenated: node i splits on feature[i] at
+    threshold[i] (x < threshold goes to children[2 * i], otherwise to
+    children[2 * i + 1]; missing values go right where missing_right[i]) and
+    leaves hold value[i]. Leaves point to themselves, so a fixed number of
+    traversal steps lands every row on its leaf.
+
+    The base margin is measured rather than parsed, because its encoding in
+    the model JSON differs between XGBoost releases: the booster's raw margin
+    on a few probe rows minus the summed leaf values must be the same
+    constant for every row, and that constant is stored.
+
+    Args:
+        booster: Fitted xgboost.Booster with objective multi:softprob
+        probe_rows: Random rows used to measure and verify the base margin
+
+    Returns:
+        Dict of arrays keyed by ENSEMBLE_ARRAYS
+
+    Raises:
+        ValueError: If the model uses unsupported splits or its margins cannot be reproduced
+    """
+    config = json.loads(booster.save_raw(raw_format='json'))['learner']
+    n_classes = max(int(config['learner_model_param']['num_class']), 1)
+    n_features = int(config['learner_model_param']['num_feature'])
+    model = config['gradient_booster']['model']
+
+    feature, threshold, left, right, default_left, value, roots = [], [], [], [], [], [], []
+    gain_sum = np.zeros(n_features)
+    gain_count = np.zeros(n_features)
+    offset = 0
+    for tree in model['trees']:
+        if any(tree['split_type']):
+            raise ValueError("Categorical splits are not supported")
+        children_left = np.asarray(tree['left_children'], dtype=np.int64)
+        children_right = np.asarray(tree['right_children'], dtype=np.int64)
+        splits = np.asarray(tree['split_indices'], dtype=np.int64)
+        conditions = np.asarray(tree['split_conditions'], dtype=np.float32)
+        leaf = children_left == -1
+        nodes = np.arange(len(leaf)) + offset
+
+        feature.append(np.where(leaf, 0, splits))
+        # A leaf compares against +inf, so it always "goes left" to itself
+        threshold.append(np.where(leaf, np.float32(np.inf), conditions))
+        left.append(np.where(leaf, nodes, children_left + offset))
+        right.append(np.where(leaf, nodes, children_right + offset))
+        default_left.append(np.asarray(tree['default_left'], dtype=bool) | leaf)
+        value.append(np.where(leaf, conditions, np.float32(0)))
+        roots.append(offset)
+
+        losses = np.asarray(tree['loss_changes'], dtype=np.float64)
+        np.add.at(gain_sum, splits[~leaf], losses[~leaf])
+        np.add.at(gain_count, splits[~leaf], 1)
+        offset += len(leaf)
+
+    tree_class = np.asarray(model['tree_info'], dtype=np.intp) % n_classes
+    class_map = np.zeros((len(tree_class), n_classes), dtype=np.float32)
+    class_map[np.arange(len(tree_class)), tree_class] = 1.0
+    children = np.stack([np.concatenate(left), np.concatenate(right)], axis=1).ravel().astype(np.intp)
+    roots = np.asarray(roots, dtype=np.intp)
+    arrays = {
+        'feature': np.concatenate(feature).astype(np.intp),
+        'threshold': np.concatenate(threshold).astype(np.float32),
+        'children': children,
+        'missing_right': ~np.concatenate(default_left),
+        'value': np.concatenate(value).astype(np.float32),
+        'roots': roots,
+        'class_map': class_map,
+        'base_margin': np.zeros(n_classes),
+        # Average gain per split, normalized like XGBClassifier.feature_importances_
+        'feature_importances': _normalized(
+            np.divide(gain_sum, gain_count, out=np.zeros(n_features), where=gain_count > 0)
+        ).astype(np.float32),
+        'depth': np.asarray(_max_depth(children, roots), dtype=np.intp)
+    }
+
+    probe = np.random.default_rng(0).normal(size=(probe_rows, n_features)).astype(np.float32)
+    probe[::3, ::2] = np.nan
+    margin = np.asarray(booster.inplace_predict(probe, predict_type='margin'), dtype=np.float64)
+    residual = margin.reshape(probe_rows, n_classes) - TreeEnsemble(arrays).margins(probe)
+    if not np.allclose(residual, residual[0], atol=1e-4):
+        raise ValueError("Compiled trees do not reproduce the booster's margins")
+    arrays['base_margin'] = residual.mean(axis=0)
+    return arrays
+
+
+def _upgrade_layout(arrays: Mapping[str, Any]) -> Dict[str, np.ndarray]:
+    """
+    Convert a format 2 ensemble (separate int32 left/right children,
+    default_left and tree_class) to ENSEMBLE_ARRAYS. The result is a private
+    copy; re-save the artifact to share its pages again.
+    """
+    tree_class = np.asarray(arrays['tree_class'])
+    class_map = np.zeros((len(tree_class), len(arrays['base_margin'])), dtype=np.float32)
+    class_map[np.arange(len(tree_class)), tree_class] = 1.0
+    children = np.stack([arrays['left'], arrays['right']], axis=1).ravel().astype(np.intp)
+    roots = np.asarray(arrays['roots'], dtype=np.intp)
+    return {
+        'feature': np.asarray(arrays['feature'], dtype=np.intp),
+        'threshold': arrays['threshold'],
+        'children': children,
+        'missing_right': ~np.asarray(arrays['default_left']),
+        'value': arrays['value'],
+        'roots': roots,
+        'class_map': class_map,
+        'base_margin': arrays['base_margin'],
+        'feature_importances': arrays['feature_importances'],
+        'depth': np.asarray(_max_depth(children, roots), dtype=np.intp)
+    }
+
+
+def _max_depth(children: np.ndarray, roots: np.ndarray) -> int:
+    """Traversal steps needed to reach the deepest leaf."""
+    nodes = roots
+    depth = 0
+    while True:
+        reached = children[(2 * nodes[:, None] + np.arange(2)).ravel()]
+        reached = np.unique(reached[reached != np.repeat(nodes, 2)])
+        if reached.size == 0:
+            return depth
+        nodes = reached
+        depth += 1
+
+
+def _normalized(weights: np.ndarray) -> np.ndarray:
+    total = weights.sum()
+    return weights / total if total > 0 else weights
+
+
+class TreeEnsemble:
+    """
+    Gradient-boosted trees scored with vectorized NumPy traversal.
+
+    Evaluates the output of compile_booster without the xgboost runtime.
+    Every row walks all trees at once, one tree level per step; features
+    are compared in float32, as XGBoost does.
+    """
+
+    def __init__(self, arrays: Mapping[str, Any]):
+        """
+        Args:
+            arrays: compile_booster output; memory-mapped arrays are used
+                as-is, without copying
+        """
+        if 'children' not in arrays:
+            arrays = _upgrade_layout(arrays)
+        self.feature = np.asarray(arrays['feature'], dtype=np.intp)
+        self.threshold = np.asarray(arrays['threshold'], dtype=np.float32)
+        self.children = np.asarray(arrays['children'], dtype=np.intp)
+        self.missing_right = np.asarray(arrays['missing_right'], dtype=bool)
+        self.value = np.asarray(arrays['value'], dtype=np.float32)
+        self.roots = np.asarray(arrays['roots'], dtype=np.intp)
+        self.class_map = np.asarray(arrays['class_map'], dtype=np.float32)
+        self.base_margin = np.asarray(arrays['base_margin'], dtype=np.float64)
+        self.feature_importances_ = np.asarray(arrays['feature_importances'])
+
+        self.depth = int(arrays['depth'])
+
+        self.n_classes = len(self.base_margin)
+        self.n_features = len(self.feature_importances_)
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Arrays to store in the model artifact."""
+        return {
+            'feature': self.feature,
+            'threshold': self.threshold,
+            'children': self.children,
+            'missing_right': self.missing_right,
+            'value': self.value,
+            'roots': self.roots,
+            'class_map': self.class_map,
+            'base_margin': self.base_margin,
+            'feature_importances': self.feature_importances_,
+            'depth': np.asarray(self.depth, dtype=np.intp)
+        }
+
+    def margins(self, features: np.ndarray) -> np.ndarray:
+        """(n_rows, n_classes) raw scores, base margin included."""
+        features = np.ascontiguousarray(np.atleast_2d(features), dtype=np.float32)
+        margins = np.empty((len(features), self.n_classes))
+        for start in range(0, len(features), EVALUATION_BLOCK_ROWS):
+            block = features[start:start + EVALUATION_BLOCK_ROWS]
+            flat = block.ravel()
+            row_offsets = (np.arange(len(block)) * block.shape[1])[:, None]
+            nodes = np.tile(self.roots, (len(block), 1))
+            for _ in range(self.depth):
+                x = flat.take(row_offsets + self.feature.take(nodes))
+                go_right = x >= self.threshold.take(nodes)
+                go_right |= np.isnan(x) & self.missing_right.take(nodes)
+                nodes = self.children.take(2 * nodes + go_right)
+            margins[start:start + len(block)] = self.value.take(nodes) @ self.class_map
+        return margins + self.base_margin
+
+    def predict_proba(self, features: np.ndarray) -> np.ndarray:
+        """(n_rows, n_classes) softmax probabilities, as XGBClassifier.predict_proba."""
+        margins = self.margins(features)
+        margins -= margins.max(axis=1, keepdims=True)
+        np.exp(margins, out=margins)
+        margins /= margins.sum(axis=1, keepdims=True)
+        return margins
@@ -0,0 +1,114 @@
+import os
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class InferencePoolSaturated(Exception):
+    """Raised when the inference queue is full and a request must be shed."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Inference queue is full, retry later")
+        self.retry_after = retry_after
+
+
+class InferencePool:
+    """
+    Bounded worker pool for CPU-bound inference.
+
+    Keeps model calls off the asyncio event loop. NumPy and XGBoost release the
+    GIL while scoring, so worker threads run in parallel and share the loaded
+    model without copying it into other processes.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_pending: Optional[int] = None,
+                 chunk_size: Optional[int] = None, retry_after: Optional[int] = None):
+        self.max_workers = max_workers or int(
+            os.getenv('INFERENCE_WORKERS', str(min(4, os.cpu_count() or 1)))
+        )
+        # Capacity counts queued and running jobs; a full batch must always fit
+        self.max_pending = max(
+            max_pending or int(os.getenv('INFERENCE_MAX_PENDING', str(self.max_workers * 8))),
+            self.max_workers
+        )
+        self.chunk_size = chunk_size or int(os.getenv('INFERENCE_CHUNK_SIZE', '256'))
+        self.retry_after = retry_after or int(os.getenv('INFERENCE_RETRY_AFTER', '1'))
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix='inference'
+        )
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def _reserve(self, jobs: int) -> None:
+        """Claim queue slots for a request, or shed it."""
+        with self._lock:
+            if self._pending + jobs > self.max_pending:
+                self._rejected += 1
+                raise InferencePoolSaturated(self.retry_after)
+            self._pending += jobs
+
+    def _release(self, _future=None) -> None:
+        with self._lock:
+            self._pending -= 1
+            self._completed += 1
+
+    def _submit(self, fn: Callable, *args) -> asyncio.Future:
+        # Release the slot when the job really finishes, even if the caller
+        # stopped waiting for it
+        future = self._executor.submit(fn, *args)
+        future.add_done_callback(self._release)
+        return asyncio.wrap_future(future)
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """
+        Run a blocking call on the pool.
+
+        Raises:
+            InferencePoolSaturated: If the queue is full
+        """
+        self._reserve(1)
+        return await self._submit(fn, *args)
+
+    async def map_chunks(self, fn: Callable, matrix: np.ndarray) -> List[Any]:
+        """
+        Split a feature matrix into row chunks and score them in parallel.
+
+        Args:
+            fn: Callable taking a 2-D chunk of rows
+            matrix: Feature matrix, one row per match
+
+        Returns:
+            List of fn results, one per chunk, in row order
+
+        Raises:
+            InferencePoolSaturated: If the queue cannot take every chunk
+        """
+        n_chunks = min(-(-len(matrix) // self.chunk_size), self.max_workers)
+        chunks = np.array_split(matrix, max(n_chunks, 1))
+
+        self._reserve(len(chunks))
+        return await asyncio.gather(*[self._submit(fn, chunk) for chunk in chunks])
+
+    def stats(self) -> Dict[str, int]:
+        """Current queue depth and lifetime counters."""
+        with self._lock:
+            return {
+                'workers': self.max_workers,
+                'max_pending': self.max_pending,
+                'pending': self._pending,
+                'completed': self._completed,
+                'rejected': self._rejected
+            }
+
+    def shutdown(self) -> None:
+        """Stop accepting work and wait for running jobs."""
+        self._executor.shutdown(wait=True)
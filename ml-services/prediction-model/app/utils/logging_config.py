@@ -0,0 +1,180 @@
+import os
+import sys
+import json
+import time
+import atexit
+import random
+import logging
+import logging.handlers
+import queue
+import threading
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Loggers that write once (or more) per prediction
+HOT_PATH_LOGGERS = ['models.feature_engineer']
+
+
+class JsonFormatter(logging.Formatter):
+    """Format log records as single-line JSON objects."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            'timestamp': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        fields = getattr(record, 'fields', None)
+        if fields:
+            payload.update(fields)
+        if record.exc_info:
+            payload['exception'] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class PredictionStats:
+    """
+    Aggregated per-endpoint counters for the prediction hot path.
+
+    Handlers call record() instead of logging each request; a single summary
+    line is emitted at most once per flush interval. start() adds a timer
+    thread that flushes every interval even when no request arrives, so the
+    last interval before traffic stops is not held back.
+    """
+
+    def __init__(self, flush_interval: float = 60.0, stats_logger: Optional[logging.Logger] = None):
+        self.flush_interval = flush_interval
+        self.logger = stats_logger or logging.getLogger('prediction.stats')
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self._last_flush = time.monotonic()
+        self._stopped = threading.Event()
+        self._timer: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Flush on a background timer every flush interval (idempotent)."""
+        if self._timer is not None or self.flush_interval <= 0:
+            return
+        self._stopped.clear()
+        self._timer = threading.Thread(target=self._run_timer, name='prediction-stats', daemon=True)
+        self._timer.start()
+
+    def stop(self) -> None:
+        """Stop the timer thread and flush what is left."""
+        timer, self._timer = self._timer, None
+        if timer is not None:
+            self._stopped.set()
+            timer.join()
+        self.flush()
+
+    def _run_timer(self) -> None:
+        while not self._stopped.wait(self.flush_interval):
+            self.flush()
+
+    def record(self, endpoint: str, rows: int = 1, errors: int = 0) -> None:
+        """Count one request (and its rows/errors) for an endpoint."""
+        with self._lock:
+            counters = self._counters.get(endpoint)
+            if counters is None:
+                counters = self._counters[endpoint] = {'requests': 0, 'rows': 0, 'errors': 0}
+            counters['requests'] += 1
+            counters['rows'] += rows
+            counters['errors'] += errors
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        """Counters accumulated since the last flush."""
+        with self._lock:
+            return {endpoint: dict(counters) for endpoint, counters in self._counters.items()}
+
+    def flush(self) -> Dict[str, Dict[str, int]]:
+        """Log and reset the accumulated counters."""
+        with self._lock:
+            counters, self._counters = self._counters, {}
+            elapsed = time.monotonic() - self._last_flush
+            self._last_flush = time.monotonic()
+        if counters:
+            self.logger.info(
+                "Prediction stats over %.0fs: %s", elapsed,
+                ', '.join(f"{endpoint}={c['requests']} req/{c['rows']} rows/{c['errors']} err"
+                          for endpoint, c in sorted(counters.items())),
+                extra={'fields': {'interval_seconds': round(elapsed, 1), 'endpoints': counters}}
+            )
+        return counters
+
+
+def should_sample(rate: Optional[float] = None) -> bool:
+    """Decide whether a per-request log line should be emitted."""
+    if rate is None:
+        rate = _sample_rate
+    return rate > 0 and (rate >= 1 or random.random() < rate)
+
+
+_sample_rate = 0.0
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _stop_listener() -> None:
+    """Drain and stop the background log writer, if any."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(_stop_listener)
+
+
+def configure_logging() -> PredictionStats:
+    """
+    Configure service logging from environment variables.
+
+    LOG_LEVEL               Root log level (default INFO)
+    PREDICTION_LOG_LEVEL    Level for per-prediction loggers (default WARNING)
+    LOG_FORMAT              "text" or "json" (default text)
+    LOG_ASYNC               Write log records from a background thread (default true)
+    LOG_SAMPLE_RATE         Fraction of requests that also log their own INFO line (default 0)
+    LOG_STATS_INTERVAL      Seconds between aggregated stats lines (default 60)
+
+    Returns:
+        PredictionStats instance for the request handlers
+    """
+    global _sample_rate, _listener
+
+    level = os.getenv('LOG_LEVEL', 'INFO').upper()
+    hot_path_level = os.getenv('PREDICTION_LOG_LEVEL', 'WARNING').upper()
+    log_format = os.getenv('LOG_FORMAT', 'text').lower()
+    use_queue = os.getenv('LOG_ASYNC', 'true').lower() in ('1', 'true', 'yes')
+    _sample_rate = float(os.getenv('LOG_SAMPLE_RATE', '0'))
+    stats_interval = float(os.getenv('LOG_STATS_INTERVAL', '60'))
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    if log_format == 'json':
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    _stop_listener()
+
+    if use_queue:
+        # Request threads only enqueue records; the listener does the I/O
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        root.addHandler(logging.handlers.QueueHandler(log_queue))
+        _listener = logging.handlers.QueueListener(log_queue, stream_handler)
+        _listener.start()
+    else:
+        root.addHandler(stream_handler)
+
+    for name in HOT_PATH_LOGGERS:
+        logging.getLogger(name).setLevel(hot_path_level)
+
+    return PredictionStats(flush_interval=stats_interval)
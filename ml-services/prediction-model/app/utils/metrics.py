@@ -0,0 +1,170 @@
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Per-stage latencies span sub-millisecond feature engineering to slow batches
+LATENCY_BUCKETS = [0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with Prometheus "le" semantics."""
+
+    def __init__(self, buckets: Iterable[float]):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self._sum = 0.0
+        self._count = 0
+
+    def observe(self, value: float) -> None:
+        """Record one observation."""
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> Dict:
+        """Cumulative bucket counts plus total count and sum."""
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+
+        cumulative = {}
+        running = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            running += bucket_count
+            cumulative[str(bound)] = running
+        cumulative['+Inf'] = count
+
+        return {'buckets': cumulative, 'count': count, 'sum': total}
+
+
+class Counter:
+    """Monotonically increasing value."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        with self._lock:
+            return self._value
+
+
+class MetricFamily:
+    """One named metric with a child per combination of label values."""
+
+    def __init__(self, name: str, documentation: str, kind: str,
+                 labelnames: Sequence[str], factory: Callable):
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, **labels: str):
+        """Child metric for these label values, created on first use."""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._factory())
+        return child
+
+    def children(self) -> List[Tuple[Dict[str, str], object]]:
+        with self._lock:
+            items = list(self._children.items())
+        return [(dict(zip(self.labelnames, key)), child) for key, child in items]
+
+
+class MetricsRegistry:
+    """Collection of metric families rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._families: Dict[str, MetricFamily] = {}
+
+    def _register(self, family: MetricFamily) -> MetricFamily:
+        with self._lock:
+            if family.name in self._families:
+                raise ValueError(f"Metric {family.name} is already registered")
+            self._families[family.name] = family
+        return family
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Iterable[float] = LATENCY_BUCKETS) -> MetricFamily:
+        buckets = tuple(buckets)
+        return self._register(
+            MetricFamily(name, documentation, 'histogram', labelnames, lambda: Histogram(buckets))
+        )
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+        return self._register(MetricFamily(name, documentation, 'counter', labelnames, Counter))
+
+    def render(self) -> str:
+        """Every family in the Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            families = list(self._families.values())
+
+        lines = []
+        for family in families:
+            lines.append(f"# HELP {family.name} {family.documentation}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for labels, child in family.children():
+                if family.kind == 'histogram':
+                    snapshot = child.snapshot()
+                    for bound, count in snapshot['buckets'].items():
+                        lines.append(
+                            f"{family.name}_bucket{_format_labels(labels, le=bound)} {count}"
+                        )
+                    lines.append(f"{family.name}_sum{_format_labels(labels)} {snapshot['sum']}")
+                    lines.append(f"{family.name}_count{_format_labels(labels)} {snapshot['count']}")
+                else:
+                    lines.append(f"{family.name}{_format_labels(labels)} {child.value}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Dict[str, str], **extra: str) -> str:
+    labels = {**labels, **extra}
+    if not labels:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(value)}"' for name, value in labels.items()
+    )
+    return "{" + pairs + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+# Process-wide registry served on /metrics
+REGISTRY = MetricsRegistry()
+
+STAGE_LATENCY = REGISTRY.histogram(
+    'prediction_stage_seconds',
+    'Time spent in each request stage (parse, engineer_features, predict, serialize).',
+    ['endpoint', 'stage', 'model_type']
+)
+
+PREDICTION_FALLBACKS = REGISTRY.counter(
+    'prediction_fallbacks_total',
+    'Predictions answered by a fallback: the statistical model after the ML model raised '
+    '(reason ml_error), or equal probabilities after the statistical model failed too '
+    '(reason statistical_error).',
+    ['method', 'reason']
+)
+
+
+def observe_stage(endpoint: str, stage: str, model_type: str, seconds: float) -> None:
+    """Record the duration of one request stage."""
+    STAGE_LATENCY.labels(endpoint=endpoint, stage=stage, model_type=model_type).observe(seconds)
@@ -0,0 +1,103 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from utils.inference_pool import InferencePool
+from utils.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+QUEUE_WAIT_BUCKETS = [0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1]
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent single-item requests into one batch call.
+
+    Items submitted within max_wait_ms of the first waiting item (or until
+    max_batch_size items are waiting) are handed to process_fn together on the
+    inference pool. process_fn receives the list of items and returns one result
+    per item; a result that is an Exception fails only that caller.
+    """
+
+    def __init__(self, process_fn: Callable[[List[Any]], List[Any]], pool: InferencePool,
+                 max_wait_ms: Optional[float] = None, max_batch_size: Optional[int] = None):
+        self.process_fn = process_fn
+        self.pool = pool
+        self.max_wait = (max_wait_ms if max_wait_ms is not None
+                         else float(os.getenv('MICRO_BATCH_MAX_WAIT_MS', '5'))) / 1000
+        self.max_batch_size = max_batch_size or int(os.getenv('MICRO_BATCH_MAX_SIZE', '64'))
+
+        self.batch_size_histogram = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait_histogram = Histogram(QUEUE_WAIT_BUCKETS)
+
+        self._pending: List[Tuple[Any, asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    @staticmethod
+    def enabled_from_env() -> bool:
+        """Whether MICRO_BATCH_ENABLED turns request coalescing on."""
+        return os.getenv('MICRO_BATCH_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and wait for its result from the next batch."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future, time.perf_counter()))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        """Dispatch everything waiting as one batch."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = asyncio.ensure_future(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future, float]]) -> None:
+        dispatched = time.perf_counter()
+        self.batch_size_histogram.observe(len(batch))
+        for _, _, enqueued in batch:
+            self.queue_wait_histogram.observe(dispatched - enqueued)
+
+        try:
+            results = await self.pool.run(self.process_fn, [item for item, _, _ in batch])
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), result in zip(batch, results):
+            if future.done():  # caller went away
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def stats(self) -> Dict:
+        """Configuration plus batch-size and queue-wait histograms."""
+        return {
+            'max_wait_ms': self.max_wait * 1000,
+            'max_batch_size': self.max_batch_size,
+            'waiting': len(self._pending),
+            'batch_size': self.batch_size_histogram.snapshot(),
+            'queue_wait_seconds': self.queue_wait_histogram.snapshot()
+        }
@@ -56,7 +56,8 @@ class ModelLoader:
         """Get information about a model file."""
         try:
             import joblib
-            model_data = joblib.load(model_path)
+            # Map rather than read, so only the metadata pages are touched
+            model_data = joblib.load(model_path, mmap_mode='r')
             
             if isinstance(model_data, dict):
                 return {
@@ -66,6 +67,7 @@ class ModelLoader:
                     'accuracy': model_data.get('accuracy'),
                     'training_info': model_data.get('training_info', {}),
                     'created_at': model_data.get('created_at'),
+                    'format_version': model_data.get('format_version', 1),
                     'file_size': os.path.getsize(model_path)
                 }
             else:
@@ -0,0 +1,252 @@
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Evenly matched fixture used to warm and smoke-test a freshly loaded model
+SMOKE_REQUEST = SimpleNamespace(
+    home_form_rating=60.0,
+    away_form_rating=55.0,
+    home_win_rate=50.0,
+    away_win_rate=40.0,
+    home_goals_avg=1.6,
+    away_goals_avg=1.2,
+    home_goals_conceded_avg=1.0,
+    away_goals_conceded_avg=1.3,
+    h2h_home_wins=3,
+    h2h_away_wins=2,
+    h2h_draws=2,
+    is_home=True,
+    league_id=39
+)
+WARMUP_ROWS = 32
+
+
+class ModelSwapError(Exception):
+    """Raised when a replacement model is rejected before going live."""
+
+
+def smoke_test(predictor: Any, feature_engineer: Any, warmup_rows: int = WARMUP_ROWS) -> None:
+    """
+    Warm a freshly loaded model and check that it produces sane predictions.
+
+    Scores warmup_rows copies of SMOKE_REQUEST through the batch path, which
+    also primes the model's lazy allocations before real traffic arrives.
+
+    Raises:
+        ModelSwapError: If scoring fails, falls back or returns invalid probabilities
+    """
+    try:
+        features = feature_engineer.engineer_features_batch([SMOKE_REQUEST] * warmup_rows)
+        result = predictor.predict_batch(features)
+    except Exception as e:
+        raise ModelSwapError(f"Smoke prediction failed: {e}") from e
+
+    expected_type = 'ml' if predictor.model is not None else 'statistical'
+    if result['model_type'] != expected_type:
+        raise ModelSwapError(f"Smoke prediction fell back to the {result['model_type']} model")
+
+    probabilities = result['probabilities']
+    if (probabilities.shape != (warmup_rows, 3)
+            or not np.all(np.isfinite(probabilities))
+            or not np.allclose(probabilities.sum(axis=1), 1.0, atol=1e-3)):
+        raise ModelSwapError("Smoke prediction returned invalid probabilities")
+
+
+class ModelBundle:
+    """
+    A predictor and the feature engineer it was loaded with, served together.
+
+    Requests hold a reference for as long as they use the bundle. Once a
+    bundle is retired, its model is dropped when the last reference goes.
+    """
+
+    def __init__(self, predictor: Any, feature_engineer: Any, generation: int):
+        self.predictor = predictor
+        self.feature_engineer = feature_engineer
+        self.generation = generation
+        self.version = predictor.version
+        self.loaded_at = time.time()
+
+        self._lock = threading.Lock()
+        self._refs = 0
+        self._retired = False
+
+    @property
+    def in_flight(self) -> int:
+        """Number of requests currently holding this bundle."""
+        with self._lock:
+            return self._refs
+
+    @property
+    def released(self) -> bool:
+        """Whether the bundle has dropped its model."""
+        return self.predictor is None
+
+    def acquire(self) -> None:
+        with self._lock:
+            self._refs += 1
+
+    def release(self) -> None:
+        with self._lock:
+            self._refs -= 1
+            free = self._retired and self._refs == 0
+        if free:
+            self._free()
+
+    def retire(self) -> None:
+        """Stop serving new requests and free the model once idle."""
+        with self._lock:
+            self._retired = True
+            free = self._refs == 0
+        if free:
+            self._free()
+
+    def _free(self) -> None:
+        logger.info(f"Released model bundle {self.generation} ({self.version})")
+        self.predictor = None
+        self.feature_engineer = None
+
+
+class ModelRegistry:
+    """
+    Owns the live model bundle and swaps it atomically on reload.
+
+    A replacement is loaded, warmed and smoke-tested on a dedicated loader
+    thread while the current bundle keeps serving. Requests already in flight
+    finish on the bundle they acquired.
+    """
+
+    def __init__(self, load_fn: Callable[[], Tuple[Any, Any]]):
+        """
+        Args:
+            load_fn: Blocking callable returning a (predictor, feature_engineer) pair
+        """
+        self.load_fn = load_fn
+
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._current: Optional[ModelBundle] = None
+        self._generation = 0
+        self._draining: List[ModelBundle] = []
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='model-loader')
+        self._initial_load: Optional[Future] = None
+        self.timings: Dict[str, float] = {}
+
+    @property
+    def current(self) -> Optional[ModelBundle]:
+        """The live bundle, or None before the first install."""
+        return self._current
+
+    @property
+    def warming(self) -> bool:
+        """Whether the first model is still being loaded."""
+        load = self._initial_load
+        return self._current is None and load is not None and not load.done()
+
+    def start_loading(self, fn: Callable[[], Any]) -> Future:
+        """Run the first model load on the loader thread, unless it already started."""
+        with self._lock:
+            if self._initial_load is None:
+                self._initial_load = self._executor.submit(fn)
+            return self._initial_load
+
+    async def ensure_loaded(self, fn: Callable[[], Any]) -> Optional[ModelBundle]:
+        """
+        Wait for the first model, starting its load with fn if nobody has yet.
+
+        Returns:
+            The live bundle, or None if the first load installed nothing
+        """
+        if self._current is None:
+            await asyncio.wrap_future(self.start_loading(fn))
+        return self._current
+
+    @contextmanager
+    def acquire(self) -> Iterator[Optional[ModelBundle]]:
+        """Hold the live bundle (or None) for the duration of a request."""
+        with self._lock:
+            bundle = self._current
+            if bundle is not None:
+                bundle.acquire()
+        try:
+            yield bundle
+        finally:
+            if bundle is not None:
+                bundle.release()
+
+    def install(self, predictor: Any, feature_engineer: Any) -> ModelBundle:
+        """Make a predictor/feature engineer pair live and retire the previous bundle."""
+        with self._lock:
+            self._generation += 1
+            bundle = ModelBundle(predictor, feature_engineer, self._generation)
+            previous, self._current = self._current, bundle
+            if previous is not None:
+                self._draining.append(previous)
+
+        if previous is not None:
+            previous.retire()
+        logger.info(f"Model bundle {bundle.generation} ({bundle.version}) is live")
+        return bundle
+
+    def load_and_swap(self) -> ModelBundle:
+        """
+        Load, warm and smoke-test a replacement, then swap it in.
+
+        Blocks; reloads are serialized so two swaps never race.
+
+        Raises:
+            ModelSwapError: If the replacement is rejected; the live bundle is kept
+        """
+        with self._reload_lock:
+            started = time.perf_counter()
+            predictor, feature_engineer = self.load_fn()
+            loaded = time.perf_counter()
+
+            with self.acquire() as current:
+                if predictor.model is None and current is not None \
+                        and current.predictor.model is not None:
+                    raise ModelSwapError(
+                        f"Replacement model could not be loaded, keeping {current.version}"
+                    )
+
+            smoke_test(predictor, feature_engineer)
+            warmed = time.perf_counter()
+            bundle = self.install(predictor, feature_engineer)
+
+            self.timings = {
+                'load_seconds': round(loaded - started, 4),
+                'warmup_seconds': round(warmed - loaded, 4)
+            }
+            logger.info(f"Model swap completed in {warmed - started:.2f}s")
+            return bundle
+
+    async def reload(self) -> ModelBundle:
+        """Run load_and_swap on the loader thread."""
+        return await asyncio.wrap_future(self._executor.submit(self.load_and_swap))
+
+    def stats(self) -> Dict:
+        """Live bundle identity and retired bundles still finishing requests."""
+        with self._lock:
+            self._draining = [bundle for bundle in self._draining if not bundle.released]
+            current, draining = self._current, list(self._draining)
+
+        return {
+            'generation': current.generation if current else None,
+            'version': current.version if current else None,
+            'in_flight': current.in_flight if current else 0,
+            'timings': self.timings,
+            'draining': [
+                {'generation': bundle.generation, 'version': bundle.version,
+                 'in_flight': bundle.in_flight}
+                for bundle in draining
+            ]
+        }
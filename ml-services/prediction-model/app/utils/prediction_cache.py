@@ -0,0 +1,192 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class FileCacheBackend:
+    """
+    Shared cache tier stored as one JSON file per key.
+
+    Lets several uvicorn workers on one host (or pods sharing a volume) reuse
+    each other's predictions. Entries expire by TTL; writes are atomic renames.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if entry['expires_at'] < time.time():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return entry['value']
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'expires_at': time.time() + ttl, 'value': value}, f)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            logger.warning(f"Failed to write shared cache entry: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def clear(self) -> None:
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+
+class PredictionCache:
+    """
+    In-process LRU/TTL cache of prediction results.
+
+    Keys are a hash of the engineered feature vector, rounded to `precision`
+    decimals, plus a model namespace so results never outlive the model that
+    produced them. An optional shared backend is consulted on local misses.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 300.0,
+                 precision: int = 6, backend: Optional[FileCacheBackend] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.precision = precision
+        self.backend = backend
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    @classmethod
+    def from_env(cls) -> Optional['PredictionCache']:
+        """
+        Build the cache from environment variables.
+
+        PREDICTION_CACHE_ENABLED    Turn caching on/off (default false). A disabled
+                                    cache reports nothing, so to size the win enable
+                                    it on one replica and read hit_rate under
+                                    prediction_cache in /model/metrics; keep it on
+                                    only where hit_rate is well above zero, since
+                                    misses cost more than an uncached prediction
+        PREDICTION_CACHE_SIZE       Max in-process entries (default 10000)
+        PREDICTION_CACHE_TTL        Entry lifetime in seconds (default 300)
+        PREDICTION_CACHE_PRECISION  Decimals kept when quantizing features (default 6)
+        PREDICTION_CACHE_BACKEND    "memory" or "file" (default memory)
+        PREDICTION_CACHE_DIR        Directory for the file backend
+        """
+        if os.getenv('PREDICTION_CACHE_ENABLED', 'false').lower() not in ('1', 'true', 'yes'):
+            return None
+
+        backend = None
+        if os.getenv('PREDICTION_CACHE_BACKEND', 'memory').lower() == 'file':
+            backend = FileCacheBackend(
+                os.getenv('PREDICTION_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'footdash-prediction-cache'))
+            )
+
+        return cls(
+            max_entries=int(os.getenv('PREDICTION_CACHE_SIZE', '10000')),
+            ttl_seconds=float(os.getenv('PREDICTION_CACHE_TTL', '300')),
+            precision=int(os.getenv('PREDICTION_CACHE_PRECISION', '6')),
+            backend=backend
+        )
+
+    def make_key(self, features: np.ndarray, namespace: str) -> str:
+        """Canonical key for a feature vector under a model namespace."""
+        return self.make_keys(np.atleast_2d(features), namespace)[0]
+
+    def make_keys(self, features: np.ndarray, namespace: str) -> List[str]:
+        """Keys of every row of a feature matrix, quantized in one pass."""
+        quantized = np.round(np.asarray(features, dtype=np.float64), self.precision) + 0.0  # drop -0.0
+        quantized = np.ascontiguousarray(quantized)
+        suffix = namespace.encode()
+        return [hashlib.blake2b(row.tobytes() + suffix, digest_size=16).hexdigest() for row in quantized]
+
+    def get(self, key: str) -> Optional[Any]:
+        """Cached value for key, or None."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return value
+                del self._entries[key]
+
+        value = self.backend.get(key) if self.backend is not None else None
+        with self._lock:
+            if value is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            self._store(key, value, now)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Cache a JSON-serializable value."""
+        with self._lock:
+            self._store(key, value, time.monotonic())
+        if self.backend is not None:
+            self.backend.set(key, value, self.ttl)
+
+    def _store(self, key: str, value: Any, now: float) -> None:
+        self._entries[key] = (now + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def invalidate(self) -> None:
+        """Drop every entry, locally and in the shared backend."""
+        with self._lock:
+            self._entries.clear()
+            self._invalidations += 1
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters and current size."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'backend': 'file' if self.backend is not None else 'memory',
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'invalidations': self._invalidations,
+                'hit_rate': round(self._hits / lookups, 4) if lookups else None
+            }
@@ -0,0 +1,88 @@
+import time
+import asyncio
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Optional
+
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+from fastapi.routing import APIRoute
+
+from utils.metrics import observe_stage
+
+
+class RequestTiming:
+    """Stage boundaries of one request, filled in as it moves through the route."""
+
+    def __init__(self):
+        self.received = time.perf_counter()
+        self.handler_started: Optional[float] = None
+        self.handler_finished: Optional[float] = None
+        self.model_type = 'none'
+
+
+_current_timing: ContextVar[Optional[RequestTiming]] = ContextVar('request_timing', default=None)
+
+
+def set_model_type(model_type: str) -> None:
+    """Label the current request's stage timings with the model that served it."""
+    timing = _current_timing.get()
+    if timing is not None:
+        timing.model_type = model_type
+
+
+def _timed_endpoint(endpoint: Callable) -> Callable:
+    if not asyncio.iscoroutinefunction(endpoint):
+        # Sync endpoints run in a threadpool; their stages go unmeasured
+        return endpoint
+
+    @wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        timing = _current_timing.get()
+        if timing is not None:
+            timing.handler_started = time.perf_counter()
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            if timing is not None:
+                timing.handler_finished = time.perf_counter()
+    return wrapper
+
+
+class TimedRoute(APIRoute):
+    """
+    Route that records request parsing and response serialization time.
+
+    Parsing covers reading the body and validating it into the request model,
+    up to the moment the endpoint runs; serialization covers response-model
+    validation and JSON encoding after it returns, and is not recorded for
+    streaming responses. Endpoints report the engineer_features and predict
+    stages themselves.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        path = self.path
+
+        async def timed_handler(request: Request) -> Response:
+            timing = RequestTiming()
+            token = _current_timing.set(timing)
+            try:
+                response = await handler(request)
+            finally:
+                _current_timing.reset(token)
+
+            if timing.handler_started is not None:
+                observe_stage(path, 'parse', timing.model_type,
+                              timing.handler_started - timing.received)
+            # A streamed body is written after this returns, so there is no
+            # serialization time to measure here
+            if timing.handler_finished is not None and not isinstance(response, StreamingResponse):
+                observe_stage(path, 'serialize', timing.model_type,
+                              time.perf_counter() - timing.handler_finished)
+            return response
+
+        return timed_handler
@@ -0,0 +1,154 @@
+import json
+import codecs
+from typing import Any, AsyncIterator, List, Union
+
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+
+# Longest single row (NDJSON line or array element) buffered before giving up
+MAX_ROW_BYTES = 1 << 20
+
+
+class StreamParseError(ValueError):
+    """Raised when a streamed JSON array is malformed and parsing cannot continue."""
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes],
+                      max_row_bytes: int = MAX_ROW_BYTES) -> AsyncIterator[Union[Any, ValueError]]:
+    """
+    Parse newline-delimited JSON from a byte stream, one row at a time.
+
+    A line that is not valid JSON yields a ValueError in its place; the
+    following lines are still parsed.
+
+    Raises:
+        StreamParseError: If a single line exceeds max_row_bytes
+    """
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield _loads(line)
+        if len(buffer) > max_row_bytes:
+            raise StreamParseError(f"NDJSON line longer than {max_row_bytes} bytes")
+    if buffer.strip():
+        yield _loads(buffer)
+
+
+async def iter_json_array(chunks: AsyncIterator[bytes],
+                          max_row_bytes: int = MAX_ROW_BYTES) -> AsyncIterator[Any]:
+    """
+    Parse the elements of a top-level JSON array incrementally.
+
+    Only the element being decoded is buffered, so memory stays bounded by
+    max_row_bytes however long the array is.
+
+    Raises:
+        StreamParseError: If the input is not a well-formed JSON array
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ""
+    position = 0
+    state = 'start'  # start -> value -> separator -> value ... -> end
+
+    async def more() -> bool:
+        nonlocal buffer, position
+        async for chunk in chunks:
+            buffer = buffer[position:] + text_decoder.decode(chunk)
+            position = 0
+            return True
+        buffer = buffer[position:] + text_decoder.decode(b"", final=True)
+        position = 0
+        return False
+
+    stream_open = True
+    while True:
+        while position < len(buffer) and buffer[position].isspace():
+            position += 1
+        if position >= len(buffer):
+            if not stream_open:
+                if state == 'end':
+                    return
+                raise StreamParseError("Unexpected end of JSON array")
+            stream_open = await more()
+            continue
+
+        char = buffer[position]
+        if state == 'start':
+            if char != '[':
+                raise StreamParseError("Expected a JSON array")
+            position += 1
+            state = 'first'
+        elif state in ('first', 'value'):
+            if state == 'first' and char == ']':
+                position += 1
+                state = 'end'
+                continue
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                value, end = None, None
+            # A value touching the end of the buffer may still be incomplete
+            # (a number split across chunks), so only accept it once more
+            # input follows or the stream has ended
+            if end is None or (end >= len(buffer) and stream_open):
+                if len(buffer) - position > max_row_bytes:
+                    raise StreamParseError(f"Array element longer than {max_row_bytes} bytes")
+                if not stream_open:
+                    raise StreamParseError("Malformed JSON array element")
+                stream_open = await more()
+                continue
+            position = end
+            state = 'separator'
+            yield value
+        elif state == 'separator':
+            position += 1
+            if char == ',':
+                state = 'value'
+            elif char == ']':
+                state = 'end'
+            else:
+                raise StreamParseError(f"Expected ',' or ']' in JSON array, got {char!r}")
+        else:  # end
+            raise StreamParseError("Unexpected data after JSON array")
+
+
+class BodyStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body iterator keeps reading the request body.
+
+    On servers older than ASGI 2.4, Starlette's StreamingResponse polls
+    receive() for a disconnect while streaming, which would swallow request
+    body messages the iterator still needs. This variant only sends; a client
+    that goes away surfaces as a send error instead.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        if self.background is not None:
+            await self.background()
+
+
+async def iter_chunks(rows: AsyncIterator[Any], size: int) -> AsyncIterator[List[Any]]:
+    """Group an async row stream into lists of at most size rows."""
+    chunk: List[Any] = []
+    async for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _loads(line: bytes) -> Union[Any, ValueError]:
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return ValueError(f"Invalid JSON: {e}")
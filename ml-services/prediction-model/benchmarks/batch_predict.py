@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Batch prediction benchmark for the FootDash ML Prediction Service.
+
+Compares the per-row path (one engineer_features + predict call per match,
+which is what /predict/batch used to do) against the batch path (one feature
+matrix and a single predict_batch call) and reports rows/sec.
+
+Usage:
+    python benchmarks/batch_predict.py
+    python benchmarks/batch_predict.py --model models/match_predictor.joblib
+    python benchmarks/batch_predict.py --synthetic-model
+"""
+
+import argparse
+import os
+import sys
+import time
+from types import SimpleNamespace
+from typing import Callable, List
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from models.feature_engineer import FeatureEngineer
+from models.match_predictor import MatchPredictor
+
+BATCH_SIZES = [1, 10, 100, 1000]
+
+
+def make_requests(n: int, seed: int = 42) -> List[SimpleNamespace]:
+    """Generate n random prediction requests."""
+    rng = np.random.default_rng(seed)
+    leagues = [39, 140, 78, 135, 61, 94, 88, 1]
+    requests = []
+    for _ in range(n):
+        requests.append(SimpleNamespace(
+            home_form_rating=float(rng.uniform(20, 90)),
+            away_form_rating=float(rng.uniform(20, 90)),
+            home_win_rate=float(rng.uniform(10, 80)),
+            away_win_rate=float(rng.uniform(10, 80)),
+            home_goals_avg=float(rng.uniform(0.5, 3.0)),
+            away_goals_avg=float(rng.uniform(0.5, 3.0)),
+            home_goals_conceded_avg=float(rng.uniform(0.5, 2.5)),
+            away_goals_conceded_avg=float(rng.uniform(0.5, 2.5)),
+            h2h_home_wins=int(rng.integers(0, 8)),
+            h2h_away_wins=int(rng.integers(0, 8)),
+            h2h_draws=int(rng.integers(0, 5)),
+            is_home=True,
+            league_id=int(rng.choice(leagues)),
+            season="2025",
+            days_since_last_match=None,
+            home_recent_form=list(rng.choice(['W', 'D', 'L'], size=5)),
+            away_recent_form=None,
+        ))
+    return requests
+
+
+def make_synthetic_predictor(feature_names: List[str], n_estimators: int = 100) -> MatchPredictor:
+    """Fit a small XGBoost model on random data (mirrors train_model.py defaults)."""
+    import xgboost as xgb
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(2000, len(feature_names)))
+    y = rng.integers(0, 3, size=2000)
+    model = xgb.XGBClassifier(
+        objective='multi:softprob', n_estimators=n_estimators, max_depth=6,
+        learning_rate=0.1, subsample=0.8, colsample_bytree=0.8, random_state=42
+    )
+    model.fit(X, y)
+
+    predictor = MatchPredictor()
+    predictor.model = model
+    predictor.feature_names = feature_names
+    predictor.algorithm = "XGBoost"
+    predictor.version = "synthetic"
+    return predictor
+
+
+def per_row(engineer: FeatureEngineer, predictor: MatchPredictor, requests) -> None:
+    for request in requests:
+        predictor.predict(engineer.engineer_features(request))
+
+
+def batched(engineer: FeatureEngineer, predictor: MatchPredictor, requests) -> None:
+    predictor.predict_batch(engineer.engineer_features_batch(requests))
+
+
+def rows_per_second(fn: Callable, engineer, predictor, requests, min_seconds: float) -> float:
+    """Run fn repeatedly for at least min_seconds and return throughput."""
+    fn(engineer, predictor, requests)  # warmup
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        fn(engineer, predictor, requests)
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return runs * len(requests) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark batch prediction throughput')
+    parser.add_argument('--model', help='Path to a trained match_predictor.joblib')
+    parser.add_argument('--synthetic-model', action='store_true',
+                        help='Benchmark a randomly trained XGBoost model')
+    parser.add_argument('--min-seconds', type=float, default=1.0,
+                        help='Minimum measuring time per configuration')
+    args = parser.parse_args()
+
+    engineer = FeatureEngineer()
+    if args.synthetic_model:
+        predictor = make_synthetic_predictor(engineer.get_feature_names())
+    else:
+        predictor = MatchPredictor(args.model)
+
+    print(f"Model: {predictor.algorithm} v{predictor.version}")
+    print(f"{'batch':>6} {'per-row rows/s':>16} {'batch rows/s':>14} {'speedup':>8}")
+    for size in BATCH_SIZES:
+        requests = make_requests(size)
+        row_rate = rows_per_second(per_row, engineer, predictor, requests, args.min_seconds)
+        batch_rate = rows_per_second(batched, engineer, predictor, requests, args.min_seconds)
+        print(f"{size:>6} {row_rate:>16,.0f} {batch_rate:>14,.0f} {batch_rate / row_rate:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
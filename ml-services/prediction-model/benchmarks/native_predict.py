@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Native Booster inference benchmark for the FootDash ML Prediction Service.
+
+Compares XGBClassifier.predict_proba (sklearn wrapper validation plus a
+DMatrix per call) against Booster.inplace_predict on a contiguous float32
+matrix, which is what MatchPredictor now uses, and against the compiled NumPy
+TreeEnsemble (MODEL_EVALUATOR=numpy), and reports latency per call.
+
+Usage:
+    python benchmarks/native_predict.py
+    python benchmarks/native_predict.py --model models/match_predictor.joblib
+    PREDICT_NTHREAD=4 python benchmarks/native_predict.py
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Callable
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from batch_predict import make_requests, make_synthetic_predictor
+from models.feature_engineer import FeatureEngineer
+from models.match_predictor import PREDICT_NTHREAD, MatchPredictor
+from models.tree_ensemble import TreeEnsemble, compile_booster
+
+BATCH_SIZES = [1, 1000]
+
+
+def microseconds_per_call(fn: Callable, features: np.ndarray, min_seconds: float) -> float:
+    """Run fn repeatedly for at least min_seconds and return mean latency."""
+    fn(features)  # warmup
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        fn(features)
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return elapsed / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark native Booster inference latency')
+    parser.add_argument('--model', help='Path to a trained match_predictor.joblib '
+                                        '(default: a synthetic 100-tree model)')
+    parser.add_argument('--min-seconds', type=float, default=1.0,
+                        help='Minimum measuring time per configuration')
+    args = parser.parse_args()
+
+    engineer = FeatureEngineer()
+    if args.model:
+        predictor = MatchPredictor(args.model)
+    else:
+        predictor = make_synthetic_predictor(engineer.get_feature_names())
+    booster = predictor.metadata.booster
+    if booster is None:
+        sys.exit("Model has no native booster to benchmark")
+
+    def sklearn_wrapper(features):
+        predictor.model.predict_proba(features)
+
+    def native(features):
+        booster.inplace_predict(np.ascontiguousarray(features, dtype=np.float32))
+
+    ensemble = TreeEnsemble(compile_booster(booster))
+
+    print(f"Model: {predictor.algorithm} v{predictor.version}, nthread={PREDICT_NTHREAD}")
+    print(f"{'batch':>6} {'predict_proba us':>17} {'inplace us':>11} {'speedup':>8} {'numpy us':>10}")
+    for size in BATCH_SIZES:
+        features = engineer.engineer_features_batch(make_requests(size))
+        wrapper_us = microseconds_per_call(sklearn_wrapper, features, args.min_seconds)
+        native_us = microseconds_per_call(native, features, args.min_seconds)
+        numpy_us = microseconds_per_call(ensemble.predict_proba, features, args.min_seconds)
+        print(f"{size:>6} {wrapper_us:>17,.1f} {native_us:>11,.1f} {wrapper_us / native_us:>7.1f}x "
+              f"{numpy_us:>10,.1f}")
+
+
+if __name__ == '__main__':
+    main()
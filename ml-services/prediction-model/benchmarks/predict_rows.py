@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Prediction cache benchmark for the FootDash ML Prediction Service.
+
+Times the service's own scoring path, main._predict_rows, rather than the
+predictor, so the cost of hashing and looking up rows is included. Each batch
+size is scored without the cache, against an empty cache (every row a miss)
+and against a warm cache (every row a hit).
+
+Usage:
+    python benchmarks/predict_rows.py
+    python benchmarks/predict_rows.py --model models/match_predictor.joblib
+    python benchmarks/predict_rows.py --synthetic-model
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Callable
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+import main as service
+from batch_predict import make_requests, make_synthetic_predictor
+from models.feature_engineer import FeatureEngineer
+from models.match_predictor import MatchPredictor
+from utils.model_registry import ModelBundle
+from utils.prediction_cache import PredictionCache
+
+BATCH_SIZES = [1, 64, 1000]
+
+
+def milliseconds_per_call(fn: Callable[[], None], min_seconds: float) -> float:
+    """Run fn repeatedly for at least min_seconds and return its mean latency."""
+    fn()  # warmup
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        fn()
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return elapsed / runs * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the prediction cache on the scoring path')
+    parser.add_argument('--model', help='Path to a trained match_predictor.joblib')
+    parser.add_argument('--synthetic-model', action='store_true',
+                        help='Benchmark a randomly trained XGBoost model')
+    parser.add_argument('--min-seconds', type=float, default=1.0,
+                        help='Minimum measuring time per configuration')
+    args = parser.parse_args()
+
+    engineer = FeatureEngineer()
+    if args.synthetic_model:
+        predictor = make_synthetic_predictor(engineer.get_feature_names())
+    else:
+        predictor = MatchPredictor(args.model)
+    bundle = ModelBundle(predictor, engineer, generation=0)
+
+    def uncached(features):
+        service.prediction_cache = None
+        service._predict_rows(bundle, features)
+
+    def cold(features):
+        service.prediction_cache = PredictionCache(max_entries=len(features))
+        service._predict_rows(bundle, features, use_cache=True)
+
+    warm_cache = PredictionCache(max_entries=max(BATCH_SIZES))
+
+    def warm(features):
+        service.prediction_cache = warm_cache
+        service._predict_rows(bundle, features, use_cache=True)
+
+    print(f"Model: {predictor.algorithm} v{predictor.version}")
+    print(f"{'rows':>6} {'no cache ms':>12} {'cold ms':>9} {'warm ms':>9}")
+    for size in BATCH_SIZES:
+        features = engineer.engineer_features_batch(make_requests(size))
+        timings = [milliseconds_per_call(lambda: run(features), args.min_seconds)
+                   for run in (uncached, cold, warm)]
+        print(f"{size:>6} {timings[0]:>12.3f} {timings[1]:>9.3f} {timings[2]:>9.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Response serialization benchmark for the FootDash ML Prediction Service.
+
+Measures payload size and encoding time of a /predict response in three modes:
+
+  before  per-request importance dict, PredictionResponse validation and
+          stdlib JSON encoding (what /predict used to do)
+  full    cached importances, PredictionResponse validation, orjson encoding
+  lean    lean=true: probabilities and model version only, orjson encoding
+
+Usage:
+    python benchmarks/serialization.py
+    python benchmarks/serialization.py --min-seconds 2
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Callable
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from app.main import PredictionResponse
+from models.feature_engineer import FeatureEngineer
+from utils.json_response import FastJSONResponse
+
+FEATURE_NAMES = FeatureEngineer().get_feature_names()
+# float32, as XGBoost reports feature_importances_
+RAW_IMPORTANCES = np.random.default_rng(0).dirichlet(np.ones(len(FEATURE_NAMES))).astype(np.float32)
+CACHED_IMPORTANCES = {name: float(value) for name, value in zip(FEATURE_NAMES, RAW_IMPORTANCES)}
+
+PREDICTION = {
+    "home_win_probability": 48.12,
+    "draw_probability": 27.4,
+    "away_win_probability": 24.48,
+    "confidence": "medium",
+    "model_version": "1.0.0"
+}
+
+
+def before() -> bytes:
+    importance = dict(zip(FEATURE_NAMES, RAW_IMPORTANCES))
+    response = PredictionResponse(**PREDICTION, features_used=FEATURE_NAMES,
+                                  feature_importance=importance)
+    return JSONResponse(jsonable_encoder(response)).body
+
+
+def full() -> bytes:
+    response = PredictionResponse(**PREDICTION, features_used=FEATURE_NAMES,
+                                  feature_importance=CACHED_IMPORTANCES)
+    return FastJSONResponse(jsonable_encoder(response)).body
+
+
+def lean() -> bytes:
+    return FastJSONResponse(PREDICTION).body
+
+
+def microseconds_per_call(fn: Callable[[], bytes], min_seconds: float) -> float:
+    """Run fn repeatedly for at least min_seconds and return mean latency."""
+    fn()  # warmup
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        for _ in range(100):
+            fn()
+        calls += 100
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return elapsed / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark /predict response serialization')
+    parser.add_argument('--min-seconds', type=float, default=1.0,
+                        help='Minimum measuring time per mode')
+    args = parser.parse_args()
+
+    baseline = microseconds_per_call(before, args.min_seconds)
+    print(f"{'mode':>6} {'bytes':>6} {'us/response':>12} {'speedup':>8}")
+    for name, fn in [('before', before), ('full', full), ('lean', lean)]:
+        elapsed = baseline if fn is before else microseconds_per_call(fn, args.min_seconds)
+        print(f"{name:>6} {len(fn()):>6} {elapsed:>12.1f} {baseline / elapsed:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
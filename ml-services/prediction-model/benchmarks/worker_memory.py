@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Per-worker memory benchmark for the FootDash ML Prediction Service.
+
+Starts N worker processes, as uvicorn --workers N does, and has each load the
+same model artifact and score a batch with it. While all of them are alive,
+every worker reports how much its RSS, PSS (resident memory with shared
+pages split between the processes mapping them) and anonymous (private,
+non-file) memory grew over loading and scoring. Run once per evaluator:
+"numpy" traverses the memory-mapped arrays, so PSS falls with more workers
+and anonymous memory stays flat; "xgboost" parses the booster into every
+worker's own memory. Linux only (reads /proc/self/smaps_rollup).
+
+Usage:
+    python benchmarks/worker_memory.py
+    python benchmarks/worker_memory.py --workers 8 --trees 2000
+    python benchmarks/worker_memory.py --model models/match_predictor.joblib
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+from typing import Dict
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from batch_predict import make_requests, make_synthetic_predictor
+from models import match_predictor
+from models.feature_engineer import FeatureEngineer
+from models.match_predictor import MatchPredictor
+
+EVALUATORS = ['numpy', 'xgboost']
+SMAPS_FIELDS = {'Rss:': 'rss', 'Pss:': 'pss', 'Anonymous:': 'anonymous'}
+
+
+def memory_mb() -> Dict[str, float]:
+    """This process's RSS, PSS and anonymous memory in MB."""
+    usage = {}
+    with open('/proc/self/smaps_rollup') as rollup:
+        for line in rollup:
+            field = line.split()[0]
+            if field in SMAPS_FIELDS:
+                usage[SMAPS_FIELDS[field]] = int(line.split()[1]) / 1024
+    return usage
+
+
+def worker(model_path: str, evaluator: str, features, barrier, results) -> None:
+    """Load and score the model, then report memory growth once every worker has."""
+    import xgboost  # noqa: F401  (library memory is not the model's)
+
+    match_predictor.MODEL_EVALUATOR = evaluator
+    before = memory_mb()
+    predictor = MatchPredictor(model_path)
+    predictor.predict_batch(features)
+    barrier.wait()
+    after = memory_mb()
+    results.put({name: after[name] - before[name] for name in after})
+    barrier.wait()  # stay alive until every worker has measured
+
+
+def measure(model_path: str, evaluator: str, workers: int, features) -> Dict[str, float]:
+    """Mean per-worker memory growth over workers concurrent processes."""
+    context = multiprocessing.get_context('spawn')
+    barrier = context.Barrier(workers)
+    results = context.Queue()
+    processes = [
+        context.Process(target=worker, args=(model_path, evaluator, features, barrier, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    growth = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return {name: sum(row[name] for row in growth) / workers for name in growth[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark per-worker memory of a loaded model')
+    parser.add_argument('--model', help='Path to a trained match_predictor.joblib '
+                                        '(default: a synthetic model)')
+    parser.add_argument('--trees', type=int, default=1000,
+                        help='Boosting rounds of the synthetic model (three trees each)')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent worker processes')
+    args = parser.parse_args()
+
+    engineer = FeatureEngineer()
+    features = engineer.engineer_features_batch(make_requests(1000))
+    with tempfile.TemporaryDirectory() as directory:
+        model_path = args.model
+        if model_path is None:
+            model_path = os.path.join(directory, 'match_predictor.joblib')
+            make_synthetic_predictor(engineer.get_feature_names(), args.trees).save_model(model_path)
+
+        print(f"Artifact: {os.path.getsize(model_path) / 2 ** 20:.1f} MB, {args.workers} workers")
+        print(f"{'evaluator':>10} {'rss MB':>9} {'pss MB':>9} {'anon MB':>9}  (growth per worker)")
+        for evaluator in EVALUATORS:
+            growth = measure(model_path, evaluator, args.workers, features)
+            print(f"{evaluator:>10} {growth['rss']:>9.1f} {growth['pss']:>9.1f} {growth['anonymous']:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -249,6 +249,324 @@ class TestBatchPrediction:
         preds = resp.json()["predictions"]
         assert preds[0]["home_win_probability"] == preds[1]["home_win_probability"]
 
+    @pytest.mark.anyio
+    async def test_failed_batch_engineering_falls_back_off_the_loop(self, client: AsyncClient,
+                                                                    monkeypatch):
+        """Rows are re-engineered one by one on the pool, a bad row failing alone."""
+        import threading
+        import app.main as main
+
+        feature_engineer = main.model_registry.current.feature_engineer
+        engineer_features = feature_engineer.engineer_features
+        loop_thread = threading.get_ident()
+        threads = []
+
+        def failing_batch(matches):
+            raise ValueError("batch failed")
+
+        def engineer_one(match_req):
+            threads.append(threading.get_ident())
+            if match_req.home_form_rating == 0:
+                raise ValueError("bad row")
+            return engineer_features(match_req)
+
+        monkeypatch.setattr(feature_engineer, "engineer_features_batch", failing_batch)
+        monkeypatch.setattr(feature_engineer, "engineer_features", engineer_one)
+
+        bad = {**EVEN_TEAM_STATS, "home_form_rating": 0.0}
+        resp = await client.post("/predict/batch", json={"matches": [TOP_TEAM_STATS, bad]})
+        preds = resp.json()["predictions"]
+        assert preds[0]["status"] == "success"
+        assert preds[1] == {"status": "error", "error": "bad row"}
+        assert len(threads) == 2 and loop_thread not in threads
+
+
+# ── Backpressure ──────────────────────────────────────────────────────────────
+
+class TestBackpressure:
+    """A saturated inference pool sheds requests with 503 + Retry-After."""
+
+    @pytest.mark.anyio
+    async def test_saturated_pool_returns_503(self, client: AsyncClient, monkeypatch):
+        import app.main as main
+        from utils.inference_pool import InferencePool
+
+        pool = InferencePool(max_workers=1, max_pending=1, retry_after=3)
+        pool._reserve(1)  # occupy the only slot
+        monkeypatch.setattr(main, "inference_pool", pool)
+
+        resp = await client.post("/predict", json=EVEN_TEAM_STATS)
+        assert resp.status_code == 503
+        assert resp.headers["retry-after"] == "3"
+
+        resp = await client.post("/predict/batch", json={"matches": [EVEN_TEAM_STATS]})
+        assert resp.status_code == 503
+        pool.shutdown()
+
+
+# ── Prediction cache ──────────────────────────────────────────────────────────
+
+class TestPredictionCaching:
+    """Repeated payloads are served from the cache until the model reloads."""
+
+    @pytest.mark.anyio
+    async def test_repeat_prediction_hits_cache(self, client: AsyncClient, monkeypatch):
+        import app.main as main
+        from utils.prediction_cache import PredictionCache
+
+        cache = PredictionCache()
+        monkeypatch.setattr(main, "prediction_cache", cache)
+
+        first = await client.post("/predict", json=TOP_TEAM_STATS)
+        second = await client.post("/predict", json=TOP_TEAM_STATS)
+        assert first.json() == second.json()
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+        # Batch endpoints score every row without consulting the cache
+        resp = await client.post("/predict/batch", json={"matches": [TOP_TEAM_STATS, EVEN_TEAM_STATS]})
+        assert resp.json()["predictions"][0]["home_win_probability"] == first.json()["home_win_probability"]
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+        await client.post("/model/reload")
+        assert cache.stats()["size"] == 0
+        assert cache.stats()["invalidations"] == 1
+
+
+# ── Model hot-swap ────────────────────────────────────────────────────────────
+
+class TestModelReload:
+    """Reloading swaps in a new model bundle without interrupting predictions."""
+
+    @pytest.mark.anyio
+    async def test_reload_swaps_bundle_and_keeps_serving(self, client: AsyncClient):
+        import asyncio
+        import app.main as main
+
+        before = main.model_registry.current
+        predictions = [client.post("/predict", json=EVEN_TEAM_STATS) for _ in range(5)]
+        responses = await asyncio.gather(client.post("/model/reload"), *predictions)
+
+        reload_resp = responses[0]
+        assert reload_resp.status_code == 200
+        assert reload_resp.json()["generation"] == before.generation + 1
+        assert all(r.status_code == 200 for r in responses[1:])
+        assert before.released
+        assert main.model_registry.stats()["draining"] == []
+
+
+class TestMarkets:
+    """All goal markets come from one scoreline matrix per match."""
+
+    @pytest.mark.anyio
+    async def test_markets_agree_with_single_market_endpoints(self, client: AsyncClient):
+        markets = (await client.post("/predict/markets", json=TOP_TEAM_STATS)).json()
+        btts = (await client.post("/predict/btts", json=TOP_TEAM_STATS)).json()
+        over_under = (await client.post("/predict/over-under", json=TOP_TEAM_STATS)).json()
+
+        assert markets["btts_yes_probability"] == btts["btts_yes_probability"]
+        line = next(entry for entry in markets["over_under"] if entry["line"] == 2.5)
+        assert line["over_probability"] == over_under["over_probability"]
+        assert [entry["line"] for entry in markets["over_under"]] == [0.5, 1.5, 2.5, 3.5, 4.5, 5.5]
+        assert len(markets["correct_score"]) == 10
+        total = markets["home_win_probability"] + markets["draw_probability"] + markets["away_win_probability"]
+        assert abs(total - 100) < 0.05
+
+    @pytest.mark.anyio
+    async def test_batch_reports_invalid_rows(self, client: AsyncClient):
+        bad = {**EVEN_TEAM_STATS, "home_goals_avg": -5.0}
+        resp = await client.post("/predict/markets/batch",
+                                 json={"matches": [TOP_TEAM_STATS, bad, EVEN_TEAM_STATS]})
+        assert resp.status_code == 200
+        predictions = resp.json()["predictions"]
+        assert [p["status"] for p in predictions] == ["success", "error", "success"]
+
+        single = (await client.post("/predict/markets", json=EVEN_TEAM_STATS)).json()
+        assert predictions[2]["asian_handicap"] == single["asian_handicap"]
+
+    @pytest.mark.anyio
+    async def test_invalid_single_match_is_rejected(self, client: AsyncClient):
+        resp = await client.post("/predict/markets", json={**EVEN_TEAM_STATS, "away_goals_avg": -3.0})
+        assert resp.status_code == 422
+
+
+class TestMarketBatches:
+    """BTTS and Over/Under batches match the single-match endpoints row for row."""
+
+    @pytest.mark.anyio
+    async def test_btts_batch_matches_single(self, client: AsyncClient):
+        payloads = [TOP_TEAM_STATS, EVEN_TEAM_STATS]
+        singles = [(await client.post("/predict/btts", json=p)).json() for p in payloads]
+        resp = await client.post("/predict/btts/batch", json={"matches": payloads})
+
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["total"] == 2
+        for row, single in zip(data["predictions"], singles):
+            assert row.pop("status") == "success"
+            assert row == single
+
+    @pytest.mark.anyio
+    async def test_over_under_batch_uses_each_rows_line(self, client: AsyncClient):
+        payloads = [{**EVEN_TEAM_STATS, "line": line} for line in (0.5, 2.5, 3.0, 4.5)]
+        singles = [(await client.post("/predict/over-under", json=p)).json() for p in payloads]
+        resp = await client.post("/predict/over-under/batch", json={"matches": payloads})
+
+        for row, single in zip(resp.json()["predictions"], singles):
+            assert row.pop("status") == "success"
+            assert row == single
+
+    @pytest.mark.anyio
+    async def test_invalid_rows_fail_alone(self, client: AsyncClient):
+        bad = {**EVEN_TEAM_STATS, "away_goals_conceded_avg": -9.0}
+        resp = await client.post("/predict/btts/batch", json={"matches": [bad, EVEN_TEAM_STATS]})
+        statuses = [row["status"] for row in resp.json()["predictions"]]
+        assert statuses == ["error", "success"]
+
+    @pytest.mark.anyio
+    @pytest.mark.parametrize("path", ["/predict/btts", "/predict/over-under"])
+    @pytest.mark.parametrize("field, value", [("home_goals_avg", -2.0), ("away_goals_conceded_avg", -9.0)])
+    async def test_invalid_single_match_is_rejected(self, client: AsyncClient, path, field, value):
+        resp = await client.post(path, json={**EVEN_TEAM_STATS, field: value})
+        assert resp.status_code == 422
+
+    @pytest.mark.anyio
+    async def test_empty_batches(self, client: AsyncClient):
+        for path in ("/predict/btts/batch", "/predict/over-under/batch"):
+            resp = await client.post(path, json={"matches": []})
+            assert resp.json() == {"predictions": [], "total": 0}
+
+
+class TestStreamingBatch:
+    """/predict/batch/stream returns the same rows as /predict/batch, as NDJSON."""
+
+    @pytest.mark.anyio
+    async def test_ndjson_stream_matches_batch(self, client: AsyncClient, monkeypatch):
+        import json
+        import app.main as main
+
+        monkeypatch.setattr(main, "STREAM_CHUNK_SIZE", 2)
+        payloads = [TOP_TEAM_STATS, EVEN_TEAM_STATS, TOP_TEAM_STATS, EVEN_TEAM_STATS, TOP_TEAM_STATS]
+        batch = (await client.post("/predict/batch", json={"matches": payloads})).json()
+
+        body = "\n".join(json.dumps(p) for p in payloads) + "\n"
+        resp = await client.post("/predict/batch/stream", content=body,
+                                 headers={"Content-Type": "application/x-ndjson"})
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("application/x-ndjson")
+
+        rows = [json.loads(line) for line in resp.text.splitlines()]
+        assert [row.pop("index") for row in rows] == list(range(len(payloads)))
+        assert rows == batch["predictions"]
+
+    @pytest.mark.anyio
+    async def test_json_array_stream_reports_bad_rows(self, client: AsyncClient):
+        import json
+
+        payloads = [EVEN_TEAM_STATS, {"home_form_rating": "not a number"}, EVEN_TEAM_STATS]
+        resp = await client.post("/predict/batch/stream", content=json.dumps(payloads),
+                                 headers={"Content-Type": "application/json"})
+        rows = [json.loads(line) for line in resp.text.splitlines()]
+        assert [row["status"] for row in rows] == ["success", "error", "success"]
+        assert [row["index"] for row in rows] == [0, 1, 2]
+
+    @pytest.mark.anyio
+    async def test_malformed_array_ends_with_error_line(self, client: AsyncClient):
+        import json
+
+        body = "[" + json.dumps(EVEN_TEAM_STATS) + ", {broken"
+        resp = await client.post("/predict/batch/stream", content=body,
+                                 headers={"Content-Type": "application/json"})
+        rows = [json.loads(line) for line in resp.text.splitlines()]
+        assert rows[0]["status"] == "success"
+        assert rows[-1]["status"] == "error"
+
+
+class TestMetricsEndpoint:
+    """/metrics exposes per-stage latency histograms in Prometheus format."""
+
+    @pytest.mark.anyio
+    async def test_predict_records_every_stage(self, client: AsyncClient):
+        await client.post("/predict", json=EVEN_TEAM_STATS)
+        await client.post("/predict/btts", json=EVEN_TEAM_STATS)
+
+        resp = await client.get("/metrics")
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/plain")
+        body = resp.text
+        for stage in ("parse", "engineer_features", "predict", "serialize"):
+            assert f'prediction_stage_seconds_count{{endpoint="/predict",stage="{stage}",' in body
+        assert 'endpoint="/predict/btts",stage="parse",model_type="statistical"' in body
+        assert "# TYPE prediction_fallbacks_total counter" in body
+
+    @pytest.mark.anyio
+    async def test_streamed_responses_record_no_serialize_stage(self, client: AsyncClient):
+        resp = await client.post("/predict/batch/stream", json=[EVEN_TEAM_STATS])
+        assert resp.status_code == 200
+
+        body = (await client.get("/metrics")).text
+        assert 'endpoint="/predict/batch/stream",stage="parse"' in body
+        assert 'endpoint="/predict/batch/stream",stage="serialize"' not in body
+
+
+class TestStartup:
+    """Startup timings are exposed on /health."""
+
+    @pytest.mark.anyio
+    async def test_health_reports_startup_timings(self, client: AsyncClient):
+        data = (await client.get("/health")).json()
+        assert data["status"] == "healthy"
+        assert data["startup"]["import_seconds"] > 0
+        assert "load_seconds" in data["startup"]
+
+
+# ── Micro-batching ────────────────────────────────────────────────────────────
+
+class TestMicroBatching:
+    """Coalesced /predict calls must return the same results as direct calls."""
+
+    @pytest.mark.anyio
+    async def test_coalesced_predictions_match_direct(self, client: AsyncClient, monkeypatch):
+        import asyncio
+        import app.main as main
+        from utils.micro_batcher import MicroBatcher
+
+        payloads = [TOP_TEAM_STATS, EVEN_TEAM_STATS, TOP_TEAM_STATS]
+        direct = [(await client.post("/predict", json=p)).json() for p in payloads]
+
+        batcher = MicroBatcher(main._predict_coalesced, main.inference_pool,
+                               max_wait_ms=50, max_batch_size=16)
+        monkeypatch.setattr(main, "micro_batcher", batcher)
+        responses = await asyncio.gather(*[client.post("/predict", json=p) for p in payloads])
+
+        assert [r.json() for r in responses] == direct
+        assert batcher.stats()["batch_size"]["sum"] == len(payloads)
+
+
+# ── Lean responses ───────────────────────────────────────────────────────────
+
+class TestLeanResponses:
+    """lean=true drops the static model metadata but keeps the prediction."""
+
+    @pytest.mark.anyio
+    async def test_lean_prediction_matches_full(self, client: AsyncClient):
+        full = (await client.post("/predict", json=TOP_TEAM_STATS)).json()
+        resp = await client.post("/predict?lean=true", json=TOP_TEAM_STATS)
+        assert resp.status_code == 200
+        lean = resp.json()
+
+        assert "features_used" not in lean and "feature_importance" not in lean
+        assert lean == {key: full[key] for key in lean}
+        assert len(resp.content) < len((await client.post("/predict", json=TOP_TEAM_STATS)).content)
+
+    @pytest.mark.anyio
+    async def test_model_info_serves_static_metadata(self, client: AsyncClient):
+        info = (await client.get("/model/info")).json()
+        full = (await client.post("/predict", json=EVEN_TEAM_STATS)).json()
+        assert info["features"] == full["features_used"]
+        assert info["feature_importance"] == full["feature_importance"]
+
 
 # ── Response structure ────────────────────────────────────────────────────────
 
@@ -0,0 +1,547 @@
+"""Unit tests for the prediction model components (feature engineering and predictor)."""
+import json
+import math
+import os
+import sys
+from datetime import datetime
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from models.feature_engineer import FeatureEngineer, season_stage_for_month
+from models.match_predictor import MatchPredictor
+from models.scoreline_model import ScorelineModel, expected_goals
+
+
+def make_request(**overrides):
+    values = {
+        "home_form_rating": 65.0,
+        "away_form_rating": 55.0,
+        "home_win_rate": 60.0,
+        "away_win_rate": 45.0,
+        "home_goals_avg": 1.8,
+        "away_goals_avg": 1.2,
+        "home_goals_conceded_avg": 0.9,
+        "away_goals_conceded_avg": 1.4,
+        "h2h_home_wins": 5,
+        "h2h_away_wins": 3,
+        "h2h_draws": 2,
+        "is_home": True,
+        "league_id": 39,
+        "season": "2025",
+        "days_since_last_match": None,
+        "home_recent_form": None,
+        "away_recent_form": None,
+    }
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+SAMPLE_REQUESTS = [
+    make_request(),
+    make_request(h2h_home_wins=0, h2h_away_wins=0, h2h_draws=0),
+    make_request(home_form_rating=95.0, away_form_rating=10.0, home_win_rate=90.0, away_win_rate=5.0),
+    make_request(home_form_rating=10.0, away_form_rating=95.0, home_win_rate=5.0, away_win_rate=90.0,
+                 h2h_home_wins=0, h2h_away_wins=9, h2h_draws=1, league_id=999),
+    make_request(home_recent_form=['W', 'W', 'D'], away_recent_form=['L', 'D', 'W', 'W', 'L', 'W']),
+]
+
+
+@pytest.fixture
+def feature_engineer():
+    return FeatureEngineer()
+
+
+@pytest.fixture
+def fallback_predictor():
+    return MatchPredictor()
+
+
+@pytest.fixture
+def ml_predictor():
+    """MatchPredictor wrapping a small XGBoost model trained on random rows."""
+    xgb = pytest.importorskip("xgboost")
+    predictor = MatchPredictor()
+    rng = np.random.default_rng(0)
+    X = rng.uniform(0, 100, (300, len(predictor.feature_names)))
+    y = rng.integers(0, 3, 300)
+    predictor.model = xgb.XGBClassifier(n_estimators=10, max_depth=3).fit(X, y)
+    predictor.algorithm = "XGBoost"
+    predictor.version = "test-1.0.0"
+    return predictor
+
+
+# ── Feature engineering ──────────────────────────────────────────────────────
+
+class TestEngineerFeaturesBatch:
+    """The columnar feature path must agree with the per-request path."""
+
+    def test_batch_matches_per_request(self, feature_engineer):
+        batch = feature_engineer.engineer_features_batch(SAMPLE_REQUESTS)
+        expected = np.vstack([feature_engineer.engineer_features(r) for r in SAMPLE_REQUESTS])
+
+        assert batch.shape == (len(SAMPLE_REQUESTS), len(feature_engineer.feature_names))
+        assert batch.flags['C_CONTIGUOUS']
+        np.testing.assert_allclose(batch, expected)
+
+    def test_float32_output(self, feature_engineer):
+        batch = feature_engineer.engineer_features_batch(SAMPLE_REQUESTS, dtype=np.float32)
+        assert batch.dtype == np.float32
+
+    def test_structured_array_input(self, feature_engineer):
+        fields = [
+            'home_form_rating', 'away_form_rating', 'home_win_rate', 'away_win_rate',
+            'home_goals_avg', 'away_goals_avg', 'home_goals_conceded_avg',
+            'away_goals_conceded_avg', 'h2h_home_wins', 'h2h_away_wins', 'h2h_draws', 'league_id',
+        ]
+        requests = SAMPLE_REQUESTS[:4]  # no recent-form lists
+        structured = np.array(
+            [tuple(getattr(r, f) for f in fields) for r in requests],
+            dtype=[(f, np.float64) for f in fields],
+        )
+        np.testing.assert_allclose(
+            feature_engineer.engineer_features_batch(structured),
+            feature_engineer.engineer_features_batch(requests),
+        )
+
+    def test_empty_batch(self, feature_engineer):
+        batch = feature_engineer.engineer_features_batch([])
+        assert batch.shape == (0, len(feature_engineer.feature_names))
+
+
+class TestSeasonStage:
+    def test_month_buckets(self):
+        stages = [season_stage_for_month(month) for month in range(1, 13)]
+        assert stages == [0.5, 0.5, 1.0, 1.0, 1.0, 1.0, 1.0, 0.0, 0.0, 0.0, 1.0, 1.0]
+
+    def test_request_uses_current_month(self, feature_engineer):
+        assert feature_engineer._get_season_stage('2024') == season_stage_for_month(datetime.now().month)
+
+
+# ── Statistical fallback ─────────────────────────────────────────────────────
+
+def reference_statistical(feature_dict):
+    """The original branch-by-branch statistical algorithm, kept as an oracle."""
+    home_score = feature_dict['home_form_rating'] * 0.4 + feature_dict['home_win_rate'] * 0.4 + 10
+    away_score = feature_dict['away_form_rating'] * 0.4 + feature_dict['away_win_rate'] * 0.4
+    total_h2h = feature_dict['h2h_home_wins'] + feature_dict['h2h_away_wins'] + feature_dict['h2h_draws']
+    if total_h2h > 0:
+        home_score += (feature_dict['h2h_home_wins'] / total_h2h) * 100 * 0.2
+        away_score += (feature_dict['h2h_away_wins'] / total_h2h) * 100 * 0.2
+    total = home_score + away_score
+    home_win = (home_score / total) * 75
+    away_win = (away_score / total) * 75
+    draw = 100 - (home_win + away_win)
+    if draw < 15:
+        adjustment = (15 - draw) / 2
+        home_win -= adjustment
+        away_win -= adjustment
+        draw = 15
+    elif draw > 30:
+        adjustment = (draw - 30) / 2
+        home_win += adjustment
+        away_win += adjustment
+        draw = 30
+    return [home_win / 100, draw / 100, away_win / 100]
+
+
+class TestStatisticalBatch:
+    """The vectorized statistical model must reproduce the scalar algorithm exactly."""
+
+    def test_identical_to_reference(self, feature_engineer, fallback_predictor):
+        rng = np.random.default_rng(7)
+        matrix = feature_engineer.engineer_features_batch(SAMPLE_REQUESTS)
+        random_rows = np.tile(matrix[0], (200, 1))
+        for name, high in [('home_form_rating', 100), ('away_form_rating', 100),
+                           ('home_win_rate', 100), ('away_win_rate', 100)]:
+            random_rows[:, feature_engineer.feature_names.index(name)] = rng.uniform(0, high, 200)
+        for name in ['h2h_home_wins', 'h2h_away_wins', 'h2h_draws']:
+            random_rows[:, feature_engineer.feature_names.index(name)] = rng.integers(0, 6, 200)
+        matrix = np.vstack([matrix, random_rows])
+
+        batch = fallback_predictor.predict_batch(matrix)['probabilities']
+        expected = [
+            reference_statistical(dict(zip(fallback_predictor.feature_names, row)))
+            for row in matrix
+        ]
+        np.testing.assert_array_equal(batch, np.array(expected))
+
+    def test_draw_is_clamped(self, feature_engineer, fallback_predictor):
+        matrix = feature_engineer.engineer_features_batch(SAMPLE_REQUESTS)
+        draws = fallback_predictor.predict_batch(matrix)['probabilities'][:, 1]
+        assert np.all((draws >= 0.15) & (draws <= 0.30))
+
+    def test_unnormalizable_row_uses_fallback(self, fallback_predictor):
+        features = np.zeros((2, len(fallback_predictor.feature_names)))
+        features[0, fallback_predictor.feature_names.index('home_form_rating')] = -25.0
+        features[1, fallback_predictor.feature_names.index('home_form_rating')] = 60.0
+        probabilities = fallback_predictor.predict_batch(features)['probabilities']
+        np.testing.assert_array_equal(probabilities[0], [0.33, 0.34, 0.33])
+        assert np.all(np.isfinite(probabilities[1]))
+
+
+# ── Batch prediction ─────────────────────────────────────────────────────────
+
+class TestPredictBatch:
+    """The batch path must agree with the per-row path."""
+
+    def test_statistical_batch_matches_per_row(self, feature_engineer, fallback_predictor):
+        matrix = np.vstack([feature_engineer.engineer_features(r) for r in SAMPLE_REQUESTS])
+        batch = fallback_predictor.predict_batch(matrix)
+
+        assert batch['probabilities'].shape == (len(SAMPLE_REQUESTS), 3)
+        for row, probs in zip(matrix, batch['probabilities']):
+            expected = fallback_predictor.predict(row)['probabilities']
+            np.testing.assert_allclose(probs, expected)
+
+    def test_single_row_is_promoted_to_matrix(self, feature_engineer, fallback_predictor):
+        features = feature_engineer.engineer_features(make_request())
+        batch = fallback_predictor.predict_batch(features)
+        assert batch['probabilities'].shape == (1, 3)
+
+
+    def test_ml_error_falls_back_and_is_counted(self, feature_engineer, ml_predictor, monkeypatch):
+        from utils.metrics import PREDICTION_FALLBACKS
+
+        def broken_predict(features):
+            raise RuntimeError("booster unavailable")
+
+        monkeypatch.setattr(ml_predictor.metadata.booster, "inplace_predict", broken_predict)
+        counter = PREDICTION_FALLBACKS.labels(method='predict_batch', reason='ml_error')
+        before = counter.value
+
+        matrix = feature_engineer.engineer_features_batch(SAMPLE_REQUESTS)
+        result = ml_predictor.predict_batch(matrix)
+
+        assert result['model_type'] == 'fallback'
+        assert result['probabilities'].shape == (len(SAMPLE_REQUESTS), 3)
+        assert counter.value == before + 1
+
+    @pytest.mark.parametrize("method", ['predict', 'predict_batch'])
+    def test_statistical_failure_is_counted(self, feature_engineer, fallback_predictor,
+                                            monkeypatch, method):
+        from models.match_predictor import FALLBACK_PROBABILITIES
+        from utils.metrics import PREDICTION_FALLBACKS
+
+        def broken_columns(features):
+            raise RuntimeError("bad columns")
+
+        monkeypatch.setattr(fallback_predictor, "_statistical_columns", broken_columns)
+        counter = PREDICTION_FALLBACKS.labels(method=method, reason='statistical_error')
+        before = counter.value
+
+        features = feature_engineer.engineer_features(make_request())
+        result = getattr(fallback_predictor, method)(features)
+
+        assert result['model_type'] == 'fallback'
+        np.testing.assert_allclose(np.ravel(result['probabilities']), FALLBACK_PROBABILITIES)
+        assert counter.value == before + 1
+
+
+class TestNativeBooster:
+    """The inplace_predict fast path matches the sklearn wrapper."""
+
+    def test_parity_with_predict_proba(self, ml_predictor):
+        from models.match_predictor import PREDICT_NTHREAD
+
+        booster = ml_predictor.metadata.booster
+        config = json.loads(booster.save_config())
+        assert int(config['learner']['generic_param']['nthread']) == PREDICT_NTHREAD
+
+        features = np.random.default_rng(3).uniform(0, 100, (257, len(ml_predictor.feature_names)))
+        expected = ml_predictor.model.predict_proba(features)
+        np.testing.assert_allclose(ml_predictor.predict_batch(features)['probabilities'],
+                                   expected, rtol=0, atol=1e-6)
+        np.testing.assert_allclose(ml_predictor.predict(features[0])['probabilities'],
+                                   expected[0], rtol=0, atol=1e-6)
+
+    def test_models_without_booster_use_predict_proba(self, ml_predictor, monkeypatch):
+        monkeypatch.setattr(ml_predictor.model, "objective", "multi:softmax")
+        fresh = MatchPredictor()
+        fresh.model, fresh.feature_names = ml_predictor.model, ml_predictor.feature_names
+        assert fresh.metadata.booster is None
+
+        features = np.zeros((2, len(fresh.feature_names)))
+        np.testing.assert_allclose(fresh.predict_batch(features)['probabilities'],
+                                   ml_predictor.model.predict_proba(features))
+
+# ── Model artifacts ──────────────────────────────────────────────────────────
+
+class TestModelArtifact:
+    """Saved models can be memory-mapped and still predict identically."""
+
+    def test_round_trip_through_mapped_artifact(self, tmp_path, ml_predictor, monkeypatch):
+        import joblib
+        import models.match_predictor as match_predictor
+
+        path = str(tmp_path / "match_predictor.joblib")
+        ml_predictor.save_model(path)
+
+        raw = joblib.load(path, mmap_mode='r')
+        assert raw['format_version'] == match_predictor.ARTIFACT_FORMAT_VERSION
+        assert isinstance(raw['booster'], np.memmap)
+        assert 'model' not in raw
+
+        monkeypatch.setattr(match_predictor, "MODEL_EVALUATOR", "xgboost")
+        loaded = MatchPredictor(path)
+        features = np.random.default_rng(1).uniform(0, 100, (20, len(loaded.feature_names)))
+        np.testing.assert_array_equal(
+            loaded.predict_batch(features)['probabilities'],
+            ml_predictor.predict_batch(features)['probabilities']
+        )
+        assert loaded.version == "test-1.0.0"
+
+    def test_legacy_pickled_estimator_still_loads(self, tmp_path, ml_predictor):
+        import joblib
+
+        path = str(tmp_path / "legacy.joblib")
+        joblib.dump({'model': ml_predictor.model, 'feature_names': ml_predictor.feature_names,
+                     'version': '0.9.0'}, path)
+
+        loaded = MatchPredictor(path)
+        assert loaded.model is not None
+        assert loaded.version == '0.9.0'
+
+
+class TestFeatureImportance:
+    """Importances are computed once per model, not per prediction."""
+
+    def test_importance_is_shared_until_model_changes(self, ml_predictor):
+        first = ml_predictor.get_feature_importance()
+        assert set(first) == set(ml_predictor.feature_names)
+        assert all(type(value) is float for value in first.values())
+
+        features = np.zeros(len(ml_predictor.feature_names))
+        assert ml_predictor.predict(features)['feature_importance'] is first
+
+        ml_predictor.model = None
+        assert ml_predictor.get_feature_importance() is None
+
+
+class TestModelMetadata:
+    """Model-derived lookups are built at load time and ordered home/draw/away."""
+
+    def test_label_encoder_classes_reorder_outputs(self, tmp_path, ml_predictor):
+        import joblib
+        from sklearn.preprocessing import LabelEncoder
+
+        # The trainer fits a LabelEncoder on outcome names, which sorts them
+        encoder = LabelEncoder().fit(['HOME_WIN', 'DRAW', 'AWAY_WIN'])
+        path = str(tmp_path / "trained.joblib")
+        ml_predictor.save_model(path)
+        joblib.dump({**joblib.load(path), 'label_encoder': encoder}, path)
+
+        loaded = MatchPredictor(path)
+        assert loaded.classes == ['AWAY_WIN', 'DRAW', 'HOME_WIN']
+        assert loaded.metadata.class_order == (2, 1, 0)
+
+        features = np.random.default_rng(2).uniform(0, 100, (5, len(loaded.feature_names)))
+        raw = ml_predictor.model.predict_proba(features)
+        np.testing.assert_allclose(loaded.predict_batch(features)['probabilities'], raw[:, ::-1])
+        np.testing.assert_allclose(loaded.predict(features[0])['probabilities'], raw[0, ::-1])
+
+    def test_saved_classes_round_trip(self, tmp_path, ml_predictor):
+        ml_predictor.classes = ['HOME_WIN', 'DRAW', 'AWAY_WIN']
+        path = str(tmp_path / "ordered.joblib")
+        ml_predictor.save_model(path)
+
+        loaded = MatchPredictor(path)
+        assert loaded.classes == ['HOME_WIN', 'DRAW', 'AWAY_WIN']
+        assert loaded.metadata.class_order is None
+
+    def test_metadata_is_read_only_and_cached(self, ml_predictor):
+        metadata = ml_predictor.metadata
+        assert ml_predictor.metadata is metadata
+        assert metadata.feature_index[ml_predictor.feature_names[3]] == 3
+        with pytest.raises(TypeError):
+            metadata.feature_importance['home_form_rating'] = 1.0
+
+        ml_predictor.feature_names = list(reversed(ml_predictor.feature_names))
+        assert ml_predictor.metadata is not metadata
+
+
+# ── Compiled tree ensemble ───────────────────────────────────────────────────
+
+class TestTreeEnsemble:
+    """The NumPy evaluator reproduces XGBoost without its runtime."""
+
+    def test_parity_with_xgboost(self, ml_predictor):
+        from models.tree_ensemble import TreeEnsemble, compile_booster
+
+        ensemble = TreeEnsemble(compile_booster(ml_predictor.model.get_booster()))
+        features = np.random.default_rng(4).uniform(0, 100, (300, len(ml_predictor.feature_names)))
+        features[::3, 2] = np.nan
+
+        np.testing.assert_allclose(ensemble.predict_proba(features),
+                                   ml_predictor.model.predict_proba(features), rtol=0, atol=1e-5)
+        np.testing.assert_allclose(ensemble.feature_importances_,
+                                   ml_predictor.model.feature_importances_, atol=1e-6)
+
+    def test_numpy_evaluator_serves_saved_artifact(self, tmp_path, ml_predictor):
+        import joblib
+        from models.tree_ensemble import ENSEMBLE_ARRAYS, TreeEnsemble
+
+        path = str(tmp_path / "compiled.joblib")
+        ml_predictor.save_model(path)
+        assert isinstance(joblib.load(path, mmap_mode='r')['tree_ensemble']['value'], np.memmap)
+
+        # The default evaluator traverses the mapped arrays themselves
+        loaded = MatchPredictor(path)
+        assert isinstance(loaded.model, TreeEnsemble)
+        arrays = loaded.model.to_arrays()
+        assert set(arrays) == set(ENSEMBLE_ARRAYS)
+        for name in ENSEMBLE_ARRAYS[:-1]:  # all but the 0-d depth
+            assert isinstance(arrays[name].base, np.memmap), name
+
+        features = np.random.default_rng(5).uniform(0, 100, (20, len(loaded.feature_names)))
+        result = loaded.predict_batch(features)
+        assert result['model_type'] == 'ml'
+        np.testing.assert_allclose(result['probabilities'],
+                                   ml_predictor.predict_batch(features)['probabilities'], atol=1e-5)
+        assert loaded.get_feature_importance().keys() == ml_predictor.get_feature_importance().keys()
+
+    def test_artifact_without_booster_uses_numpy(self, tmp_path, ml_predictor):
+        import joblib
+        from models.tree_ensemble import TreeEnsemble
+
+        path = str(tmp_path / "numpy_only.joblib")
+        ml_predictor.save_model(path)
+        joblib.dump({**joblib.load(path), 'booster': None}, path)
+
+        loaded = MatchPredictor(path)
+        assert isinstance(loaded.model, TreeEnsemble)
+
+        # Re-saving a NumPy-served model keeps the compiled arrays
+        resaved = str(tmp_path / "resaved.joblib")
+        loaded.save_model(resaved)
+        assert MatchPredictor(resaved).model.depth == loaded.model.depth
+
+    def test_format_2_ensemble_is_upgraded(self, ml_predictor):
+        from models.tree_ensemble import TreeEnsemble, compile_booster
+
+        arrays = compile_booster(ml_predictor.model.get_booster())
+        children = arrays['children'].reshape(-1, 2)
+        legacy = {
+            'feature': arrays['feature'].astype(np.int32),
+            'threshold': arrays['threshold'],
+            'left': children[:, 0].astype(np.int32),
+            'right': children[:, 1].astype(np.int32),
+            'default_left': ~arrays['missing_right'],
+            'value': arrays['value'],
+            'roots': arrays['roots'].astype(np.int32),
+            'tree_class': arrays['class_map'].argmax(axis=1).astype(np.int32),
+            'base_margin': arrays['base_margin'],
+            'feature_importances': arrays['feature_importances']
+        }
+        features = np.random.default_rng(6).uniform(0, 100, (50, len(ml_predictor.feature_names)))
+        np.testing.assert_array_equal(TreeEnsemble(legacy).predict_proba(features),
+                                      TreeEnsemble(arrays).predict_proba(features))
+
+    @pytest.mark.skipif(not os.path.exists('/proc/self/smaps_rollup'),
+                        reason="needs Linux smaps_rollup")
+    def test_loading_maps_the_trees_instead_of_copying(self, tmp_path):
+        """
+        Anonymous (private, non-file) memory barely grows when a large
+        artifact is loaded and scored, so N workers hold one shared copy.
+        """
+        import joblib
+        from models.tree_ensemble import TreeEnsemble
+
+        # 200k stumps: a split node and two leaves each, about 23 MB of arrays
+        n_trees, n_classes = 200_000, 3
+        roots = np.arange(n_trees, dtype=np.intp) * 3
+        children = np.repeat(np.arange(3 * n_trees, dtype=np.intp), 2)
+        children[2 * roots], children[2 * roots + 1] = roots + 1, roots + 2
+        threshold = np.full(3 * n_trees, np.inf, dtype=np.float32)
+        threshold[roots] = 0.5
+        class_map = np.zeros((n_trees, n_classes), dtype=np.float32)
+        class_map[np.arange(n_trees), np.arange(n_trees) % n_classes] = 1.0
+        arrays = {
+            'feature': np.zeros(3 * n_trees, dtype=np.intp), 'threshold': threshold,
+            'children': children, 'missing_right': np.zeros(3 * n_trees, dtype=bool),
+            'value': np.tile(np.array([0, -0.001, 0.001], dtype=np.float32), n_trees),
+            'roots': roots, 'class_map': class_map, 'base_margin': np.zeros(n_classes),
+            'feature_importances': np.ones(18, dtype=np.float32) / 18, 'depth': np.asarray(1)
+        }
+        array_bytes = sum(array.nbytes for array in arrays.values())
+        path = str(tmp_path / "large.joblib")
+        joblib.dump({'booster': None, 'tree_ensemble': arrays, 'feature_names': [],
+                     'version': 'large'}, path)
+        del arrays, children, threshold, class_map
+
+        def anonymous_bytes():
+            with open('/proc/self/smaps_rollup') as rollup:
+                for line in rollup:
+                    if line.startswith('Anonymous:'):
+                        return int(line.split()[1]) * 1024
+
+        before = anonymous_bytes()
+        loaded = MatchPredictor(path)
+        assert isinstance(loaded.model, TreeEnsemble)
+        loaded.model.predict_proba(np.ones((4, 18)))
+        assert anonymous_bytes() - before < array_bytes * 0.2
+
+
+# ── Scoreline engine ─────────────────────────────────────────────────────────
+
+def poisson_cdf(rate, k):
+    return sum(rate ** i * math.exp(-rate) / math.factorial(i) for i in range(k + 1))
+
+
+class TestScorelineModel:
+    """Every market comes from one goal matrix per match."""
+
+    HOME = np.array([1.5, 0.0, 3.2, 2.0])
+    AWAY = np.array([1.1, 0.8, 0.0, 2.0])
+
+    def test_matrix_is_a_distribution(self):
+        matrix = ScorelineModel().goal_matrix(self.HOME, self.AWAY)
+        np.testing.assert_allclose(matrix.sum(axis=(1, 2)), 1.0)
+        assert np.all(matrix >= 0)
+
+    def test_btts_and_totals_match_closed_form(self):
+        model = ScorelineModel()
+        matrix = model.goal_matrix(self.HOME, self.AWAY)
+        np.testing.assert_allclose(
+            model.btts_probability(matrix), (1 - np.exp(-self.HOME)) * (1 - np.exp(-self.AWAY))
+        )
+        lines = [-0.5, 0.5, 2.0, 2.5, 5.5]
+        expected = [[poisson_cdf(h + a, math.floor(line)) if line >= 0 else 0.0 for line in lines]
+                    for h, a in zip(self.HOME, self.AWAY)]
+        np.testing.assert_allclose(model.under_probabilities(matrix, lines), expected, atol=1e-9)
+
+    def test_outcome_and_handicap_are_consistent(self):
+        model = ScorelineModel()
+        matrix = model.goal_matrix(self.HOME, self.AWAY)
+        outcome = model.outcome_probabilities(matrix)
+        np.testing.assert_allclose(outcome.sum(axis=1), 1.0)
+
+        handicap = model.asian_handicap(matrix, [-0.5, 0.0, 0.5])
+        np.testing.assert_allclose(handicap.sum(axis=2), 1.0)
+        # Level handicap: home covers on a win, pushes on a draw
+        np.testing.assert_allclose(handicap[:, 1], outcome)
+        np.testing.assert_allclose(handicap[:, 0, 0], outcome[:, 0])
+
+    def test_dixon_coles_moves_mass_to_draws(self):
+        model = ScorelineModel()
+        independent = model.goal_matrix(self.HOME[:1], self.AWAY[:1])
+        corrected = model.goal_matrix(self.HOME[:1], self.AWAY[:1], rho=-0.1)
+        np.testing.assert_allclose(corrected.sum(), 1.0)
+        assert corrected[0, 0, 0] > independent[0, 0, 0]
+        assert corrected[0, 1, 0] < independent[0, 1, 0]
+
+    def test_correct_scores_are_sorted(self):
+        model = ScorelineModel()
+        scores = model.correct_scores(model.goal_matrix(self.HOME, self.AWAY), top=5)
+        probabilities = [p for _, p in scores[0]]
+        assert probabilities == sorted(probabilities, reverse=True)
+        assert scores[1][0][0] == "0-0"
+        assert scores[2][0] == ("3-0", pytest.approx(poisson_cdf(3.2, 3) - poisson_cdf(3.2, 2)))
+
+    def test_expected_goals_combines_attack_and_defence(self):
+        home, away = expected_goals(2.0, 1.0, 0.5, 1.5)
+        np.testing.assert_allclose(home, [1.75])
+        np.testing.assert_allclose(away, [0.75])
@@ -0,0 +1,461 @@
+"""Unit tests for the prediction service utilities."""
+import asyncio
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from utils.logging_config import JsonFormatter, PredictionStats, should_sample
+from utils.inference_pool import InferencePool, InferencePoolSaturated
+from utils.json_response import FastJSONResponse, dumps
+from utils.metrics import Histogram, MetricsRegistry
+from utils.micro_batcher import MicroBatcher
+from utils.model_registry import ModelRegistry, ModelSwapError
+from utils.prediction_cache import FileCacheBackend, PredictionCache
+from utils.streaming import StreamParseError, iter_chunks, iter_json_array, iter_ndjson
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+# ── Logging ──────────────────────────────────────────────────────────────────
+
+class TestPredictionStats:
+    """Aggregated counters replace per-request log lines."""
+
+    def test_record_accumulates_without_logging(self, caplog):
+        stats = PredictionStats(flush_interval=3600)
+        with caplog.at_level(logging.INFO, logger='prediction.stats'):
+            stats.record("predict")
+            stats.record("predict", errors=1)
+            stats.record("predict_batch", rows=25)
+
+        assert caplog.records == []
+        assert stats.snapshot() == {
+            "predict": {"requests": 2, "rows": 2, "errors": 1},
+            "predict_batch": {"requests": 1, "rows": 25, "errors": 0},
+        }
+
+    def test_flush_logs_once_and_resets(self, caplog):
+        stats = PredictionStats(flush_interval=3600)
+        stats.record("predict_batch", rows=10)
+        with caplog.at_level(logging.INFO, logger='prediction.stats'):
+            flushed = stats.flush()
+
+        assert flushed["predict_batch"]["rows"] == 10
+        assert len(caplog.records) == 1
+        assert stats.snapshot() == {}
+
+    def test_record_flushes_when_interval_elapsed(self, caplog):
+        stats = PredictionStats(flush_interval=0)
+        with caplog.at_level(logging.INFO, logger='prediction.stats'):
+            stats.record("predict")
+        assert len(caplog.records) == 1
+
+    def test_timer_flushes_without_traffic(self, caplog):
+        stats = PredictionStats(flush_interval=0.05)
+        stats.record("predict")
+        with caplog.at_level(logging.INFO, logger='prediction.stats'):
+            stats.start()
+            try:
+                deadline = time.monotonic() + 5
+                while not caplog.records and time.monotonic() < deadline:
+                    time.sleep(0.01)
+            finally:
+                stats.stop()
+        assert len(caplog.records) == 1
+        assert stats.snapshot() == {}
+
+    def test_stop_flushes_remaining_counters(self, caplog):
+        stats = PredictionStats(flush_interval=3600)
+        stats.start()
+        stats.record("predict_batch", rows=3)
+        with caplog.at_level(logging.INFO, logger='prediction.stats'):
+            stats.stop()
+        assert len(caplog.records) == 1
+        assert caplog.records[0].fields["endpoints"]["predict_batch"]["rows"] == 3
+
+
+class TestLoggingHelpers:
+
+    def test_json_formatter_includes_fields(self):
+        record = logging.LogRecord("test", logging.INFO, __file__, 1, "hello %s", ("world",), None)
+        record.fields = {"endpoint": "predict"}
+        payload = json.loads(JsonFormatter().format(record))
+        assert payload["message"] == "hello world"
+        assert payload["endpoint"] == "predict"
+        assert payload["level"] == "INFO"
+
+    @pytest.mark.parametrize("rate, expected", [(0.0, False), (1.0, True)])
+    def test_should_sample_bounds(self, rate, expected):
+        assert should_sample(rate) is expected
+
+
+# ── Inference pool ───────────────────────────────────────────────────────────
+
+class TestInferencePool:
+    """CPU-bound work runs on a bounded pool with load shedding."""
+
+    @pytest.mark.anyio
+    async def test_run_executes_off_the_event_loop(self):
+        pool = InferencePool(max_workers=2, max_pending=4)
+        loop_thread = threading.get_ident()
+        worker_thread = await pool.run(threading.get_ident)
+        assert worker_thread != loop_thread
+        assert pool.stats()["completed"] == 1
+        pool.shutdown()
+
+    @pytest.mark.anyio
+    async def test_map_chunks_preserves_row_order(self):
+        pool = InferencePool(max_workers=3, max_pending=8, chunk_size=10)
+        matrix = np.arange(100.0).reshape(50, 2)
+        chunks = await pool.map_chunks(lambda chunk: chunk[:, 0], matrix)
+        assert len(chunks) == 3
+        np.testing.assert_array_equal(np.concatenate(chunks), matrix[:, 0])
+        pool.shutdown()
+
+    @pytest.mark.anyio
+    async def test_full_queue_is_rejected(self):
+        pool = InferencePool(max_workers=1, max_pending=1, retry_after=7)
+        release = threading.Event()
+        blocked = asyncio.ensure_future(pool.run(release.wait))
+        await asyncio.sleep(0)
+
+        with pytest.raises(InferencePoolSaturated) as excinfo:
+            await pool.run(lambda: None)
+        assert excinfo.value.retry_after == 7
+        assert pool.stats()["rejected"] == 1
+
+        release.set()
+        await blocked
+        assert await pool.run(lambda: "ok") == "ok"
+        pool.shutdown()
+
+
+# ── Micro-batching ───────────────────────────────────────────────────────────
+
+class TestMicroBatcher:
+    """Concurrent single requests are coalesced into one batch call."""
+
+    @pytest.mark.anyio
+    async def test_concurrent_submits_share_one_call(self):
+        calls = []
+
+        def process(items):
+            calls.append(list(items))
+            return [item * 10 for item in items]
+
+        pool = InferencePool(max_workers=1, max_pending=4)
+        batcher = MicroBatcher(process, pool, max_wait_ms=20, max_batch_size=64)
+        results = await asyncio.gather(*[batcher.submit(i) for i in range(5)])
+
+        assert results == [0, 10, 20, 30, 40]
+        assert calls == [[0, 1, 2, 3, 4]]
+        stats = batcher.stats()
+        assert stats["batch_size"]["count"] == 1
+        assert stats["batch_size"]["sum"] == 5
+        assert stats["queue_wait_seconds"]["count"] == 5
+        pool.shutdown()
+
+    @pytest.mark.anyio
+    async def test_full_batch_dispatches_without_waiting(self):
+        pool = InferencePool(max_workers=1, max_pending=4)
+        batcher = MicroBatcher(lambda items: items, pool, max_wait_ms=10_000, max_batch_size=3)
+        results = await asyncio.wait_for(
+            asyncio.gather(*[batcher.submit(i) for i in range(3)]), timeout=2
+        )
+        assert results == [0, 1, 2]
+        pool.shutdown()
+
+    @pytest.mark.anyio
+    async def test_per_item_errors_fail_only_their_caller(self):
+        def process(items):
+            return [ValueError("bad row") if item < 0 else item for item in items]
+
+        pool = InferencePool(max_workers=1, max_pending=4)
+        batcher = MicroBatcher(process, pool, max_wait_ms=5, max_batch_size=8)
+        results = await asyncio.gather(
+            batcher.submit(1), batcher.submit(-1), batcher.submit(2), return_exceptions=True
+        )
+        assert results[0] == 1 and results[2] == 2
+        assert isinstance(results[1], ValueError)
+        pool.shutdown()
+
+
+class TestHistogram:
+
+    def test_cumulative_buckets(self):
+        histogram = Histogram([1, 5, 10])
+        for value in [0.5, 1, 3, 7, 50]:
+            histogram.observe(value)
+        snapshot = histogram.snapshot()
+        assert snapshot["buckets"] == {"1": 2, "5": 3, "10": 4, "+Inf": 5}
+        assert snapshot["count"] == 5
+        assert snapshot["sum"] == pytest.approx(61.5)
+
+
+
+class TestMetricsRegistry:
+    """Labelled metrics rendered in the Prometheus text format."""
+
+    def test_render_histogram_and_counter(self):
+        registry = MetricsRegistry()
+        latency = registry.histogram("stage_seconds", "Stage latency.", ["stage"], buckets=[0.1, 1])
+        fallbacks = registry.counter("fallbacks_total", "Fallbacks.", ["method"])
+        latency.labels(stage="predict").observe(0.05)
+        latency.labels(stage="predict").observe(0.5)
+        fallbacks.labels(method="predict").inc()
+
+        lines = registry.render().splitlines()
+        assert "# TYPE stage_seconds histogram" in lines
+        assert 'stage_seconds_bucket{stage="predict",le="0.1"} 1' in lines
+        assert 'stage_seconds_bucket{stage="predict",le="+Inf"} 2' in lines
+        assert 'stage_seconds_count{stage="predict"} 2' in lines
+        assert "# TYPE fallbacks_total counter" in lines
+        assert 'fallbacks_total{method="predict"} 1.0' in lines
+
+    def test_label_values_are_escaped(self):
+        registry = MetricsRegistry()
+        registry.counter("c_total", "C.", ["path"]).labels(path='a"b').inc()
+        assert 'c_total{path="a\\"b"} 1.0' in registry.render()
+
+    def test_duplicate_names_are_rejected(self):
+        registry = MetricsRegistry()
+        registry.counter("c_total", "C.")
+        with pytest.raises(ValueError):
+            registry.counter("c_total", "C.")
+
+# ── Prediction cache ─────────────────────────────────────────────────────────
+
+class TestPredictionCache:
+    """LRU/TTL cache keyed on quantized feature vectors and model identity."""
+
+    def test_key_is_quantized_and_namespaced(self):
+        cache = PredictionCache(precision=6)
+        features = np.array([65.0, 55.0, 0.1 + 0.2])
+        assert cache.make_key(features, "v1") == cache.make_key(np.array([65.0, 55.0, 0.3]), "v1")
+        assert cache.make_key(features, "v1") != cache.make_key(features, "v2")
+        assert cache.make_key(features, "v1") != cache.make_key(features + 1e-3, "v1")
+
+    def test_make_keys_match_per_row_keys(self):
+        cache = PredictionCache(precision=6)
+        features = np.array([[65.0, 55.0, -0.0], [1.5, 2.5, 0.1 + 0.2]])
+        assert cache.make_keys(features, "v1") == [cache.make_key(row, "v1") for row in features]
+
+    def test_hit_miss_and_lru_eviction(self):
+        cache = PredictionCache(max_entries=2)
+        cache.set("a", [0.5, 0.25, 0.25])
+        cache.set("b", [0.4, 0.3, 0.3])
+        assert cache.get("a") == [0.5, 0.25, 0.25]  # "a" is now most recent
+        cache.set("c", [0.2, 0.3, 0.5])  # evicts "b"
+
+        assert cache.get("b") is None
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["evictions"] == 1
+        assert stats["size"] == 2
+
+    def test_entries_expire(self):
+        cache = PredictionCache(ttl_seconds=0)
+        cache.set("a", [1.0, 0.0, 0.0])
+        assert cache.get("a") is None
+
+    def test_invalidate_clears_everything(self, tmp_path):
+        cache = PredictionCache(backend=FileCacheBackend(str(tmp_path)))
+        cache.set("a", [1.0, 0.0, 0.0])
+        cache.invalidate()
+        assert cache.get("a") is None
+        assert cache.stats()["invalidations"] == 1
+        assert list(tmp_path.glob("*.json")) == []
+
+    def test_file_backend_is_shared_between_instances(self, tmp_path):
+        worker_a = PredictionCache(backend=FileCacheBackend(str(tmp_path)))
+        worker_b = PredictionCache(backend=FileCacheBackend(str(tmp_path)))
+        worker_a.set("a", [0.5, 0.3, 0.2])
+        assert worker_b.get("a") == [0.5, 0.3, 0.2]
+        assert worker_b.stats()["hits"] == 1
+
+
+# ── Streaming ────────────────────────────────────────────────────────────────
+
+async def byte_chunks(payload: bytes, size: int):
+    for start in range(0, len(payload), size):
+        yield payload[start:start + size]
+
+
+async def collect(rows):
+    return [row async for row in rows]
+
+
+class TestStreamingParsers:
+    """Rows are parsed incrementally, whatever the chunk boundaries."""
+
+    @pytest.mark.anyio
+    @pytest.mark.parametrize("size", [1, 3, 1024])
+    async def test_ndjson_rows_and_bad_lines(self, size):
+        payload = b'{"a": 1}\n\nnot json\n{"a": "\xc3\xa9"}'
+        rows = await collect(iter_ndjson(byte_chunks(payload, size)))
+        assert rows[0] == {"a": 1}
+        assert isinstance(rows[1], ValueError)
+        assert rows[2] == {"a": "\u00e9"}
+
+    @pytest.mark.anyio
+    @pytest.mark.parametrize("size", [1, 2, 7, 4096])
+    async def test_json_array_elements(self, size):
+        payload = json.dumps([{"a": i, "s": "x, ]"} for i in range(5)] + [12345]).encode()
+        rows = await collect(iter_json_array(byte_chunks(payload, size)))
+        assert rows == [{"a": i, "s": "x, ]"} for i in range(5)] + [12345]
+
+    @pytest.mark.anyio
+    async def test_empty_json_array(self):
+        assert await collect(iter_json_array(byte_chunks(b" [ ] ", 2))) == []
+
+    @pytest.mark.anyio
+    @pytest.mark.parametrize("payload", [b'{"a": 1}', b'[{"a": 1} {"a": 2}]', b'[{"a": 1},', b'[1] 2'])
+    async def test_malformed_json_array(self, payload):
+        with pytest.raises(StreamParseError):
+            await collect(iter_json_array(byte_chunks(payload, 4)))
+
+    @pytest.mark.anyio
+    async def test_oversized_row_is_rejected(self):
+        payload = b'["' + b"x" * 100 + b'"]'
+        with pytest.raises(StreamParseError):
+            await collect(iter_json_array(byte_chunks(payload, 8), max_row_bytes=50))
+
+    @pytest.mark.anyio
+    async def test_iter_chunks(self):
+        async def rows():
+            for i in range(5):
+                yield i
+        assert await collect(iter_chunks(rows(), 2)) == [[0, 1], [2, 3], [4]]
+
+class TestJsonResponse:
+    """Responses are encoded compactly, NumPy values included."""
+
+    def test_dumps_is_compact_and_handles_numpy(self):
+        content = {"p": np.float64(0.25), "rows": np.array([1, 2]), "name": "\u00e9"}
+        assert json.loads(dumps(content)) == {"p": 0.25, "rows": [1, 2], "name": "\u00e9"}
+        assert b" " not in dumps({"a": [1, 2]})
+
+    def test_response_renders_with_dumps(self):
+        response = FastJSONResponse({"a": 1.5})
+        assert response.body == dumps({"a": 1.5})
+        assert response.media_type == "application/json"
+
+# ── Model registry ───────────────────────────────────────────────────────────
+
+class FakePredictor:
+    """Minimal predictor scoring every row as an even contest."""
+
+    def __init__(self, version, model=None, probabilities=(0.4, 0.3, 0.3)):
+        self.version = version
+        self.model = model
+        self.probabilities = probabilities
+
+    def predict_batch(self, features):
+        return {
+            'probabilities': np.tile(self.probabilities, (len(features), 1)),
+            'model_type': 'ml' if self.model is not None else 'statistical'
+        }
+
+
+class FakeFeatureEngineer:
+
+    def engineer_features_batch(self, requests):
+        return np.zeros((len(requests), 3))
+
+
+class TestModelRegistry:
+    """Reloads swap predictor + feature engineer atomically, with refcounting."""
+
+    def test_in_flight_requests_finish_on_old_bundle(self):
+        registry = ModelRegistry(lambda: (FakePredictor("v2"), FakeFeatureEngineer()))
+        old = registry.install(FakePredictor("v1"), FakeFeatureEngineer())
+
+        with registry.acquire() as bundle:
+            registry.load_and_swap()
+            assert bundle is old
+            assert bundle.predictor.version == "v1"
+            assert registry.current.version == "v2"
+            assert registry.stats()["draining"] == [{"generation": 1, "version": "v1", "in_flight": 1}]
+
+        assert old.released
+        assert registry.stats()["draining"] == []
+
+    def test_idle_bundle_is_freed_on_swap(self):
+        registry = ModelRegistry(lambda: (FakePredictor("v2"), FakeFeatureEngineer()))
+        old = registry.install(FakePredictor("v1"), FakeFeatureEngineer())
+        new = registry.load_and_swap()
+        assert old.released
+        assert new.generation == 2
+
+    def test_failed_smoke_test_keeps_current_bundle(self):
+        broken = FakePredictor("v2", probabilities=(np.nan, 0.5, 0.5))
+        registry = ModelRegistry(lambda: (broken, FakeFeatureEngineer()))
+        current = registry.install(FakePredictor("v1"), FakeFeatureEngineer())
+
+        with pytest.raises(ModelSwapError):
+            registry.load_and_swap()
+        assert registry.current is current
+        assert not current.released
+
+    def test_ml_model_is_not_replaced_by_fallback(self):
+        registry = ModelRegistry(lambda: (FakePredictor("v2"), FakeFeatureEngineer()))
+        current = registry.install(FakePredictor("v1", model=object()), FakeFeatureEngineer())
+
+        with pytest.raises(ModelSwapError):
+            registry.load_and_swap()
+        assert registry.current is current
+
+    @pytest.mark.anyio
+    async def test_reload_runs_off_the_event_loop(self):
+        loop_thread = threading.get_ident()
+        load_threads = []
+
+        def load():
+            load_threads.append(threading.get_ident())
+            return FakePredictor("v2"), FakeFeatureEngineer()
+
+        registry = ModelRegistry(load)
+        bundle = await registry.reload()
+        assert bundle.version == "v2"
+        assert load_threads and load_threads[0] != loop_thread
+
+    @pytest.mark.anyio
+    async def test_first_load_runs_once_and_reports_warming(self):
+        release = threading.Event()
+        loads = []
+
+        def first_load():
+            loads.append(1)
+            release.wait(5)
+            registry.install(FakePredictor("v1"), FakeFeatureEngineer())
+
+        registry = ModelRegistry(lambda: (FakePredictor("v2"), FakeFeatureEngineer()))
+        registry.start_loading(first_load)
+        assert registry.warming
+
+        waiters = asyncio.gather(*[registry.ensure_loaded(first_load) for _ in range(3)])
+        await asyncio.sleep(0.01)
+        release.set()
+        bundles = await waiters
+
+        assert loads == [1]
+        assert all(bundle.version == "v1" for bundle in bundles)
+        assert not registry.warming
+
+    def test_swap_records_load_and_warmup_timings(self):
+        registry = ModelRegistry(lambda: (FakePredictor("v1"), FakeFeatureEngineer()))
+        registry.load_and_swap()
+        assert set(registry.timings) == {"load_seconds", "warmup_seconds"}
+        assert registry.stats()["timings"] == registry.timings
@@ -0,0 +1,216 @@
+"""
+Walk-forward backtesting for FootDash models.
+
+Matches are sorted by match_date and grouped into test periods (calendar
+months or days). For every period after the first min_train_periods,
+a model is trained on the periods before it, either all of them (expanding
+window) or the last `window` (rolling window), and scored on that period.
+No model ever sees a match played after the ones it predicts.
+
+Because the rows are sorted once, every training window and test period is
+a contiguous slice of the same feature matrix, so no per-window copies are
+made. Windows are fitted side by side on a process pool with the host's
+cores split between them (see cross_validation.thread_budget).
+
+Each window's predictions are cached on disk under a key derived from the
+model parameters and the contents of the periods involved. A backtest
+repeated after new matches arrive only fits the windows whose data changed:
+with an expanding window, that is the new periods alone.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import xgboost as xgb
+
+from cross_validation import budgeted_params, clipped_log_losses, run_fits, thread_budget, worker_arrays
+
+logger = logging.getLogger(__name__)
+
+# Leading characters of an ISO 8601 match_date that name its period: the
+# calendar month, or the calendar day (not the competition's matchday round,
+# which the training export does not carry)
+PERIOD_KEY_LENGTH = {'month': 7, 'day': 10}
+
+
+def _fit_window(params: Dict, rounds: int, train: Tuple[int, int], test: Tuple[int, int],
+                n_threads: int) -> np.ndarray:
+    """Train on rows train[0]:train[1] and return probabilities for rows test[0]:test[1]."""
+    X, y = worker_arrays()
+    booster = xgb.train(budgeted_params(params, n_threads, native=True),
+                        xgb.DMatrix(X[train[0]:train[1]], label=y[train[0]:train[1]]),
+                        num_boost_round=rounds)
+    return np.asarray(booster.inplace_predict(X[test[0]:test[1]]), dtype=np.float32)
+
+
+def _digest(*parts: bytes) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def score_groups(groups: np.ndarray, y: np.ndarray, proba: np.ndarray) -> List[Dict[str, Any]]:
+    """
+    Accuracy and log loss of each group of rows.
+
+    Args:
+        groups: Group key of every row (league, season, ...)
+        y: Encoded labels
+        proba: (n_rows, n_classes) predicted probabilities
+
+    Returns:
+        One dict per group, in key order, with key, matches, accuracy and log_loss
+    """
+    keys, inverse = np.unique(groups, return_inverse=True)
+    if keys.dtype.kind == 'f' and np.all(np.mod(keys, 1) == 0):
+        # Numeric ids parsed as floats (league_id)
+        keys = keys.astype(np.int64)
+    correct = (proba.argmax(axis=1) == y).astype(np.float64)
+    losses = clipped_log_losses(proba, y)
+    counts = np.bincount(inverse, minlength=len(keys))
+    accuracy = np.bincount(inverse, correct, minlength=len(keys)) / counts
+    log_loss = np.bincount(inverse, losses, minlength=len(keys)) / counts
+    return [
+        {'key': key.item(), 'matches': int(count), 'accuracy': float(acc), 'log_loss': float(loss)}
+        for key, count, acc, loss in zip(keys, counts, accuracy, log_loss)
+    ]
+
+
+def walk_forward(params: Dict, X: np.ndarray, y: np.ndarray, match_date: np.ndarray,
+                 groups: Optional[Dict[str, np.ndarray]] = None, period: str = 'month',
+                 window: Optional[int] = None, min_train_periods: int = 3,
+                 workers: Optional[int] = None, cache_dir: Optional[str] = None) -> Dict:
+    """
+    Backtest a model configuration over chronological windows.
+
+    Args:
+        params: XGBClassifier parameters; n_estimators sets the boosting rounds
+        X: Features, one row per match
+        y: Encoded labels
+        match_date: ISO 8601 date of every match
+        groups: Extra columns to break the scores down by, e.g.
+            {'league': league_id, 'season': season}
+        period: 'month' or 'day', the calendar unit scored by each window
+        window: Periods each model trains on (rolling); None trains on every
+            earlier period (expanding)
+        min_train_periods: Periods before the first scored one
+        workers: Maximum concurrent fits (default: derived from the core count)
+        cache_dir: Directory of cached window predictions (default: no caching)
+
+    Returns:
+        Dict with the per-window results, overall scores, a table per group
+        column and timings
+
+    Raises:
+        ValueError: If period is unknown or there are too few periods to score one
+    """
+    if period not in PERIOD_KEY_LENGTH:
+        raise ValueError(f"Unknown period {period!r}; expected one of {tuple(PERIOD_KEY_LENGTH)}")
+    started = time.perf_counter()
+
+    order = np.argsort(match_date, kind='stable')
+    X, y = np.ascontiguousarray(X[order]), np.ascontiguousarray(y[order])
+    labels = np.asarray(match_date)[order].astype(f"U{PERIOD_KEY_LENGTH[period]}")
+    periods, starts = np.unique(labels, return_index=True)
+    bounds = np.append(starts, len(y))
+    if len(periods) <= min_train_periods:
+        raise ValueError(f"{len(periods)} {period} periods; need more than {min_train_periods} to backtest")
+
+    n_classes = int(params.get('num_class') or len(np.unique(y)))
+    native_params = xgb.XGBClassifier(**params).get_xgb_params()
+    native_params['num_class'] = n_classes
+    rounds = params.get('n_estimators') or 100
+
+    # Content digest of every period, so a window's key changes exactly when its data does
+    period_digests = [
+        _digest(X[bounds[i]:bounds[i + 1]].tobytes(), y[bounds[i]:bounds[i + 1]].tobytes())
+        for i in range(len(periods))
+    ]
+    params_digest = _digest(json.dumps({**native_params, 'rounds': rounds}, sort_keys=True, default=str).encode())
+
+    windows = []
+    for t in range(min_train_periods, len(periods)):
+        first = 0 if window is None else max(0, t - window)
+        key = _digest(params_digest.encode(), *(d.encode() for d in period_digests[first:t + 1]))
+        windows.append({
+            'test_period': str(periods[t]),
+            'train_periods': [str(periods[first]), str(periods[t - 1])],
+            'train': (int(bounds[first]), int(bounds[t])),
+            'test': (int(bounds[t]), int(bounds[t + 1])),
+            'key': key
+        })
+
+    probabilities: Dict[str, np.ndarray] = {}
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        for entry in windows:
+            cached = os.path.join(cache_dir, f"{entry['key']}.npy")
+            if os.path.exists(cached):
+                probabilities[entry['key']] = np.load(cached)
+    pending = [entry for entry in windows if entry['key'] not in probabilities]
+
+    workers_used, n_threads = thread_budget(max(len(pending), 1), workers)
+    logger.info(f"Backtesting {len(windows)} {period} windows "
+                f"({'rolling ' + str(window) if window else 'expanding'}): "
+                f"{len(windows) - len(pending)} cached, {len(pending)} to fit "
+                f"on {workers_used} processes x {n_threads} threads")
+
+    tasks = [(native_params, rounds, entry['train'], entry['test'], n_threads) for entry in pending]
+    fitted = run_fits(_fit_window, tasks, X, y, workers_used) if pending else []
+
+    for entry, proba in zip(pending, fitted):
+        proba = proba.reshape(-1, n_classes)
+        probabilities[entry['key']] = proba
+        if cache_dir:
+            np.save(os.path.join(cache_dir, f"{entry['key']}.npy"), proba)
+
+    # The test periods are consecutive, so their rows form one slice
+    scored = slice(windows[0]['test'][0], len(y))
+    proba = np.concatenate([probabilities[entry['key']] for entry in windows]).astype(np.float64)
+    proba /= proba.sum(axis=1, keepdims=True)
+    y_scored = y[scored]
+
+    window_scores = score_groups(labels[scored], y_scored, proba)
+    results = {
+        'period': period,
+        'window': window,
+        'windows': [
+            {
+                'test_period': entry['test_period'],
+                'train_periods': entry['train_periods'],
+                'train_rows': entry['train'][1] - entry['train'][0],
+                'test_rows': score['matches'],
+                'accuracy': score['accuracy'],
+                'log_loss': score['log_loss']
+            }
+            for entry, score in zip(windows, window_scores)
+        ],
+        'overall': score_groups(np.zeros(len(y_scored), dtype=np.int8), y_scored, proba)[0],
+        'timings': {
+            'windows': len(windows),
+            'fitted': len(pending),
+            'cached': len(windows) - len(pending),
+            'workers': workers_used,
+            'threads_per_fit': n_threads,
+            'wall_seconds': round(time.perf_counter() - started, 3)
+        }
+    }
+    results['overall'].pop('key')
+    for name, values in (groups or {}).items():
+        results[f"by_{name}"] = score_groups(np.asarray(values)[order][scored], y_scored, proba)
+    return results
+
+
+def format_table(rows: Sequence[Dict[str, Any]], title: str) -> str:
+    """Render a score table from score_groups for the log."""
+    lines = [title, f"  {'':<12} {'matches':>8} {'accuracy':>9} {'log loss':>9}"]
+    for row in rows:
+        lines.append(f"  {str(row['key']):<12} {row['matches']:>8} "
+                     f"{row['accuracy']:>9.4f} {row['log_loss']:>9.4f}")
+    return '\n'.join(lines)
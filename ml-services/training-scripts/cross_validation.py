@@ -0,0 +1,188 @@
+"""
+Parallel training and cross-validation for FootDash models.
+
+The final model and every cross-validation fold are independent fits, so they
+run side by side on a process pool. Each fit gets an explicit XGBoost thread
+budget, so the pool never asks for more threads than the host has cores (a
+fit with n_jobs=-1 per fold would oversubscribe every core several times).
+
+Fold fits also produce the out-of-fold predictions, so the cross-validation
+metrics need no extra training.
+"""
+
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import xgboost as xgb
+from sklearn.metrics import accuracy_score, log_loss
+from sklearn.model_selection import StratifiedKFold
+
+logger = logging.getLogger(__name__)
+
+# Training data shared with each worker process once, by the pool initializer
+_worker_data: Dict[str, np.ndarray] = {}
+
+
+def thread_budget(n_fits: int, workers: Optional[int] = None,
+                  cpu_count: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Split the host's cores between concurrent fits.
+
+    Args:
+        n_fits: Number of independent fits to run
+        workers: Maximum concurrent fits (default: one per core, at most n_fits)
+        cpu_count: Cores available (default: os.cpu_count())
+
+    Returns:
+        (workers, threads per fit)
+    """
+    cpu_count = cpu_count or os.cpu_count() or 1
+    workers = max(1, min(workers or cpu_count, n_fits, cpu_count))
+    return workers, max(1, cpu_count // workers)
+
+
+def budgeted_params(params: Dict, n_threads: int, native: bool = False) -> Dict:
+    """
+    Parameters with every thread setting replaced by the thread budget.
+
+    XGBoost reads both n_jobs and its alias nthread, and which one wins
+    depends on their order, so both are dropped before the budget is set:
+    as n_jobs for XGBClassifier, or as nthread for xgb.train when native.
+    """
+    params = {key: value for key, value in params.items() if key not in ('n_jobs', 'nthread')}
+    params['nthread' if native else 'n_jobs'] = n_threads
+    return params
+
+
+def _init_worker(X: np.ndarray, y: np.ndarray) -> None:
+    _worker_data['X'] = X
+    _worker_data['y'] = y
+
+
+def worker_arrays() -> Tuple[np.ndarray, np.ndarray]:
+    """(X, y) of the run_fits call the current fit belongs to."""
+    return _worker_data['X'], _worker_data['y']
+
+
+def run_fits(fn: Callable, tasks: Sequence[Tuple], X: np.ndarray, y: np.ndarray,
+             workers: int) -> List[Any]:
+    """
+    Call fn(*task) for every task, with X and y available through worker_arrays().
+
+    Args:
+        fn: Module-level fit function, so spawned workers can import it
+        tasks: Argument tuples, one per fit
+        X: Features shared by every fit, sent to each worker process once
+        y: Labels shared by every fit
+        workers: Concurrent fits (see thread_budget)
+
+    Returns:
+        fn's results, in task order
+    """
+    if workers == 1:
+        # A single worker gains nothing from a pool but its startup cost
+        _init_worker(X, y)
+        try:
+            return [fn(*task) for task in tasks]
+        finally:
+            _worker_data.clear()
+
+    # Spawned rather than forked workers, so no fit inherits OpenMP state
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(X, y),
+                             mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = [pool.submit(fn, *task) for task in tasks]
+        return [future.result() for future in futures]
+
+
+def clipped_log_losses(proba: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Per-row log loss of the true class, clipped as sklearn.metrics.log_loss does."""
+    return -np.log(np.clip(proba[np.arange(len(y)), y], 1e-15, 1.0))
+
+
+def _fit(params: Dict, train_index: Optional[np.ndarray], test_index: Optional[np.ndarray],
+         n_threads: int) -> Dict[str, Any]:
+    """
+    Fit one model in a worker process.
+
+    With test_index set, the model is a fold fit: it is scored on the
+    held-out rows and only its predictions are returned. Otherwise it is
+    the final model, fitted on every row and returned itself.
+    """
+    started = time.perf_counter()
+    X, y = worker_arrays()
+    model = xgb.XGBClassifier(**budgeted_params(params, n_threads))
+    if train_index is None:
+        model.fit(X, y)
+    else:
+        model.fit(X[train_index], y[train_index])
+
+    result: Dict[str, Any] = {'fit_seconds': time.perf_counter() - started}
+    if test_index is None:
+        result['model'] = model
+    else:
+        result['probabilities'] = model.predict_proba(X[test_index])
+    return result
+
+
+def fit_with_cross_validation(params: Dict, X: np.ndarray, y: np.ndarray, cv: int = 5,
+                              workers: Optional[int] = None) -> Tuple[xgb.XGBClassifier, Dict]:
+    """
+    Fit the final model and cv fold models concurrently.
+
+    Folds are stratified and unshuffled, matching cross_val_score(cv=cv)
+    for a classifier.
+
+    Args:
+        params: XGBClassifier parameters; n_jobs and nthread are replaced by the thread budget
+        X: Training features
+        y: Encoded training labels
+        cv: Number of folds
+        workers: Maximum concurrent fits (default: derived from the core count)
+
+    Returns:
+        (final model, results) where results holds per-fold accuracy, the
+        out-of-fold accuracy and log loss, and timings per stage
+    """
+    folds = list(StratifiedKFold(n_splits=cv).split(X, y))
+    workers, n_threads = thread_budget(len(folds) + 1, workers)
+    logger.info(f"Fitting final model and {len(folds)} folds on {workers} processes "
+                f"x {n_threads} threads")
+
+    started = time.perf_counter()
+    tasks = [(params, None, None, n_threads)] + [
+        (params, train_index, test_index, n_threads) for train_index, test_index in folds
+    ]
+    final_result, *fold_results = run_fits(_fit, tasks, X, y, workers)
+    wall_seconds = time.perf_counter() - started
+
+    n_classes = int(params.get('num_class') or len(np.unique(y)))
+    oof = np.zeros((len(y), n_classes))
+    fold_scores: List[float] = []
+    for (_, test_index), result in zip(folds, fold_results):
+        oof[test_index] = result['probabilities']
+        fold_scores.append(float(accuracy_score(y[test_index], result['probabilities'].argmax(axis=1))))
+    # float32 model output; renormalize so the rows sum to one in float64
+    oof /= oof.sum(axis=1, keepdims=True)
+
+    fit_seconds = [final_result['fit_seconds']] + [result['fit_seconds'] for result in fold_results]
+    results = {
+        'cv_scores': fold_scores,
+        'oof_accuracy': float(accuracy_score(y, oof.argmax(axis=1))),
+        'oof_log_loss': float(log_loss(y, oof, labels=list(range(n_classes)))),
+        'timings': {
+            'workers': workers,
+            'threads_per_fit': n_threads,
+            'final_fit_seconds': round(final_result['fit_seconds'], 3),
+            'fold_fit_seconds': [round(seconds, 3) for seconds in fit_seconds[1:]],
+            'wall_seconds': round(wall_seconds, 3),
+            # Fit time summed over all fits, i.e. the cost of running them one after another
+            'summed_fit_seconds': round(sum(fit_seconds), 3),
+            'speedup': round(sum(fit_seconds) / wall_seconds, 2) if wall_seconds else None
+        }
+    }
+    return final_result['model'], results
@@ -0,0 +1,208 @@
+"""
+Out-of-core training for FootDash models.
+
+Training data is read from a column cache directory (see save_column_cache),
+whose columns are memory-mapped .npy files, and handed to XGBoost one row
+chunk at a time through a DataIter. XGBoost quantizes each chunk into pages
+kept in an on-disk cache, so neither the feature matrix nor a train/test copy
+of it is ever held in memory. Process memory is bounded by the chunk size
+and the pages XGBoost keeps in flight, plus XGBoost's per-row gradients (24
+bytes a row for three classes); the memory-mapped files only occupy page
+cache, which the kernel reclaims under pressure.
+
+The train/test split is drawn per chunk from a seeded generator, so the
+train and test iterators select complementary rows without storing any row
+indices.
+"""
+
+import logging
+import os
+import tempfile
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import xgboost as xgb
+
+from cross_validation import clipped_log_losses
+from training_data import DEFAULT_CHUNK_ROWS, cache_categories, load_column_cache
+
+logger = logging.getLogger(__name__)
+
+TRAIN, TEST = 'train', 'test'
+
+
+class ColumnCacheIter(xgb.DataIter):
+    """
+    Feeds the rows of a column cache directory to XGBoost in chunks.
+
+    Each chunk is assembled into a float32 matrix from the memory-mapped
+    feature columns, with missing and infinite values set to 0 as in
+    FootDashModelTrainer.prepare_feature_columns. Labels are the index of the
+    outcome in classes.
+    """
+
+    def __init__(self, cache_path: str, feature_names: Sequence[str], classes: Sequence[str],
+                 subset: Optional[str] = None, test_size: float = 0.2, seed: int = 42,
+                 chunk_rows: int = DEFAULT_CHUNK_ROWS, cache_prefix: Optional[str] = None):
+        """
+        Args:
+            cache_path: Column cache directory
+            feature_names: Feature columns, in model order
+            classes: Outcome labels, in label order
+            subset: TRAIN or TEST rows of the split, or None for every row
+            test_size: Fraction of rows drawn into the test subset
+            seed: Seed of the split
+            chunk_rows: Rows per chunk; the train and test iterators of one
+                split must use the same value
+            cache_prefix: Where XGBoost writes its external-memory pages
+        """
+        # First, so a DataIter whose arguments are rejected below is still complete
+        super().__init__(cache_prefix=cache_prefix)
+        if cache_path.endswith('.npz'):
+            raise ValueError("Out-of-core training needs a column cache directory, not a .npz file")
+        columns, _ = load_column_cache(cache_path, list(feature_names) + ['outcome'], decode=False)
+        self.features = [columns[name] for name in feature_names]
+        self.outcome = columns['outcome']
+
+        categories = cache_categories(cache_path).get('outcome')
+        if categories is None:
+            raise ValueError("The cache's outcome column is not a string column")
+        unknown = sorted(set(categories) - set(classes))
+        if unknown:
+            raise ValueError(f"Outcomes not among the model's classes: {unknown}")
+        # Cache code -> label index
+        self.label_of_code = np.array([list(classes).index(label) for label in categories],
+                                      dtype=np.float32)
+
+        self.subset = subset
+        self.test_size = test_size
+        self.seed = seed
+        self.chunk_rows = chunk_rows
+        self._chunks: Optional[Iterator[Tuple[np.ndarray, np.ndarray]]] = None
+
+    @property
+    def n_rows(self) -> int:
+        return len(self.outcome)
+
+    def _split_mask(self, chunk: int, rows: int) -> Optional[np.ndarray]:
+        """Rows of the chunk that belong to the subset; None keeps them all."""
+        if self.subset is None:
+            return None
+        test = np.random.default_rng((self.seed, chunk)).random(rows) < self.test_size
+        return test if self.subset == TEST else ~test
+
+    def chunks(self) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """(X, y) for every chunk of the subset, in row order."""
+        for chunk, start in enumerate(range(0, self.n_rows, self.chunk_rows)):
+            stop = min(start + self.chunk_rows, self.n_rows)
+            mask = self._split_mask(chunk, stop - start)
+            X = np.empty((stop - start, len(self.features)), dtype=np.float32)
+            for position, values in enumerate(self.features):
+                X[:, position] = values[start:stop]
+            np.nan_to_num(X, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+            y = self.label_of_code[self.outcome[start:stop]]
+            if mask is not None:
+                X, y = X[mask], y[mask]
+            if len(y):
+                yield X, y
+
+    def reset(self) -> None:
+        self._chunks = None
+
+    def next(self, input_data) -> bool:
+        if self._chunks is None:
+            self._chunks = self.chunks()
+        batch = next(self._chunks, None)
+        if batch is None:
+            return False
+        input_data(data=batch[0], label=batch[1])
+        return True
+
+
+def external_memory_matrix(data: ColumnCacheIter, max_bin: int = 256):
+    """
+    Build XGBoost's training matrix from the iterator, held in external memory.
+
+    XGBoost 3.0+ quantizes the chunks into an ExtMemQuantileDMatrix; older
+    releases page a DMatrix to disk instead.
+    """
+    if hasattr(xgb, 'ExtMemQuantileDMatrix'):
+        return xgb.ExtMemQuantileDMatrix(data, max_bin=max_bin)
+    return xgb.DMatrix(data)
+
+
+def evaluate_chunks(booster: xgb.Booster, data: ColumnCacheIter, n_classes: int) -> Dict:
+    """
+    Score a booster chunk by chunk.
+
+    Returns:
+        Dict with samples, accuracy, log_loss and the confusion matrix
+        (rows: true class, columns: predicted class)
+    """
+    confusion = np.zeros((n_classes, n_classes), dtype=np.int64)
+    loss_sum = 0.0
+    for X, y in data.chunks():
+        proba = np.asarray(booster.inplace_predict(X), dtype=np.float64).reshape(len(y), n_classes)
+        proba /= proba.sum(axis=1, keepdims=True)
+        labels = y.astype(np.intp)
+        np.add.at(confusion, (labels, proba.argmax(axis=1)), 1)
+        loss_sum += clipped_log_losses(proba, labels).sum()
+
+    samples = int(confusion.sum())
+    return {
+        'samples': samples,
+        'accuracy': float(np.trace(confusion) / samples) if samples else None,
+        'log_loss': float(loss_sum / samples) if samples else None,
+        'confusion_matrix': confusion.tolist()
+    }
+
+
+def train_out_of_core(params: Dict, cache_path: str, feature_names: Sequence[str],
+                      classes: Sequence[str], test_size: float = 0.2,
+                      chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                      work_dir: Optional[str] = None) -> Tuple[xgb.Booster, Dict]:
+    """
+    Train on the train subset of a column cache and score both subsets.
+
+    Args:
+        params: XGBClassifier parameters; n_estimators sets the boosting rounds
+        cache_path: Column cache directory
+        feature_names: Feature columns, in model order
+        classes: Outcome labels, in label order
+        test_size: Fraction of rows held out for evaluation
+        chunk_rows: Rows handed to XGBoost at a time
+        work_dir: Directory for XGBoost's page cache (default: a temporary directory)
+
+    Returns:
+        (booster, results) where results holds the train and test evaluations
+    """
+    native_params = xgb.XGBClassifier(**params).get_xgb_params()
+    native_params['num_class'] = len(classes)
+    # External memory is only supported by the histogram method
+    native_params['tree_method'] = 'hist'
+    rounds = params.get('n_estimators') or 100
+
+    with tempfile.TemporaryDirectory(dir=work_dir, prefix='xgb-pages-') as pages:
+        def subset_iter(subset: str) -> ColumnCacheIter:
+            return ColumnCacheIter(cache_path, feature_names, classes, subset, test_size,
+                                   chunk_rows=chunk_rows, cache_prefix=os.path.join(pages, subset))
+
+        train = subset_iter(TRAIN)
+        logger.info(f"Training out of core on {train.n_rows} cached rows "
+                    f"in chunks of {chunk_rows} (test size {test_size})")
+        dtrain = external_memory_matrix(train, max_bin=native_params.get('max_bin') or 256)
+        booster = xgb.train(native_params, dtrain, num_boost_round=rounds)
+        del dtrain
+
+        results = {
+            TRAIN: evaluate_chunks(booster, train, len(classes)),
+            TEST: evaluate_chunks(booster, subset_iter(TEST), len(classes))
+        }
+    return booster, results
+
+
+def cache_data_end(cache_path: str) -> Optional[str]:
+    """Latest match_date in a column cache, or None when it has none."""
+    # Categories are the sorted distinct values, and ISO dates sort chronologically
+    categories: Optional[List[str]] = cache_categories(cache_path).get('match_date')
+    return categories[-1] if categories else None
@@ -0,0 +1,205 @@
+"""
+Point-in-time match features computed from raw results.
+
+Instead of relying on the export's precomputed statistics (one set of
+database queries per match), the rolling features are derived here from
+the results themselves, as column arrays:
+
+    home_team_id, away_team_id, match_date, home_score, away_score
+    (plus league_id, season, match_id and outcome when present)
+
+Each match only sees matches that kicked off before it. The statistics
+follow the backend export (data-export.service.ts) so models trained either
+way agree: form over a team's last 5 matches, win rate and goal averages
+over its last 20, and head-to-head counts over the last 5 meetings.
+Engineered features, league strength and season stage are computed as the
+prediction service's FeatureEngineer does, so the output columns are
+exactly FeatureEngineer.feature_names.
+
+Each team's matches are one contiguous block once the rows are sorted by
+team and kick-off, so every rolling window is a difference of two cumulative
+sums and no per-team or per-match loop runs in Python.
+"""
+
+import logging
+import sys
+from pathlib import Path
+from typing import Dict, Tuple
+
+import numpy as np
+
+# Feature definitions are shared with the prediction service's FeatureEngineer
+_SERVICE_APP = str(Path(__file__).resolve().parent.parent / 'prediction-model' / 'app')
+if _SERVICE_APP not in sys.path:
+    sys.path.append(_SERVICE_APP)
+from models.feature_engineer import (
+    DEFAULT_LEAGUE_STRENGTH, FORM_WEIGHTS, LEAGUE_STRENGTHS, FeatureEngineer, season_stage_for_month
+)
+
+logger = logging.getLogger(__name__)
+
+# Window lengths used by the backend export
+FORM_MATCHES = 5      # FormCalculatorService.calculateForm(..., 5)
+HISTORY_MATCHES = 20  # getHistoricalMatches(..., 20)
+H2H_MATCHES = 5       # analyzeHeadToHead counts the latest 5 meetings
+
+RESULT_COLUMNS = ['home_team_id', 'away_team_id', 'match_date', 'home_score', 'away_score']
+# Columns carried over from the results for identification, ordering and grouping
+PASSTHROUGH_COLUMNS = ['match_id', 'home_team_id', 'away_team_id', 'league_id', 'season', 'match_date']
+
+# FeatureEngineer's season stage of every calendar month (index 1-12)
+_SEASON_STAGE_BY_MONTH = np.array([0.5] + [season_stage_for_month(month) for month in range(1, 13)])
+
+
+def _group_starts(*keys: np.ndarray) -> np.ndarray:
+    """For rows sorted by keys, the position of the first row of each row's group."""
+    positions = np.arange(len(keys[0]))
+    is_start = np.zeros(len(positions), dtype=bool)
+    is_start[:1] = True
+    for key in keys:
+        is_start[1:] |= key[1:] != key[:-1]
+    return np.maximum.accumulate(np.where(is_start, positions, 0))
+
+
+def _trailing(values: np.ndarray, group_start: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sum and count of the up to `window` rows before each row in its group.
+
+    The row itself is excluded, which is what makes the result point-in-time.
+    """
+    positions = np.arange(len(values))
+    cumulative = np.zeros(len(values) + 1)
+    np.cumsum(values, out=cumulative[1:])
+    first = np.maximum(group_start, positions - window)
+    return cumulative[positions] - cumulative[first], positions - first
+
+
+def build_features(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Compute point-in-time features for every finished match.
+
+    Args:
+        columns: Raw result columns (see RESULT_COLUMNS)
+
+    Returns:
+        Columns in chronological order: PASSTHROUGH_COLUMNS present in the
+        input, outcome, then FeatureEngineer.feature_names
+
+    Raises:
+        ValueError: If a result column is missing
+    """
+    missing = [col for col in RESULT_COLUMNS if col not in columns]
+    if missing:
+        raise ValueError(f"Results data lacks columns: {missing}")
+
+    home_score = np.asarray(columns['home_score'], dtype=np.float64)
+    away_score = np.asarray(columns['away_score'], dtype=np.float64)
+    finished = ~(np.isnan(home_score) | np.isnan(away_score))
+    if not finished.all():
+        logger.info(f"Skipping {int((~finished).sum())} matches without a final score")
+
+    # Chronological order; match m below is the m-th match to kick off
+    order = np.flatnonzero(finished)
+    order = order[np.argsort(np.asarray(columns['match_date'])[order], kind='stable')]
+    n = len(order)
+    home = np.asarray(columns['home_team_id'])[order]
+    away = np.asarray(columns['away_team_id'])[order]
+    home_score, away_score = home_score[order], away_score[order]
+    # +1 win, 0 draw, -1 loss, from the home side
+    home_result = np.sign(home_score - away_score)
+
+    # ── Team form and averages ──────────────────────────────────────────────
+    # One row per team per match, sorted by team and then kick-off
+    team = np.concatenate([home, away])
+    result = np.concatenate([home_result, -home_result])
+    goals_for = np.concatenate([home_score, away_score])
+    goals_against = np.concatenate([away_score, home_score])
+    by_team = np.lexsort((np.tile(np.arange(n), 2), team))
+    group_start = _group_starts(team[by_team])
+    result = result[by_team]
+
+    points, form_count = _trailing(np.select([result > 0, result == 0], [3.0, 1.0], 0.0),
+                                   group_start, FORM_MATCHES)
+    wins, history_count = _trailing((result > 0).astype(np.float64), group_start, HISTORY_MATCHES)
+    scored, _ = _trailing(goals_for[by_team], group_start, HISTORY_MATCHES)
+    conceded, _ = _trailing(goals_against[by_team], group_start, HISTORY_MATCHES)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Rounded to 2 decimals like Math.round(rating * 100) / 100
+        form_rating = np.floor(points / (3 * form_count) * 100 * 100 + 0.5) / 100
+        win_rate = wins / history_count * 100
+        goals_avg = scored / history_count
+        conceded_avg = conceded / history_count
+    # The export reports `rating || 50`, so a rating of 0 becomes 50 as well
+    form_rating = np.where((form_count == 0) | (form_rating == 0), 50.0, form_rating)
+    win_rate = np.where((history_count == 0) | (win_rate == 0), 50.0, win_rate)
+    goals_avg = np.where(history_count == 0, 1.0, goals_avg)
+    conceded_avg = np.where(history_count == 0, 1.0, conceded_avg)
+
+    # Momentum from the last results, most recent first, as
+    # FeatureEngineer._form_to_momentum weighs a recent_form list
+    positions = np.arange(len(result))
+    momentum = np.zeros(len(result))
+    for lag, weight in enumerate(FORM_WEIGHTS, start=1):
+        previous = positions - lag
+        momentum += np.where(previous >= group_start, result[np.maximum(previous, 0)] * weight, 0.0)
+
+    def per_match(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Scatter team rows back to (home side, away side) per match."""
+        unsorted = np.empty_like(values)
+        unsorted[by_team] = values
+        return unsorted[:n], unsorted[n:]
+
+    # ── Head to head ────────────────────────────────────────────────────────
+    # Meetings keyed by the unordered pair, results from the lower id's side
+    low, high = np.minimum(home, away), np.maximum(home, away)
+    low_result = np.where(home == low, home_result, -home_result)
+    by_pair = np.lexsort((np.arange(n), high, low))
+    pair_start = _group_starts(low[by_pair], high[by_pair])
+    pair_result = low_result[by_pair]
+    h2h = {}
+    for name, values in (('low_wins', pair_result > 0), ('high_wins', pair_result < 0),
+                         ('draws', pair_result == 0)):
+        counts, _ = _trailing(values.astype(np.float64), pair_start, H2H_MATCHES)
+        h2h[name] = np.empty(n)
+        h2h[name][by_pair] = counts
+    home_is_low = home == low
+
+    features: Dict[str, np.ndarray] = {}
+    features['home_form_rating'], features['away_form_rating'] = per_match(form_rating)
+    features['home_win_rate'], features['away_win_rate'] = per_match(win_rate)
+    features['home_goals_avg'], features['away_goals_avg'] = per_match(goals_avg)
+    features['home_goals_conceded_avg'], features['away_goals_conceded_avg'] = per_match(conceded_avg)
+    features['h2h_home_wins'] = np.where(home_is_low, h2h['low_wins'], h2h['high_wins'])
+    features['h2h_away_wins'] = np.where(home_is_low, h2h['high_wins'], h2h['low_wins'])
+    features['h2h_draws'] = h2h['draws']
+
+    # Engineered features, as FeatureEngineer.engineer_features_batch
+    features['form_difference'] = features['home_form_rating'] - features['away_form_rating']
+    features['goal_difference'] = features['home_goals_avg'] - features['away_goals_avg']
+    features['defensive_strength_difference'] = (
+        features['away_goals_conceded_avg'] - features['home_goals_conceded_avg']
+    )
+    total_h2h = features['h2h_home_wins'] + features['h2h_away_wins'] + features['h2h_draws']
+    features['h2h_advantage'] = np.divide(
+        features['h2h_home_wins'] - features['h2h_away_wins'], total_h2h,
+        out=np.zeros(n), where=total_h2h > 0
+    )
+    home_momentum, away_momentum = per_match(momentum)
+    features['momentum_score'] = home_momentum - away_momentum
+
+    if 'league_id' in columns:
+        leagues, inverse = np.unique(np.asarray(columns['league_id'])[order], return_inverse=True)
+        strengths = np.array([LEAGUE_STRENGTHS.get(int(league), DEFAULT_LEAGUE_STRENGTH) for league in leagues])
+        features['league_strength'] = strengths[inverse]
+    else:
+        features['league_strength'] = np.full(n, DEFAULT_LEAGUE_STRENGTH)
+    # Stage of the season the match was played in
+    months = np.asarray(columns['match_date'])[order].astype('U7').astype('datetime64[M]')
+    features['season_stage'] = _SEASON_STAGE_BY_MONTH[months.astype(np.int64) % 12 + 1]
+
+    output = {col: np.asarray(columns[col])[order] for col in PASSTHROUGH_COLUMNS if col in columns}
+    output['outcome'] = np.select([home_result > 0, home_result < 0], ['HOME_WIN', 'AWAY_WIN'], 'DRAW')
+    for name in FeatureEngineer().feature_names:
+        output[name] = features[name]
+    return output
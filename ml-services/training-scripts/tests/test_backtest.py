@@ -0,0 +1,149 @@
+"""Unit tests for walk-forward backtesting."""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import backtest
+from backtest import format_table, score_groups, walk_forward
+
+PARAMS = {'objective': 'multi:softprob', 'n_estimators': 5, 'max_depth': 2, 'n_jobs': -1}
+N_MONTHS = 8
+
+
+@pytest.fixture
+def data():
+    """Shuffled matches over eight months, in two leagues and two seasons."""
+    rng = np.random.default_rng(0)
+    n = 800
+    days = np.datetime64('2024-01-01') + rng.integers(0, 31 * N_MONTHS - 10, size=n)
+    match_date = np.datetime_as_string(days, unit='D')
+    X = rng.normal(size=(n, 3)).astype(np.float32)
+    y = np.digitize(X[:, 0] + rng.normal(scale=0.7, size=n), [-0.4, 0.4])
+    groups = {
+        'league': rng.choice([39.0, 140.0], size=n),
+        'season': np.where(match_date < '2024-05', '2023', '2024'),
+    }
+    return X, y, match_date, groups
+
+
+@pytest.fixture
+def fits(monkeypatch):
+    """Record the (train, test) row ranges of every window fitted."""
+    recorded = []
+    fit_window = backtest._fit_window
+
+    def recording(params, rounds, train, test, n_threads):
+        recorded.append((train, test))
+        return fit_window(params, rounds, train, test, n_threads)
+
+    monkeypatch.setattr(backtest, "_fit_window", recording)
+    return recorded
+
+
+def weighted(rows, metric):
+    return sum(row[metric] * row['matches'] for row in rows) / sum(row['matches'] for row in rows)
+
+
+class TestWalkForward:
+
+    @pytest.mark.parametrize("window", [None, 2])
+    def test_windows_train_only_on_earlier_periods(self, data, fits, window):
+        X, y, match_date, _ = data
+        results = walk_forward(PARAMS, X, y, match_date, window=window, min_train_periods=3, workers=1)
+
+        months = np.sort(match_date).astype('U7')
+        assert len(results['windows']) == len(fits) == N_MONTHS - 3
+        for entry, (train, test) in zip(results['windows'], fits):
+            test_months = np.unique(months[test[0]:test[1]]).tolist()
+            train_months = np.unique(months[train[0]:train[1]]).tolist()
+            assert test_months == [entry['test_period']]
+            assert train_months[-1] < entry['test_period']
+            assert [train_months[0], train_months[-1]] == entry['train_periods']
+            assert entry['train_rows'] == train[1] - train[0]
+            if window is not None:
+                assert len(train_months) == window
+
+    def test_tables_add_up_to_overall(self, data):
+        X, y, match_date, groups = data
+        results = walk_forward(PARAMS, X, y, match_date, groups=groups, workers=1)
+        overall = results['overall']
+
+        for table in (results['windows'], results['by_league'], results['by_season']):
+            rows = [{**row, 'matches': row.get('matches', row.get('test_rows'))} for row in table]
+            assert sum(row['matches'] for row in rows) == overall['matches']
+            assert weighted(rows, 'accuracy') == pytest.approx(overall['accuracy'])
+            assert weighted(rows, 'log_loss') == pytest.approx(overall['log_loss'])
+
+        assert [row['key'] for row in results['by_league']] == [39, 140]
+        assert [row['key'] for row in results['by_season']] == ['2023', '2024']
+        assert 'league' in format_table(results['by_league'], 'league')
+
+    def test_rerun_is_served_from_the_cache(self, data, fits, tmp_path):
+        X, y, match_date, groups = data
+        first = walk_forward(PARAMS, X, y, match_date, groups=groups, workers=1, cache_dir=str(tmp_path))
+        fitted = len(fits)
+        second = walk_forward(PARAMS, X, y, match_date, groups=groups, workers=1, cache_dir=str(tmp_path))
+
+        assert fitted == first['timings']['fitted'] == len(first['windows'])
+        assert len(fits) == fitted  # nothing refitted
+        assert second['timings']['cached'] == len(second['windows'])
+        for key in ('windows', 'overall', 'by_league', 'by_season'):
+            assert second[key] == first[key]
+
+    @pytest.mark.parametrize("window, refitted", [
+        (None, ['2024-05', '2024-06', '2024-07', '2024-08']),
+        # Only the windows whose two training months or test month include May
+        (2, ['2024-05', '2024-06', '2024-07']),
+    ])
+    def test_changed_period_invalidates_later_windows(self, data, fits, tmp_path, window, refitted):
+        X, y, match_date, _ = data
+        walk_forward(PARAMS, X, y, match_date, window=window, workers=1, cache_dir=str(tmp_path))
+        fits.clear()
+
+        # Change one match of the fifth month (index 4)
+        X = X.copy()
+        X[np.flatnonzero(np.char.startswith(match_date, '2024-05'))[0], 0] += 1
+        results = walk_forward(PARAMS, X, y, match_date, window=window, workers=1, cache_dir=str(tmp_path))
+
+        months = np.sort(match_date).astype('U7')
+        assert [str(months[test[0]]) for _, test in fits] == refitted
+        assert results['timings']['fitted'] == len(refitted)
+        assert results['timings']['cached'] == len(results['windows']) - len(refitted)
+
+    def test_pooled_windows_match_inline(self, data, monkeypatch):
+        import cross_validation
+        X, y, match_date, _ = data
+        inline = walk_forward(PARAMS, X, y, match_date, period='day', min_train_periods=200, workers=1)
+        monkeypatch.setattr(cross_validation.os, "cpu_count", lambda: 4)
+        pooled = walk_forward(PARAMS, X, y, match_date, period='day', min_train_periods=200, workers=2)
+
+        assert pooled['timings']['workers'] == 2
+        days = sorted(set(match_date.tolist()))
+        assert [entry['test_period'] for entry in pooled['windows']] == days[200:]
+        for pooled_entry, inline_entry in zip(pooled['windows'], inline['windows']):
+            assert pooled_entry == pytest.approx(inline_entry)
+        assert pooled['overall'] == pytest.approx(inline['overall'])
+
+    def test_too_few_periods(self, data):
+        X, y, match_date, _ = data
+        with pytest.raises(ValueError):
+            walk_forward(PARAMS, X, y, match_date, min_train_periods=N_MONTHS, workers=1)
+        with pytest.raises(ValueError):
+            walk_forward(PARAMS, X, y, match_date, period='week', workers=1)
+
+
+class TestScoreGroups:
+
+    def test_accuracy_and_log_loss_per_group(self):
+        y = np.array([0, 1, 2, 0])
+        proba = np.array([[0.8, 0.1, 0.1], [0.2, 0.7, 0.1], [0.5, 0.3, 0.2], [0.1, 0.1, 0.8]])
+        rows = score_groups(np.array([2.0, 2.0, 1.0, 1.0]), y, proba)
+
+        assert [row['key'] for row in rows] == [1, 2]
+        assert rows[1]['accuracy'] == 1.0
+        assert rows[0]['accuracy'] == 0.0
+        assert rows[0]['log_loss'] == pytest.approx(-(np.log(0.2) + np.log(0.1)) / 2)
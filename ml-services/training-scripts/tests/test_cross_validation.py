@@ -0,0 +1,105 @@
+"""Unit tests for parallel training and cross-validation."""
+import os
+import sys
+
+import numpy as np
+import pytest
+import xgboost as xgb
+from sklearn.metrics import accuracy_score, log_loss
+from sklearn.model_selection import cross_val_predict, cross_val_score
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import cross_validation
+from cross_validation import budgeted_params, clipped_log_losses, fit_with_cross_validation, thread_budget
+
+PARAMS = {
+    'objective': 'multi:softprob', 'n_estimators': 10, 'max_depth': 3,
+    'learning_rate': 0.3, 'random_state': 42, 'tree_method': 'hist',
+    # Conflicting thread settings, both of which the budget must replace
+    'n_jobs': -1, 'nthread': 8
+}
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(300, 4)).astype(np.float32)
+    y = np.digitize(X[:, 0] + 0.5 * X[:, 1] + rng.normal(scale=0.5, size=300), [-0.5, 0.5])
+    return X, y
+
+
+@pytest.fixture
+def four_cores(monkeypatch):
+    """Pretend the host has four cores, so two workers get two threads each."""
+    monkeypatch.setattr(cross_validation.os, "cpu_count", lambda: 4)
+
+
+class TestThreadBudget:
+
+    @pytest.mark.parametrize("n_fits, workers, cpus, expected", [
+        (6, None, 8, (6, 1)),
+        (6, 2, 8, (2, 4)),
+        (2, None, 8, (2, 4)),
+        (6, 4, 1, (1, 1)),
+        (1, None, 16, (1, 16)),
+    ])
+    def test_split(self, n_fits, workers, cpus, expected):
+        assert thread_budget(n_fits, workers, cpus) == expected
+
+    def test_budget_replaces_both_thread_settings(self):
+        assert budgeted_params(PARAMS, 3)['n_jobs'] == 3
+        assert 'nthread' not in budgeted_params(PARAMS, 3)
+        native = budgeted_params(PARAMS, 3, native=True)
+        assert native['nthread'] == 3
+        assert 'n_jobs' not in native
+        assert PARAMS['n_jobs'] == -1 and PARAMS['nthread'] == 8
+
+
+class TestCrossValidation:
+    """Pooled fits score exactly as sklearn's sequential cross-validation."""
+
+    @pytest.mark.parametrize("n_workers", [1, 2])
+    def test_matches_sklearn(self, dataset, four_cores, n_workers):
+        X, y = dataset
+        model, results = fit_with_cross_validation(PARAMS, X, y, cv=3, workers=n_workers)
+
+        # Same thread count as the pooled fits, so the trees are identical
+        budget = results['timings']['threads_per_fit']
+        reference = xgb.XGBClassifier(**budgeted_params(PARAMS, budget))
+        expected_scores = cross_val_score(reference, X, y, cv=3)
+        np.testing.assert_allclose(results['cv_scores'], expected_scores)
+
+        oof = cross_val_predict(reference, X, y, cv=3, method='predict_proba').astype(np.float64)
+        oof /= oof.sum(axis=1, keepdims=True)
+        assert results['oof_accuracy'] == pytest.approx(accuracy_score(y, oof.argmax(axis=1)))
+        assert results['oof_log_loss'] == pytest.approx(log_loss(y, oof), rel=1e-9)
+
+        assert results['timings']['workers'] == n_workers
+        assert budget == 4 // n_workers
+        assert model.get_params()['n_jobs'] == budget
+        assert 'nthread' not in model.get_xgb_params()
+
+    def test_every_fit_gets_the_budget(self, dataset, four_cores, monkeypatch):
+        X, y = dataset
+        thread_settings = []
+
+        class RecordingClassifier(xgb.XGBClassifier):
+            def fit(self, *args, **kwargs):
+                params = self.get_xgb_params()
+                thread_settings.append((params.get('n_jobs'), params.get('nthread')))
+                return super().fit(*args, **kwargs)
+
+        monkeypatch.setattr(cross_validation.xgb, "XGBClassifier", RecordingClassifier)
+        fit_with_cross_validation(PARAMS, X, y, cv=3, workers=1)
+        # The final model and three folds
+        assert thread_settings == [(4, None)] * 4
+
+
+class TestClippedLogLosses:
+
+    def test_matches_sklearn_and_clips_zero(self):
+        y = np.array([0, 2, 1])
+        proba = np.array([[0.7, 0.2, 0.1], [0.1, 0.1, 0.8], [0.5, 0.5, 0.0]])
+        assert clipped_log_losses(proba, y).mean() == pytest.approx(log_loss(y, proba))
+        assert np.isfinite(clipped_log_losses(np.array([[1.0, 0.0]]), np.array([1]))).all()
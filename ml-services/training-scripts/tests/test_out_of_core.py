@@ -0,0 +1,115 @@
+"""Unit tests for out-of-core training from a column cache."""
+import os
+import sys
+
+import numpy as np
+import pytest
+import xgboost as xgb
+from sklearn.metrics import accuracy_score, confusion_matrix, log_loss
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from out_of_core import TEST, TRAIN, ColumnCacheIter, cache_data_end, evaluate_chunks, train_out_of_core
+from training_data import load_column_cache, save_column_cache
+
+FEATURES = ['home_form_rating', 'away_form_rating']
+CLASSES = ['AWAY_WIN', 'DRAW', 'HOME_WIN']
+
+
+@pytest.fixture(scope="module")
+def cache_path(tmp_path_factory):
+    rng = np.random.default_rng(0)
+    n = 2500
+    strength = rng.normal(size=n)
+    home = strength + rng.normal(scale=0.5, size=n)
+    home[::97] = np.nan  # missing values are filled with 0
+    columns = {
+        'home_form_rating': home,
+        'away_form_rating': rng.normal(size=n),
+        'match_date': np.datetime_as_string(np.datetime64('2024-01-01') + rng.integers(0, 200, size=n)),
+        'outcome': np.select([strength > 0.4, strength < -0.4], ['HOME_WIN', 'AWAY_WIN'], 'DRAW'),
+    }
+    return save_column_cache(columns, str(tmp_path_factory.mktemp("cache") / "training_data"))
+
+
+@pytest.fixture(scope="module")
+def trained(cache_path, tmp_path_factory):
+    params = {'objective': 'multi:softprob', 'n_estimators': 10, 'max_depth': 3, 'n_jobs': 1}
+    return train_out_of_core(params, cache_path, FEATURES, CLASSES, chunk_rows=600,
+                             work_dir=str(tmp_path_factory.mktemp("pages")))
+
+
+def collect(data: ColumnCacheIter):
+    chunks = list(data.chunks())
+    return np.vstack([X for X, _ in chunks]), np.concatenate([y for _, y in chunks])
+
+
+class TestColumnCacheIter:
+
+    @pytest.mark.parametrize("chunk_rows", [300, 1000, 5000])
+    def test_train_and_test_masks_are_complementary(self, cache_path, chunk_rows):
+        every = ColumnCacheIter(cache_path, FEATURES, CLASSES, chunk_rows=chunk_rows)
+        train = ColumnCacheIter(cache_path, FEATURES, CLASSES, TRAIN, chunk_rows=chunk_rows)
+        test = ColumnCacheIter(cache_path, FEATURES, CLASSES, TEST, chunk_rows=chunk_rows)
+
+        masks = []
+        for chunk, start in enumerate(range(0, every.n_rows, chunk_rows)):
+            rows = min(chunk_rows, every.n_rows - start)
+            train_mask, test_mask = train._split_mask(chunk, rows), test._split_mask(chunk, rows)
+            np.testing.assert_array_equal(train_mask, ~test_mask)
+            masks.append(test_mask)
+        test_rows = np.concatenate(masks)
+        assert 0.15 < test_rows.mean() < 0.25
+
+        X_all, y_all = collect(every)
+        X_train, y_train = collect(train)
+        X_test, y_test = collect(test)
+        np.testing.assert_array_equal(X_train, X_all[~test_rows])
+        np.testing.assert_array_equal(X_test, X_all[test_rows])
+        np.testing.assert_array_equal(y_test, y_all[test_rows])
+        assert len(y_train) + len(y_test) == every.n_rows
+
+    def test_split_is_deterministic(self, cache_path):
+        first = collect(ColumnCacheIter(cache_path, FEATURES, CLASSES, TEST, chunk_rows=700))
+        second = collect(ColumnCacheIter(cache_path, FEATURES, CLASSES, TEST, chunk_rows=700))
+        np.testing.assert_array_equal(first[0], second[0])
+        other_seed = collect(ColumnCacheIter(cache_path, FEATURES, CLASSES, TEST, seed=7, chunk_rows=700))
+        assert len(other_seed[1]) != len(first[1]) or not np.array_equal(other_seed[0], first[0])
+
+    def test_chunks_hold_clean_features_and_labels(self, cache_path):
+        X, y = collect(ColumnCacheIter(cache_path, FEATURES, CLASSES, chunk_rows=1000))
+        assert X.dtype == np.float32
+        assert np.isfinite(X).all()
+        assert X[0, 0] == 0.0  # NaN in the cache
+        assert set(np.unique(y)) == {0.0, 1.0, 2.0}
+
+    def test_unknown_outcomes_are_rejected(self, cache_path):
+        with pytest.raises(ValueError, match="HOME_WIN"):
+            ColumnCacheIter(cache_path, FEATURES, ['AWAY_WIN', 'DRAW'])
+
+
+class TestOutOfCoreTraining:
+
+    @pytest.mark.parametrize("subset, chunk_rows", [(TEST, 600), (None, 64)])
+    def test_chunked_evaluation_matches_in_memory(self, cache_path, trained, subset, chunk_rows):
+        booster, _ = trained
+        data = ColumnCacheIter(cache_path, FEATURES, CLASSES, subset, chunk_rows=chunk_rows)
+        X, y = collect(data)
+        proba = booster.predict(xgb.DMatrix(X)).astype(np.float64)
+        proba /= proba.sum(axis=1, keepdims=True)
+
+        evaluation = evaluate_chunks(booster, data, len(CLASSES))
+        assert evaluation['samples'] == len(y)
+        assert evaluation['accuracy'] == pytest.approx(accuracy_score(y, proba.argmax(axis=1)))
+        assert evaluation['log_loss'] == pytest.approx(log_loss(y, proba, labels=[0, 1, 2]), rel=1e-9)
+        np.testing.assert_array_equal(evaluation['confusion_matrix'],
+                                      confusion_matrix(y, proba.argmax(axis=1), labels=[0, 1, 2]))
+
+    def test_results_cover_both_subsets(self, trained):
+        _, results = trained
+        assert results[TEST]['samples'] + results[TRAIN]['samples'] == 2500
+        assert results[TEST]['accuracy'] > 0.5
+
+    def test_cache_data_end(self, cache_path):
+        dates = load_column_cache(cache_path, ['match_date'])[0]['match_date']
+        assert cache_data_end(cache_path) == max(np.unique(dates))
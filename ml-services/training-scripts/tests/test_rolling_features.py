@@ -0,0 +1,175 @@
+"""Unit tests for point-in-time features computed from raw results."""
+import math
+import os
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# Imported first: rolling_features puts the prediction service's app on sys.path
+from rolling_features import FORM_MATCHES, H2H_MATCHES, HISTORY_MATCHES, PASSTHROUGH_COLUMNS, build_features
+from models.feature_engineer import FeatureEngineer, season_stage_for_month
+
+
+def make_results(n: int = 600, teams: int = 10, seed: int = 0):
+    """Shuffled results over a season, with kick-off times and a few unplayed matches."""
+    rng = np.random.default_rng(seed)
+    home = rng.integers(0, teams, size=n)
+    away = (home + rng.integers(1, teams, size=n)) % teams
+    minutes = rng.integers(0, 300 * 24 * 60, size=n)
+    # Few distinct kick-off slots, so many matches share a day and some a time
+    minutes -= minutes % (6 * 60)
+    kickoff = np.datetime64('2023-08-01T00:00') + minutes.astype('timedelta64[m]')
+    home_score = rng.poisson(1.5, size=n).astype(np.float64)
+    away_score = rng.poisson(1.1, size=n).astype(np.float64)
+    home_score[rng.random(n) < 0.03] = np.nan
+    return {
+        'match_id': np.arange(n, dtype=np.float64),
+        'home_team_id': (home + 100).astype(np.float64),
+        'away_team_id': (away + 100).astype(np.float64),
+        'league_id': rng.choice([39.0, 140.0, 999.0], size=n),
+        'season': np.full(n, '2023'),
+        'match_date': np.datetime_as_string(kickoff, unit='m'),
+        'home_score': home_score,
+        'away_score': away_score,
+    }
+
+
+def js_round(value: float) -> float:
+    """Math.round(value * 100) / 100."""
+    return math.floor(value * 100 + 0.5) / 100
+
+
+def reference_features(results):
+    """
+    Per-match transcription of the backend export plus FeatureEngineer.
+
+    Every match is given the statistics of the matches that kicked off
+    before it (ties on match_date keep their input order), one by one.
+    """
+    finished = [i for i in range(len(results['match_id']))
+                if not (np.isnan(results['home_score'][i]) or np.isnan(results['away_score'][i]))]
+    order = sorted(finished, key=lambda i: results['match_date'][i])  # stable
+
+    engineer = FeatureEngineer()
+    rows = []
+    for position, i in enumerate(order):
+        earlier = order[:position]
+        home, away = results['home_team_id'][i], results['away_team_id'][i]
+
+        def team_results(team):
+            """(result, goals for, goals against) of team's earlier matches, most recent first."""
+            played = []
+            for j in reversed(earlier):
+                hs, as_ = results['home_score'][j], results['away_score'][j]
+                if results['home_team_id'][j] == team:
+                    played.append((np.sign(hs - as_), hs, as_))
+                elif results['away_team_id'][j] == team:
+                    played.append((np.sign(as_ - hs), as_, hs))
+            return played
+
+        def team_stats(team):
+            played = team_results(team)
+            form = played[:FORM_MATCHES]
+            history = played[:HISTORY_MATCHES]
+            points = sum(3 if r > 0 else 1 if r == 0 else 0 for r, _, _ in form)
+            rating = js_round(points / (3 * len(form)) * 100) if form else 0
+            win_rate = sum(1 for r, _, _ in history if r > 0) / len(history) * 100 if history else 0
+            return {
+                'form_rating': rating or 50,
+                'win_rate': win_rate or 50,
+                'goals_avg': sum(g for _, g, _ in history) / len(history) if history else 1.0,
+                'conceded_avg': sum(c for _, _, c in history) / len(history) if history else 1.0,
+                'recent_form': ['W' if r > 0 else 'D' if r == 0 else 'L' for r, _, _ in form],
+            }
+
+        meetings = [j for j in reversed(earlier)
+                    if {results['home_team_id'][j], results['away_team_id'][j]} == {home, away}][:H2H_MATCHES]
+        h2h = {'home': 0, 'away': 0, 'draws': 0}
+        for j in meetings:
+            diff = results['home_score'][j] - results['away_score'][j]
+            winner = (results['home_team_id'][j] if diff > 0
+                      else results['away_team_id'][j] if diff < 0 else None)
+            h2h['home' if winner == home else 'away' if winner == away else 'draws'] += 1
+
+        home_stats, away_stats = team_stats(home), team_stats(away)
+        request = SimpleNamespace(
+            home_form_rating=home_stats['form_rating'], away_form_rating=away_stats['form_rating'],
+            home_win_rate=home_stats['win_rate'], away_win_rate=away_stats['win_rate'],
+            home_goals_avg=home_stats['goals_avg'], away_goals_avg=away_stats['goals_avg'],
+            home_goals_conceded_avg=home_stats['conceded_avg'],
+            away_goals_conceded_avg=away_stats['conceded_avg'],
+            h2h_home_wins=h2h['home'], h2h_away_wins=h2h['away'], h2h_draws=h2h['draws'],
+            home_recent_form=home_stats['recent_form'], away_recent_form=away_stats['recent_form'],
+            league_id=int(results['league_id'][i]), season=results['season'][i],
+        )
+        features = dict(zip(engineer.feature_names, engineer.engineer_features(request)))
+        # The service stages the season by today's date; here it is the match's month
+        features['season_stage'] = season_stage_for_month(int(results['match_date'][i][5:7]))
+        features['match_id'] = results['match_id'][i]
+        rows.append(features)
+    return rows
+
+
+@pytest.fixture(scope="module")
+def results():
+    return make_results()
+
+
+@pytest.fixture(scope="module")
+def built(results):
+    return build_features(results)
+
+
+class TestBuildFeatures:
+
+    def test_matches_per_match_reference(self, results, built):
+        reference = reference_features(results)
+        assert built['match_id'].tolist() == [row['match_id'] for row in reference]
+        for name in FeatureEngineer().feature_names:
+            np.testing.assert_allclose(built[name], [row[name] for row in reference],
+                                       rtol=1e-12, atol=1e-12, err_msg=name)
+
+    def test_output_columns(self, built):
+        feature_names = FeatureEngineer().feature_names
+        assert list(built) == PASSTHROUGH_COLUMNS + ['outcome'] + feature_names
+        assert set(built['outcome']) == {'HOME_WIN', 'DRAW', 'AWAY_WIN'}
+
+    def test_later_results_do_not_leak(self, results, built):
+        # Rewrite every result from the middle of the season on
+        cutoff = np.sort(results['match_date'])[len(results['match_date']) // 2]
+        changed = {name: values.copy() for name, values in results.items()}
+        later = (changed['match_date'] >= cutoff) & ~np.isnan(changed['home_score'])
+        changed['home_score'][later] = changed['away_score'][later] + 3
+
+        rebuilt = build_features(changed)
+        np.testing.assert_array_equal(rebuilt['match_id'], built['match_id'])
+        before = built['match_date'] < cutoff
+        assert before.sum() > 200
+        for name in FeatureEngineer().feature_names:
+            np.testing.assert_array_equal(rebuilt[name][before], built[name][before], err_msg=name)
+
+    def test_same_day_matches_follow_kickoff_order(self):
+        # Team 1 plays twice on one day, listed evening first
+        results = {
+            'home_team_id': np.array([1.0, 1.0, 3.0]),
+            'away_team_id': np.array([2.0, 2.0, 1.0]),
+            'match_date': np.array(['2024-03-02T18:00', '2024-03-02T12:00', '2024-03-01T15:00']),
+            'home_score': np.array([0.0, 4.0, 0.0]),
+            'away_score': np.array([0.0, 1.0, 2.0]),
+        }
+        built = build_features(results)
+        assert built['match_date'].tolist() == ['2024-03-01T15:00', '2024-03-02T12:00', '2024-03-02T18:00']
+
+        # Noon: team 1 has only the win of the 1st behind it, no meeting with team 2
+        assert built['home_form_rating'][1] == 100.0
+        assert built['h2h_home_wins'][1] == 0
+        # Evening: the noon win counts, and is the only meeting so far
+        assert built['home_goals_avg'][2] == pytest.approx((2 + 4) / 2)
+        assert built['h2h_home_wins'][2] == 1
+        assert built['h2h_away_wins'][2] == 0
+        # No match sees itself
+        assert built['home_form_rating'][0] == built['away_form_rating'][0] == 50.0
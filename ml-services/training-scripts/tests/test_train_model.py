@@ -0,0 +1,153 @@
+"""Unit tests for incremental updates of a saved model."""
+import os
+import sys
+
+import joblib
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from train_model import FootDashModelTrainer, classifier_from_booster, next_version
+
+PARENT_END = '2024-04-30'
+PARAMS = {'n_estimators': 10, 'max_depth': 3, 'n_jobs': 1}
+
+
+def make_columns(n: int = 600, seed: int = 0, start: str = '2024-01-01'):
+    """Random matches over six months whose outcome follows the first feature."""
+    rng = np.random.default_rng(seed)
+    days = np.datetime64(start) + rng.integers(0, 182, size=n)
+    strength = rng.normal(size=n)
+    return {
+        'match_id': np.arange(n, dtype=np.float64),
+        'home_form_rating': strength + rng.normal(scale=0.5, size=n),
+        'away_form_rating': rng.normal(size=n),
+        'match_date': np.datetime_as_string(days, unit='D'),
+        'outcome': np.select([strength > 0.4, strength < -0.4], ['HOME_WIN', 'AWAY_WIN'], 'DRAW'),
+    }
+
+
+def subset(columns, keep):
+    return {name: values[keep] for name, values in columns.items()}
+
+
+@pytest.fixture(scope="module")
+def columns():
+    return make_columns()
+
+
+@pytest.fixture(scope="module")
+def parent_path(columns, tmp_path_factory):
+    """A fully trained model saved as 1.0.0, on matches up to PARENT_END."""
+    trainer = FootDashModelTrainer()
+    X, y = trainer.prepare_feature_columns(subset(columns, columns['match_date'] <= PARENT_END))
+    trainer.train_model(X, y, model_params=PARAMS, cv=2, cv_workers=1)
+    path = str(tmp_path_factory.mktemp("models") / "match_predictor.joblib")
+    trainer.save_model(path, "1.0.0")
+    return path
+
+
+def updated_trainer(parent_path, columns, mode='continue', rounds=None):
+    trainer = FootDashModelTrainer()
+    trainer.load_base_model(parent_path)
+    X, y = trainer.prepare_feature_columns(trainer.select_new_rows(columns), fit=False)
+    trainer.update_model(X, y, rounds=rounds, mode=mode)
+    return trainer
+
+
+class TestIncrementalUpdate:
+
+    def test_only_rows_after_parent_data_end_are_selected(self, parent_path, columns):
+        trainer = FootDashModelTrainer()
+        trainer.load_base_model(parent_path)
+        assert trainer.base_model['training_info']['data_end'] <= PARENT_END
+
+        selected = trainer.select_new_rows(columns)
+        assert np.all(selected['match_date'] > PARENT_END)
+        assert len(selected['outcome']) == int(np.sum(columns['match_date'] > PARENT_END))
+        # Columns stay aligned row for row
+        original = np.searchsorted(columns['match_id'], selected['match_id'])
+        np.testing.assert_array_equal(columns['match_date'][original], selected['match_date'])
+
+    def test_continue_adds_exactly_the_requested_rounds(self, parent_path, columns):
+        parent = joblib.load(parent_path)
+        parent_bytes = np.asarray(parent['booster']).tobytes()
+        parent_rounds = parent['training_info']['total_rounds']
+
+        trainer = FootDashModelTrainer()
+        trainer.load_base_model(parent_path)
+        parent_booster = trainer.model.get_booster()
+        X, y = trainer.prepare_feature_columns(trainer.select_new_rows(columns), fit=False)
+        parent_proba = trainer.model.predict_proba(X)
+        trainer.update_model(X, y, rounds=7, mode='continue')
+
+        booster = trainer.model.get_booster()
+        assert booster.num_boosted_rounds() == parent_rounds + 7
+        assert trainer.training_info['added_rounds'] == 7
+        assert trainer.training_info['total_rounds'] == parent_rounds + 7
+        # The parent's trees are the first ones of the updated model
+        first = booster[:parent_rounds]
+        np.testing.assert_allclose(first.inplace_predict(X), parent_proba, rtol=1e-6)
+
+        # The parent booster and its artifact are left as they were
+        assert parent_booster.num_boosted_rounds() == parent_rounds
+        assert bytes(parent_booster.save_raw(raw_format='ubj')) == parent_bytes
+        assert np.asarray(joblib.load(parent_path)['booster']).tobytes() == parent_bytes
+
+    def test_refresh_keeps_the_tree_count(self, parent_path, columns):
+        trainer = updated_trainer(parent_path, columns, mode='refresh')
+        parent_rounds = trainer.base_model['training_info']['total_rounds']
+        assert trainer.model.get_booster().num_boosted_rounds() == parent_rounds
+        assert trainer.training_info['added_rounds'] == 0
+
+    def test_lineage_is_written_to_the_artifact(self, parent_path, columns, tmp_path):
+        child = updated_trainer(parent_path, columns, rounds=3)
+        child_path = str(tmp_path / "child.joblib")
+        child.save_model(child_path, next_version("1.0.0"))
+
+        grandchild = updated_trainer(child_path, make_columns(seed=1, start='2024-07-01'), rounds=2)
+        grandchild_path = str(tmp_path / "grandchild.joblib")
+        grandchild.save_model(grandchild_path, next_version("1.0.1"))
+
+        parent_info = joblib.load(parent_path)['training_info']
+        child_info = joblib.load(child_path)['training_info']
+        artifact = joblib.load(grandchild_path)
+        info = artifact['training_info']
+
+        assert artifact['version'] == '1.0.2'
+        assert artifact['accuracy'] is None
+        assert info['training_mode'] == 'continue'
+        assert info['parent_version'] == '1.0.1'
+        assert info['parent_trained_at'] == child_info['trained_at']
+        assert info['data_end'] > child_info['data_end'] > parent_info['data_end']
+        assert [entry['version'] for entry in info['lineage']] == ['1.0.0', '1.0.1']
+        assert info['lineage'][0] == {
+            'version': '1.0.0', 'trained_at': parent_info['trained_at'], 'training_mode': 'full',
+            'data_end': parent_info['data_end'], 'total_rounds': parent_info['total_rounds']
+        }
+        assert info['lineage'][1]['data_end'] == child_info['data_end']
+        assert info['lineage'][1]['total_rounds'] == parent_info['total_rounds'] + 3
+        assert info['total_rounds'] == parent_info['total_rounds'] + 5
+
+    def test_update_requires_rows(self, parent_path):
+        trainer = FootDashModelTrainer()
+        trainer.load_base_model(parent_path)
+        with pytest.raises(ValueError):
+            trainer.update_model(np.empty((0, 2), dtype=np.float32), np.empty(0, dtype=np.int64))
+
+
+class TestHelpers:
+
+    @pytest.mark.parametrize("version, expected", [
+        ("1.0.0", "1.0.1"), ("1.0.9", "1.0.10"), ("3", "4"), ("beta", "beta.1")
+    ])
+    def test_next_version(self, version, expected):
+        assert next_version(version) == expected
+
+    def test_classifier_from_booster_round_trips(self, parent_path, columns):
+        trainer = FootDashModelTrainer()
+        trainer.load_base_model(parent_path)
+        X, _ = trainer.prepare_feature_columns(columns, fit=False)
+        model = classifier_from_booster(trainer.model.get_booster(), PARAMS)
+        np.testing.assert_array_equal(model.predict_proba(X), trainer.model.predict_proba(X))
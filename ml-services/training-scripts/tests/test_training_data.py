@@ -0,0 +1,127 @@
+"""Unit tests for streaming ingestion of training exports."""
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from training_data import ColumnBuilder, iter_json_records, iter_ndjson_records, read_training_columns
+
+
+def split_every(data: bytes, size: int):
+    """Chunks of `size` bytes, so tokens straddle chunk boundaries."""
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+EXPORT = {
+    "metadata": {"date_range": {"from": "2024-08-01", "to": "2025-05-31"}, "leagues": [39, 140]},
+    "data": [
+        {"match_id": 1, "home_form_rating": 65.125, "outcome": "HOME_WIN", "note": "tab\there \"quoted\""},
+        {"match_id": 2, "home_form_rating": -1.5e-3, "outcome": "DRAW", "note": "café ⚽ \\ done"},
+        {"match_id": 3, "home_form_rating": 12345678.9, "outcome": "AWAY_WIN", "note": "line\nbreak"},
+    ],
+    "total": 3
+}
+
+
+class TestJsonStream:
+    """The incremental parser agrees with json.loads however the bytes are split."""
+
+    @pytest.mark.parametrize("size", [1, 2, 3, 7, 64])
+    def test_values_split_across_chunks(self, size):
+        # ensure_ascii=False keeps multi-byte UTF-8 sequences to split as well
+        data = json.dumps(EXPORT, ensure_ascii=False).encode()
+        records = list(iter_json_records(split_every(data, size)))
+        assert records == EXPORT["data"]
+
+    @pytest.mark.parametrize("size", [1, 5, 1 << 16])
+    def test_escaped_unicode_split_across_chunks(self, size):
+        data = json.dumps(EXPORT).encode()  # \uXXXX escapes
+        assert list(iter_json_records(split_every(data, size))) == EXPORT["data"]
+
+    def test_number_at_chunk_edge_is_not_cut_short(self):
+        chunks = [b'[{"x": 12', b'34.5', b'e1}]']
+        assert list(iter_json_records(chunks)) == [{"x": 12345.0}]
+
+    def test_top_level_keys_around_records_are_collected(self):
+        metadata = {}
+        data = json.dumps({"metadata": EXPORT["metadata"], "data": EXPORT["data"], "total": 3}).encode()
+        records = list(iter_json_records(split_every(data, 4), metadata))
+        assert records == EXPORT["data"]
+        assert metadata == {"metadata": EXPORT["metadata"], "total": 3}
+
+    def test_metadata_after_records_is_returned(self):
+        data = json.dumps({"data": EXPORT["data"], "metadata": EXPORT["metadata"]}).encode()
+        columns, metadata = read_training_columns(split_every(data, 10))
+        assert metadata == EXPORT["metadata"]
+        assert columns["match_id"].tolist() == [1.0, 2.0, 3.0]
+
+    def test_bare_array_and_empty_documents(self):
+        assert list(iter_json_records([b' [ ] '])) == []
+        assert list(iter_json_records([b'{}'])) == []
+        assert list(iter_json_records([b'[{"a": 1}]'])) == [{"a": 1}]
+
+    @pytest.mark.parametrize("data", [
+        b'{"data": [{"a": 1}, {"a": 2}',      # array never closed
+        b'{"data": [{"a": 1}, {"a": 2',       # record cut off
+        b'{"data": [{"a": 1}], "metadata": ',  # value missing
+        b'{"data": [{"a": "unterminated',     # string cut off
+        b'[{"a": 1} {"a": 2}]',               # missing comma
+        b'{"data": [{"a": 1}]} trailing',     # data after the document
+        b'',
+    ])
+    def test_malformed_input_raises(self, data):
+        with pytest.raises(ValueError):
+            read_training_columns(split_every(data, 3))
+
+    def test_ndjson_lines_split_across_chunks(self):
+        lines = b''.join(json.dumps(record).encode() + b'\n' for record in EXPORT["data"])
+        assert list(iter_ndjson_records(split_every(lines, 5))) == EXPORT["data"]
+
+    def test_ndjson_invalid_line_names_its_number(self):
+        with pytest.raises(ValueError, match="line 2"):
+            list(iter_ndjson_records([b'{"a": 1}\n{"a": \n']))
+
+
+class TestColumnBuilder:
+    """Record chunks become typed, aligned columns."""
+
+    def test_column_first_seen_mid_stream_is_backfilled(self):
+        builder = ColumnBuilder()
+        builder.add([{"a": 1.0}, {"a": 2.0}])
+        builder.add([{"a": 3.0, "b": "x", "c": 5}])
+        builder.add([{"a": 4.0}])
+        columns = builder.columns()
+
+        assert list(columns) == ["a", "b", "c"]
+        assert columns["a"].tolist() == [1.0, 2.0, 3.0, 4.0]
+        assert columns["b"].tolist() == ["", "", "x", ""]
+        np.testing.assert_array_equal(columns["c"], [np.nan, np.nan, 5.0, np.nan])
+
+    def test_column_null_until_typed(self):
+        builder = ColumnBuilder()
+        builder.add([{"a": None}, {"a": None}])
+        builder.add([{"a": "late"}])
+        assert builder.columns()["a"].tolist() == ["", "", "late"]
+
+    def test_booleans_are_numeric(self):
+        builder = ColumnBuilder()
+        builder.add([{"flag": True}, {"flag": False}, {}])
+        np.testing.assert_array_equal(builder.columns()["flag"], [1.0, 0.0, np.nan])
+
+    def test_mixed_types_raise(self):
+        builder = ColumnBuilder()
+        builder.add([{"a": 1.0}])
+        with pytest.raises(ValueError, match="'a'"):
+            builder.add([{"a": {"nested": True}}])
+
+    def test_chunk_size_does_not_change_columns(self):
+        data = json.dumps(EXPORT).encode()
+        one, _ = read_training_columns([data], chunk_rows=1)
+        many, _ = read_training_columns([data], chunk_rows=1000)
+        assert list(one) == list(many)
+        for name in one:
+            np.testing.assert_array_equal(one[name], many[name])
@@ -8,6 +8,8 @@ an XGBoost classification model for match outcome prediction.
 Usage:
     python train_model.py --api-url http://localhost:4000 --auth-token <JWT_TOKEN>
     python train_model.py --data-file training_data.json
+    python train_model.py --data-file new_matches.json --incremental
+    python train_model.py --data-file results.ndjson --from-results
 """
 
 import os
@@ -15,24 +17,57 @@ import sys
 import argparse
 import requests
 import json
-import pandas as pd
 import numpy as np
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional
 import logging
+import time
 from pathlib import Path
 
 # ML imports
 import xgboost as xgb
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import accuracy_score, classification_report, confusion_matrix, log_loss
 from sklearn.preprocessing import LabelEncoder
 import joblib
 
+# The compiled tree format is defined next to its evaluator in the prediction service
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'prediction-model' / 'app'))
+from models.tree_ensemble import compile_booster
+
+from backtest import format_table, walk_forward
+from cross_validation import fit_with_cross_validation
+from out_of_core import TEST, TRAIN, cache_data_end, train_out_of_core
+from rolling_features import build_features
+from training_data import (
+    DEFAULT_CHUNK_ROWS, READ_BYTES, cache_categories, cache_column_names, detect_format, is_column_cache,
+    iter_file_chunks, load_column_cache, read_columns, read_training_columns, save_column_cache
+)
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Export columns that are identifiers, raw strings or the target rather than features
+NON_FEATURE_COLUMNS = [
+    'match_id', 'home_team_id', 'away_team_id', 'league_id',
+    'season', 'match_date', 'outcome', 'home_recent_form', 'away_recent_form',
+    'home_score', 'away_score'
+]
+
+# Non-feature columns loaded from a column cache: the target, the dates,
+# leagues and seasons of incremental updates and backtests, and the teams and
+# scores features are computed from with --from-results
+CONTEXT_COLUMNS = ['outcome', 'match_date', 'league_id', 'season',
+                   'home_team_id', 'away_team_id', 'home_score', 'away_score']
+BACKTEST_PERIODS = ('month', 'day')
+
+# How an incremental update uses the new rows: 'continue' appends boosting
+# rounds to the parent's trees, 'refresh' re-fits the parent's leaf values
+# and gains without adding or restructuring trees
+INCREMENTAL_MODES = ('continue', 'refresh')
+DEFAULT_INCREMENTAL_ROUNDS = 20
+
 class FootDashModelTrainer:
     """Trains ML models for FootDash match prediction."""
     
@@ -41,77 +76,139 @@ class FootDashModelTrainer:
         self.label_encoder = LabelEncoder()
         self.feature_names = []
         self.training_info = {}
-        
-    def fetch_training_data(self, api_url: str, auth_token: str, 
-                          export_params: Optional[Dict] = None) -> Dict:
-        """Fetch training data from FootDash API."""
-        logger.info(f"Fetching training data from {api_url}")
-        
-        headers = {
-            'Authorization': f'Bearer {auth_token}',
-            'Content-Type': 'application/json'
-        }
-        
-        # Default export parameters
-        default_params = {
+        # Latest match_date in the prepared data, recorded as training_info['data_end']
+        self.data_end = None
+        # Artifact of the model an incremental update starts from
+        self.base_model = None
+        
+    def stream_training_data(self, api_url: str, auth_token: str,
+                             export_params: Optional[Dict] = None,
+                             chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Tuple[Dict[str, np.ndarray], Dict]:
+        """
+        Fetch training data from FootDash API, parsing the response as it arrives.
+
+        Args:
+            chunk_rows: Records converted to column arrays at a time
+
+        Returns:
+            (columns, metadata) as returned by read_training_columns
+        """
+        logger.info(f"Streaming training data from {api_url}")
+
+        params = {
             'includeOngoing': False,
             'minMatchesPerTeam': 10,
             'format': 'json'
         }
-        
         if export_params:
-            default_params.update(export_params)
-        
+            params.update(export_params)
+
         try:
-            response = requests.post(
+            with requests.post(
                 f"{api_url}/analytics/export/training-data",
-                headers=headers,
-                json=default_params,
-                timeout=300  # 5 minute timeout for large exports
-            )
-            response.raise_for_status()
-            
-            data = response.json()
-            logger.info(f"Fetched {len(data['data'])} training samples")
-            logger.info(f"Date range: {data['metadata']['date_range']}")
-            logger.info(f"Leagues: {data['metadata']['leagues']}")
-            
-            return data
-            
+                headers={'Authorization': f'Bearer {auth_token}'},
+                json=params,
+                timeout=300,  # 5 minutes to connect and between received bytes
+                stream=True
+            ) as response:
+                response.raise_for_status()
+                chunks = response.iter_content(chunk_size=READ_BYTES)
+                data_format = detect_format(content_type=response.headers.get('Content-Type', ''))
+                columns, metadata = read_training_columns(chunks, data_format, chunk_rows)
+
         except requests.exceptions.RequestException as e:
             logger.error(f"Failed to fetch training data: {e}")
             raise
-            
-    def load_training_data(self, file_path: str) -> Dict:
-        """Load training data from local file."""
+
+        logger.info(f"Date range: {metadata.get('date_range')}")
+        logger.info(f"Leagues: {metadata.get('leagues')}")
+        return columns, metadata
+
+    def load_training_columns(self, file_path: str,
+                              chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Tuple[Dict[str, np.ndarray], Dict]:
+        """
+        Load training data from a local file as column arrays.
+
+        Column caches (see save_column_cache) load only the feature columns
+        and CONTEXT_COLUMNS. JSON exports and NDJSON files (recognised by a .ndjson or
+        .jsonl suffix) are parsed incrementally.
+        """
         logger.info(f"Loading training data from {file_path}")
-        
-        with open(file_path, 'r') as f:
-            data = json.load(f)
+
+        if is_column_cache(file_path):
+            available = cache_column_names(file_path)
+            names = [col for col in available if col not in NON_FEATURE_COLUMNS]
+            names += [col for col in CONTEXT_COLUMNS if col in available]
+            return load_column_cache(file_path, names)
+
+        with open(file_path, 'rb') as f:
+            return read_training_columns(iter_file_chunks(f), detect_format(file_path), chunk_rows)
             
-        logger.info(f"Loaded {len(data['data'])} training samples")
-        return data
-        
+    def compute_features(self, columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        Compute the model features from raw match results.
+
+        Every match gets rolling form, win rate, goal and head-to-head
+        statistics over the matches played before it (see rolling_features),
+        so the columns need no precomputed statistics from the export.
+        """
+        logger.info("Computing point-in-time features from match results...")
+        started = time.perf_counter()
+        features = build_features(columns)
+        logger.info(f"Computed features for {len(features['outcome'])} matches "
+                    f"in {time.perf_counter() - started:.2f}s")
+        return features
+
     def prepare_features(self, training_data: List[Dict]) -> Tuple[np.ndarray, np.ndarray]:
         """Prepare features and labels for training."""
+        return self.prepare_feature_columns(read_columns(training_data))
+
+    def prepare_feature_columns(self, columns: Dict[str, np.ndarray],
+                                fit: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Prepare features and labels for training from column arrays.
+
+        Args:
+            columns: Column arrays, as returned by load_training_columns
+            fit: Take the feature columns and label classes from the data. When
+                False they are those of the loaded base model, and the data
+                must contain every one of them
+
+        Raises:
+            ValueError: If a feature column is missing or not numeric, or an
+                outcome is not one of the base model's classes
+        """
         logger.info("Preparing features and labels...")
         
-        df = pd.DataFrame(training_data)
-        
-        # Define feature columns (exclude identifiers and target)
-        exclude_columns = [
-            'match_id', 'home_team_id', 'away_team_id', 'league_id', 
-            'season', 'match_date', 'outcome', 'home_recent_form', 'away_recent_form'
-        ]
-        
-        feature_columns = [col for col in df.columns if col not in exclude_columns]
-        self.feature_names = feature_columns
-        
-        # Prepare features
-        X = df[feature_columns].values
+        if fit:
+            # Define feature columns (exclude identifiers and target)
+            feature_columns = [col for col in columns if col not in NON_FEATURE_COLUMNS]
+            self.feature_names = feature_columns
+        else:
+            feature_columns = self.feature_names
+            missing = [col for col in feature_columns if col not in columns]
+            if missing:
+                raise ValueError(f"Training data lacks the base model's features: {missing}")
+        
+        # Prepare features, filled one typed column at a time
+        X = np.empty((len(columns['outcome']), len(feature_columns)), dtype=np.float32)
+        for position, col in enumerate(feature_columns):
+            if columns[col].dtype.kind not in 'fiub':
+                raise ValueError(f"Feature column {col!r} is not numeric")
+            X[:, position] = columns[col]
         
         # Prepare labels
-        y = self.label_encoder.fit_transform(df['outcome'])
+        if fit:
+            y = self.label_encoder.fit_transform(columns['outcome'])
+        else:
+            unknown = np.setdiff1d(columns['outcome'], self.label_encoder.classes_)
+            if unknown.size:
+                raise ValueError(f"Outcomes not among the base model's classes: {unknown.tolist()}")
+            y = self.label_encoder.transform(columns['outcome'])
+
+        if 'match_date' in columns and len(columns['match_date']):
+            # NumPy has no max() for string arrays
+            self.data_end = str(max(np.unique(columns['match_date'])))
         
         logger.info(f"Features shape: {X.shape}")
         logger.info(f"Labels shape: {y.shape}")
@@ -119,22 +216,13 @@ class FootDashModelTrainer:
         logger.info(f"Feature columns: {feature_columns}")
         
         # Handle any missing values
-        X = np.nan_to_num(X, nan=0.0, posinf=0.0, neginf=0.0)
+        np.nan_to_num(X, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
         
         return X, y
         
-    def train_model(self, X: np.ndarray, y: np.ndarray, 
-                   model_params: Optional[Dict] = None) -> Dict:
-        """Train XGBoost model."""
-        logger.info("Training XGBoost model...")
-        
-        # Split data
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42, stratify=y
-        )
-        
-        # Default model parameters
-        default_params = {
+    def model_parameters(self, model_params: Optional[Dict] = None) -> Dict:
+        """Default XGBClassifier parameters for the current classes, with overrides applied."""
+        params = {
             'objective': 'multi:softprob',
             'num_class': len(self.label_encoder.classes_),
             'n_estimators': 100,
@@ -145,24 +233,46 @@ class FootDashModelTrainer:
             'random_state': 42,
             'n_jobs': -1
         }
-        
         if model_params:
-            default_params.update(model_params)
+            params.update(model_params)
+        return params
+
+    def train_model(self, X: np.ndarray, y: np.ndarray, 
+                   model_params: Optional[Dict] = None, cv: int = 5,
+                   cv_workers: Optional[int] = None) -> Dict:
+        """
+        Train XGBoost model.
+
+        The final model and the cv cross-validation folds are fitted
+        concurrently on a process pool (see fit_with_cross_validation), with
+        the host's cores split between them.
+        """
+        logger.info("Training XGBoost model...")
+        started = time.perf_counter()
+        
+        # Split data
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=0.2, random_state=42, stratify=y
+        )
+        
+        # Default model parameters
+        default_params = self.model_parameters(model_params)
             
-        # Train model
-        self.model = xgb.XGBClassifier(**default_params)
-        self.model.fit(X_train, y_train)
+        # Train the model and the cross-validation folds side by side
+        self.model, cv_results = fit_with_cross_validation(
+            default_params, X_train, y_train, cv=cv, workers=cv_workers
+        )
+        self.model.set_params(n_jobs=default_params['n_jobs'])
+        cv_scores = np.asarray(cv_results['cv_scores'])
         
         # Evaluate model
+        evaluation_started = time.perf_counter()
         train_pred = self.model.predict(X_train)
         test_pred = self.model.predict(X_test)
         
         train_accuracy = accuracy_score(y_train, train_pred)
         test_accuracy = accuracy_score(y_test, test_pred)
         
-        # Cross-validation
-        cv_scores = cross_val_score(self.model, X_train, y_train, cv=5)
-        
         logger.info(f"Training accuracy: {train_accuracy:.4f}")
         logger.info(f"Test accuracy: {test_accuracy:.4f}")
         logger.info(f"CV accuracy: {cv_scores.mean():.4f} (+/- {cv_scores.std() * 2:.4f})")
@@ -173,26 +283,38 @@ class FootDashModelTrainer:
         logger.info(f"Classification Report:\n{report}")
         
         # Feature importance
-        feature_importance = dict(zip(self.feature_names, self.model.feature_importances_))
+        feature_importance = dict(zip(self.feature_names, self.model.feature_importances_.tolist()))
         top_features = sorted(feature_importance.items(), key=lambda x: x[1], reverse=True)[:10]
         
         logger.info("Top 10 most important features:")
         for feature, importance in top_features:
             logger.info(f"  {feature}: {importance:.4f}")
             
+        evaluation_seconds = time.perf_counter() - evaluation_started
+
         # Store training information
         self.training_info = {
             'train_accuracy': train_accuracy,
             'test_accuracy': test_accuracy,
             'cv_accuracy_mean': cv_scores.mean(),
             'cv_accuracy_std': cv_scores.std(),
+            'cv_oof_log_loss': cv_results['oof_log_loss'],
+            'timings': {
+                'fit_and_cv': cv_results['timings'],
+                'evaluation_seconds': round(evaluation_seconds, 3),
+                'total_seconds': round(time.perf_counter() - started, 3)
+            },
             'model_params': default_params,
             'feature_importance': feature_importance,
             'class_names': class_names.tolist(),
             'training_samples': len(X_train),
             'test_samples': len(X_test),
             'trained_at': datetime.now().isoformat(),
-            'algorithm': 'XGBoost'
+            'algorithm': 'XGBoost',
+            'training_mode': 'full',
+            'data_end': self.data_end,
+            'total_rounds': self.model.get_booster().num_boosted_rounds(),
+            'lineage': []
         }
         
         return {
@@ -203,18 +325,290 @@ class FootDashModelTrainer:
             'classification_report': report
         }
         
+    def train_model_out_of_core(self, cache_path: str, model_params: Optional[Dict] = None,
+                                chunk_rows: int = DEFAULT_CHUNK_ROWS, test_size: float = 0.2) -> Dict:
+        """
+        Train XGBoost model without loading the training data into memory.
+
+        The column cache directory is streamed to XGBoost's external memory in
+        chunks of chunk_rows (see out_of_core). The test split is random like
+        train_model's but drawn per chunk, so it is not stratified, and no
+        cross-validation is run.
+        """
+        logger.info("Training XGBoost model out of core...")
+        started = time.perf_counter()
+
+        self.feature_names = [col for col in cache_column_names(cache_path) if col not in NON_FEATURE_COLUMNS]
+        self.label_encoder.classes_ = np.asarray(cache_categories(cache_path)['outcome'])
+        self.data_end = cache_data_end(cache_path)
+        class_names = self.label_encoder.classes_
+
+        default_params = self.model_parameters(model_params)
+
+        booster, results = train_out_of_core(
+            default_params, cache_path, self.feature_names, class_names.tolist(),
+            test_size=test_size, chunk_rows=chunk_rows, work_dir=os.path.dirname(os.path.abspath(cache_path))
+        )
+        self.model = classifier_from_booster(booster, default_params)
+        train_results, test_results = results[TRAIN], results[TEST]
+
+        logger.info(f"Training accuracy: {train_results['accuracy']:.4f}")
+        logger.info(f"Test accuracy: {test_results['accuracy']:.4f}")
+        logger.info(f"Test log loss: {test_results['log_loss']:.4f}")
+        logger.info(f"Test confusion matrix ({', '.join(class_names)}): {test_results['confusion_matrix']}")
+
+        feature_importance = dict(zip(self.feature_names, self.model.feature_importances_.tolist()))
+
+        self.training_info = {
+            'train_accuracy': train_results['accuracy'],
+            'test_accuracy': test_results['accuracy'],
+            'test_log_loss': test_results['log_loss'],
+            'cv_accuracy_mean': None,
+            'cv_accuracy_std': None,
+            'timings': {
+                'total_seconds': round(time.perf_counter() - started, 3)
+            },
+            'model_params': default_params,
+            'feature_importance': feature_importance,
+            'class_names': class_names.tolist(),
+            'training_samples': train_results['samples'],
+            'test_samples': test_results['samples'],
+            'trained_at': datetime.now().isoformat(),
+            'algorithm': 'XGBoost',
+            'training_mode': 'out_of_core',
+            'data_end': self.data_end,
+            'total_rounds': booster.num_boosted_rounds(),
+            'lineage': []
+        }
+
+        return {
+            'train_accuracy': train_results['accuracy'],
+            'test_accuracy': test_results['accuracy'],
+            'feature_importance': feature_importance,
+            'confusion_matrix': test_results['confusion_matrix']
+        }
+
+    def backtest(self, X: np.ndarray, y: np.ndarray, columns: Dict[str, np.ndarray],
+                 model_params: Optional[Dict] = None, period: str = 'month',
+                 window: Optional[int] = None, min_train_periods: int = 3,
+                 workers: Optional[int] = None, cache_dir: Optional[str] = None) -> Dict:
+        """
+        Walk-forward backtest of the model configuration (see backtest.walk_forward).
+
+        Unlike the random split of train_model, every scored match is
+        predicted by a model trained only on earlier matches. Scores are
+        broken down by league and season where those columns exist.
+
+        Args:
+            X, y: Output of prepare_feature_columns for columns
+            columns: Column arrays including match_date
+
+        Raises:
+            ValueError: If columns has no match_date
+        """
+        if 'match_date' not in columns:
+            raise ValueError("Backtesting needs the match_date column")
+
+        groups = {name: columns[col] for name, col in (('league', 'league_id'), ('season', 'season'))
+                  if col in columns}
+        results = walk_forward(
+            self.model_parameters(model_params), X, y, columns['match_date'], groups,
+            period=period, window=window, min_train_periods=min_train_periods,
+            workers=workers, cache_dir=cache_dir
+        )
+
+        overall = results['overall']
+        logger.info(f"Backtest over {overall['matches']} matches: accuracy {overall['accuracy']:.4f}, "
+                    f"log loss {overall['log_loss']:.4f} ({results['timings']['wall_seconds']}s)")
+        for name in groups:
+            logger.info(format_table(results[f"by_{name}"], f"Backtest by {name}:"))
+        return results
+
+    def load_base_model(self, model_path: str) -> Dict:
+        """
+        Load a saved model artifact as the starting point of an incremental update.
+
+        The trainer takes over the artifact's booster, feature names and label
+        classes, so new rows are encoded exactly as the parent model expects.
+
+        Raises:
+            ValueError: If the artifact holds no native booster (format_version < 2)
+        """
+        logger.info(f"Loading base model from {model_path}")
+
+        model_data = joblib.load(model_path)
+        if model_data.get('booster') is None:
+            raise ValueError(f"{model_path} holds no native booster to continue from")
+
+        self.model = xgb.XGBClassifier()
+        self.model.load_model(bytearray(np.asarray(model_data['booster']).tobytes()))
+        self.feature_names = list(model_data['feature_names'])
+        classes = model_data.get('classes')
+        if classes is None:
+            classes = model_data['label_encoder'].classes_
+        self.label_encoder.classes_ = np.asarray(classes)
+        self.base_model = model_data
+
+        info = model_data.get('training_info', {})
+        logger.info(f"Base model {model_data.get('version')}: "
+                    f"{self.model.get_booster().num_boosted_rounds()} rounds, "
+                    f"data up to {info.get('data_end') or 'unknown'}")
+        return model_data
+
+    def select_new_rows(self, columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        Keep the rows played after the base model's training data ended.
+
+        Rows are compared on match_date (ISO 8601 strings, which order
+        chronologically). When either side has no date, every row is kept.
+        """
+        data_end = self.base_model.get('training_info', {}).get('data_end')
+        if not data_end or 'match_date' not in columns:
+            logger.warning("Cannot tell which rows are new (no match_date or base data_end); using all rows")
+            return columns
+
+        keep = columns['match_date'] > data_end
+        logger.info(f"{int(keep.sum())} of {len(keep)} rows are newer than {data_end}")
+        return {name: values[keep] for name, values in columns.items()}
+
+    def update_model(self, X: np.ndarray, y: np.ndarray, rounds: Optional[int] = None,
+                     mode: str = 'continue') -> Dict:
+        """
+        Update the loaded base model with new rows instead of retraining.
+
+        In 'continue' mode, rounds boosting rounds are added on top of the
+        parent's trees (XGBoost training continuation). In 'refresh' mode the
+        parent's trees keep their structure and their leaf values are re-fitted
+        to the new rows, one pass over every tree; rounds is not used.
+
+        The parent is scored on the new rows before the update, which makes
+        those rows a holdout for it; the updated model's scores on them are
+        in-sample. training_info records the lineage back to the first full
+        training.
+
+        Raises:
+            ValueError: If no base model is loaded, mode is unknown or there are no rows
+        """
+        if self.base_model is None:
+            raise ValueError("No base model loaded")
+        if mode not in INCREMENTAL_MODES:
+            raise ValueError(f"Unknown incremental mode {mode!r}; expected one of {INCREMENTAL_MODES}")
+        if len(y) == 0:
+            raise ValueError("No new rows to update the model with")
+
+        logger.info(f"Updating base model with {len(y)} new rows ({mode})...")
+        started = time.perf_counter()
+
+        parent_info = self.base_model.get('training_info', {})
+        parent_booster = self.model.get_booster()
+        parent_rounds = parent_booster.num_boosted_rounds()
+        labels = list(range(len(self.label_encoder.classes_)))
+        parent_proba = self.model.predict_proba(X)
+
+        # The parent's parameters, translated to native ones. The native API
+        # is used because the scikit-learn wrapper rejects new rows that do not
+        # cover every class, and its QuantileDMatrix cannot be refreshed
+        model_params = dict(parent_info.get('model_params') or {
+            'objective': 'multi:softprob', 'num_class': len(labels)
+        })
+        params = xgb.XGBClassifier(**model_params).get_xgb_params()
+        params['num_class'] = len(labels)
+        if mode == 'continue':
+            rounds = rounds or DEFAULT_INCREMENTAL_ROUNDS
+        else:
+            rounds = parent_rounds
+            params.update(process_type='update', updater='refresh', refresh_leaf=True)
+
+        booster = xgb.train(params, xgb.DMatrix(X, label=y), num_boost_round=rounds,
+                            xgb_model=parent_booster)
+        self.model = classifier_from_booster(booster, model_params)
+        fit_seconds = time.perf_counter() - started
+
+        updated_proba = self.model.predict_proba(X)
+        evaluation = {
+            'parent_accuracy': accuracy_score(y, parent_proba.argmax(axis=1)),
+            'parent_log_loss': log_loss(y, parent_proba, labels=labels),
+            'updated_accuracy': accuracy_score(y, updated_proba.argmax(axis=1)),
+            'updated_log_loss': log_loss(y, updated_proba, labels=labels)
+        }
+        logger.info(f"New rows: parent accuracy {evaluation['parent_accuracy']:.4f}, "
+                    f"log loss {evaluation['parent_log_loss']:.4f}; "
+                    f"updated (in-sample) accuracy {evaluation['updated_accuracy']:.4f}, "
+                    f"log loss {evaluation['updated_log_loss']:.4f}")
+
+        feature_importance = dict(zip(self.feature_names, self.model.feature_importances_.tolist()))
+        parent_entry = {
+            'version': self.base_model.get('version'),
+            'trained_at': parent_info.get('trained_at'),
+            'training_mode': parent_info.get('training_mode', 'full'),
+            'data_end': parent_info.get('data_end'),
+            'total_rounds': parent_rounds
+        }
+        self.training_info = {
+            'train_accuracy': evaluation['updated_accuracy'],
+            # No holdout is split from the new rows; see new_rows_evaluation
+            'test_accuracy': None,
+            'cv_accuracy_mean': None,
+            'cv_accuracy_std': None,
+            'new_rows_evaluation': evaluation,
+            'timings': {
+                'fit_seconds': round(fit_seconds, 3),
+                'total_seconds': round(time.perf_counter() - started, 3)
+            },
+            'model_params': model_params,
+            'feature_importance': feature_importance,
+            'class_names': self.label_encoder.classes_.tolist(),
+            'training_samples': len(y),
+            'test_samples': 0,
+            'trained_at': datetime.now().isoformat(),
+            'algorithm': 'XGBoost',
+            'training_mode': mode,
+            'data_end': self.data_end or parent_info.get('data_end'),
+            'parent_version': parent_entry['version'],
+            'parent_trained_at': parent_entry['trained_at'],
+            'parent_rounds': parent_rounds,
+            'added_rounds': rounds if mode == 'continue' else 0,
+            'total_rounds': booster.num_boosted_rounds(),
+            # Every ancestor, oldest first
+            'lineage': list(parent_info.get('lineage', [])) + [parent_entry]
+        }
+        return evaluation
+
+    def export_tree_ensemble(self) -> Dict[str, np.ndarray]:
+        """
+        Compile the trained trees into flat NumPy arrays (node feature,
+        threshold, children, leaf values) that the prediction service can
+        score without the xgboost runtime.
+        """
+        if self.model is None:
+            raise ValueError("No trained model to export")
+
+        ensemble = compile_booster(self.model.get_booster())
+        logger.info(f"Compiled {len(ensemble['roots'])} trees "
+                    f"({len(ensemble['feature'])} nodes) for NumPy serving")
+        return ensemble
+
     def save_model(self, model_path: str, version: str = "1.0.0"):
         """Save trained model to file."""
         logger.info(f"Saving model to {model_path}")
         
         if self.model is None:
             raise ValueError("No trained model to save")
+        self.training_info['version'] = version
             
-        # Prepare model data for saving
+        # Prepare model data for saving. The booster goes in as XGBoost's native
+        # UBJSON bytes held in a NumPy array, which joblib writes outside the
+        # pickle stream so the prediction service can memory-map the artifact
+        booster = np.frombuffer(self.model.get_booster().save_raw(raw_format='ubj'), dtype=np.uint8)
         model_data = {
-            'model': self.model,
+            'format_version': 3,
+            'booster': booster,
+            # Flat arrays for the prediction service's NumPy evaluator
+            'tree_ensemble': self.export_tree_ensemble(),
             'feature_names': self.feature_names,
-            'label_encoder': self.label_encoder,
+            # Plain labels rather than the pickled LabelEncoder, so loading the
+            # artifact does not require scikit-learn
+            'classes': [str(label) for label in self.label_encoder.classes_],
             'version': version,
             'algorithm': 'XGBoost',
             'accuracy': self.training_info.get('test_accuracy', 0.0),
@@ -225,7 +619,7 @@ class FootDashModelTrainer:
         # Create directory if it doesn't exist
         os.makedirs(os.path.dirname(model_path), exist_ok=True)
         
-        # Save model
+        # Save model (uncompressed, so it can be loaded with mmap_mode='r')
         joblib.dump(model_data, model_path)
         logger.info(f"Model saved successfully")
         
@@ -237,7 +631,7 @@ class FootDashModelTrainer:
         report = {
             'model_summary': {
                 'algorithm': 'XGBoost Multi-class Classifier',
-                'version': '1.0.0',
+                'version': self.training_info.get('version', '1.0.0'),
                 'trained_at': self.training_info['trained_at'],
                 'training_samples': self.training_info['training_samples'],
                 'test_samples': self.training_info['test_samples']
@@ -249,6 +643,8 @@ class FootDashModelTrainer:
                 'cross_validation_std': self.training_info['cv_accuracy_std']
             },
             'model_configuration': self.training_info['model_params'],
+            'lineage': self.training_info.get('lineage', []),
+            'backtest': self.training_info.get('backtest'),
             'feature_importance': self.training_info['feature_importance'],
             'target_classes': self.training_info['class_names'],
             'feature_names': self.feature_names
@@ -259,20 +655,68 @@ class FootDashModelTrainer:
             
         logger.info(f"Model report saved to {output_path}")
 
+def classifier_from_booster(booster: xgb.Booster, params: Dict) -> xgb.XGBClassifier:
+    """Wrap a natively trained booster in an XGBClassifier configured with params."""
+    model = xgb.XGBClassifier(**params)
+    model.load_model(bytearray(booster.save_raw(raw_format='ubj')))
+    return model
+
+def next_version(version: str) -> str:
+    """Bump the last numeric part of a version string: 1.0.3 -> 1.0.4."""
+    head, _, last = str(version).rpartition('.')
+    if last.isdigit():
+        return f"{head}.{int(last) + 1}" if head else str(int(last) + 1)
+    return f"{version}.1"
+
 def main():
     parser = argparse.ArgumentParser(description='Train FootDash ML prediction model')
     parser.add_argument('--api-url', default='http://localhost:4000', 
                        help='FootDash API base URL')
     parser.add_argument('--auth-token', help='JWT authentication token')
-    parser.add_argument('--data-file', help='Path to local training data file')
+    parser.add_argument('--data-file',
+                       help='Path to local training data: JSON export, NDJSON file or column cache')
     parser.add_argument('--output-dir', default='../prediction-model/models',
                        help='Output directory for trained model')
-    parser.add_argument('--model-version', default='1.0.0',
-                       help='Model version string')
+    parser.add_argument('--model-version',
+                       help='Model version string (default: 1.0.0, or the base model\'s '
+                            'version bumped for --incremental)')
     parser.add_argument('--seasons', nargs='+', help='Seasons to include (e.g., 2023 2024)')
     parser.add_argument('--leagues', nargs='+', type=int, help='League IDs to include')
     parser.add_argument('--min-matches', type=int, default=10,
                        help='Minimum matches per team')
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS,
+                       help='Training records converted to arrays at a time')
+    parser.add_argument('--cv-workers', type=int,
+                       help='Maximum concurrent model fits during cross-validation '
+                            '(default: derived from the CPU count)')
+    parser.add_argument('--compress-cache', action='store_true',
+                       help='Save fetched data as a compressed .npz column cache '
+                            'instead of a memory-mappable directory')
+    parser.add_argument('--from-results', action='store_true',
+                       help='Training data holds raw match results (team ids, match_date, home_score, '
+                            'away_score); compute the features from them')
+    parser.add_argument('--backtest', action='store_true',
+                       help='Walk-forward backtest the model configuration before training')
+    parser.add_argument('--backtest-period', choices=BACKTEST_PERIODS, default='month',
+                       help='Unit scored by each backtest window')
+    parser.add_argument('--backtest-window', type=int,
+                       help='Periods each backtest model trains on (default: all earlier periods)')
+    parser.add_argument('--backtest-min-periods', type=int, default=3,
+                       help='Periods before the first scored one')
+    parser.add_argument('--out-of-core', action='store_true',
+                       help='Train from a column cache directory in chunks, without loading '
+                            'the training data into memory')
+    parser.add_argument('--incremental', action='store_true',
+                       help='Update the existing model with rows newer than its training data '
+                            'instead of retraining from scratch')
+    parser.add_argument('--base-model',
+                       help='Model to update with --incremental '
+                            '(default: match_predictor.joblib in --output-dir)')
+    parser.add_argument('--mode', choices=INCREMENTAL_MODES, default='continue',
+                       help='Incremental update: add boosting rounds (continue) or re-fit '
+                            'the existing trees\' leaf values (refresh)')
+    parser.add_argument('--rounds', type=int, default=DEFAULT_INCREMENTAL_ROUNDS,
+                       help='Boosting rounds added by --incremental --mode continue')
     
     args = parser.parse_args()
     
@@ -280,14 +724,30 @@ def main():
     if not args.auth_token and not args.data_file:
         logger.error("Either --auth-token or --data-file must be provided")
         sys.exit(1)
+    if args.out_of_core and args.incremental:
+        logger.error("--out-of-core and --incremental cannot be combined")
+        sys.exit(1)
+    if args.backtest and (args.out_of_core or args.incremental):
+        logger.error("--backtest needs in-memory training data; it cannot be combined with "
+                     "--out-of-core or --incremental")
+        sys.exit(1)
         
     # Initialize trainer
     trainer = FootDashModelTrainer()
+    model_file = os.path.join(args.output_dir, 'match_predictor.joblib')
     
     try:
+        if args.incremental:
+            trainer.load_base_model(args.base_model or model_file)
+
         # Load training data
-        if args.data_file:
-            data = trainer.load_training_data(args.data_file)
+        cache_path = None
+        if args.out_of_core and args.data_file and is_column_cache(args.data_file) \
+                and not args.data_file.endswith('.npz') and not args.from_results:
+            # Read chunk by chunk while training
+            cache_path = args.data_file
+        elif args.data_file:
+            columns, metadata = trainer.load_training_columns(args.data_file, args.chunk_rows)
         else:
             export_params = {
                 'includeOngoing': False,
@@ -299,24 +759,59 @@ def main():
             if args.leagues:
                 export_params['leagues'] = args.leagues
                 
-            data = trainer.fetch_training_data(args.api_url, args.auth_token, export_params)
-            
-            # Save fetched data for future use
-            data_file = os.path.join(args.output_dir, f'training_data_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json')
-            os.makedirs(os.path.dirname(data_file), exist_ok=True)
-            with open(data_file, 'w') as f:
-                json.dump(data, f, indent=2)
-            logger.info(f"Training data saved to {data_file}")
-        
-        # Prepare features
-        X, y = trainer.prepare_features(data['data'])
-        
-        # Train model
-        results = trainer.train_model(X, y)
+            columns, metadata = trainer.stream_training_data(
+                args.api_url, args.auth_token, export_params, chunk_rows=args.chunk_rows
+            )
+
+            # Save fetched data for future use; pass it back with --data-file
+            data_file = os.path.join(args.output_dir, f'training_data_{datetime.now().strftime("%Y%m%d_%H%M%S")}')
+            save_column_cache(columns, data_file + ('.npz' if args.compress_cache else ''), metadata)
+            if args.out_of_core and not args.compress_cache and not args.from_results:
+                cache_path = data_file
+
+        if args.from_results:
+            columns = trainer.compute_features(columns)
+
+        if args.out_of_core:
+            if cache_path is None:
+                # Out-of-core training reads a memory-mappable cache directory
+                cache_path = save_column_cache(
+                    columns, os.path.join(args.output_dir, f'training_data_{datetime.now().strftime("%Y%m%d_%H%M%S")}'),
+                    metadata
+                )
+            columns = None
+
+            results = trainer.train_model_out_of_core(cache_path, chunk_rows=args.chunk_rows)
+            version = args.model_version or '1.0.0'
+        elif args.incremental:
+            columns = trainer.select_new_rows(columns)
+
+            # Prepare features and update the base model
+            X, y = trainer.prepare_feature_columns(columns, fit=False)
+            del columns
+            trainer.update_model(X, y, rounds=args.rounds, mode=args.mode)
+            version = args.model_version or next_version(trainer.base_model.get('version', '1.0.0'))
+        else:
+            # Prepare features
+            X, y = trainer.prepare_feature_columns(columns)
+
+            backtest = None
+            if args.backtest:
+                backtest = trainer.backtest(
+                    X, y, columns, period=args.backtest_period, window=args.backtest_window,
+                    min_train_periods=args.backtest_min_periods, workers=args.cv_workers,
+                    cache_dir=os.path.join(args.output_dir, 'backtest_cache')
+                )
+            del columns
+
+            # Train model
+            results = trainer.train_model(X, y, cv_workers=args.cv_workers)
+            if backtest:
+                trainer.training_info['backtest'] = backtest
+            version = args.model_version or '1.0.0'
         
         # Save model
-        model_file = os.path.join(args.output_dir, 'match_predictor.joblib')
-        trainer.save_model(model_file, args.model_version)
+        trainer.save_model(model_file, version)
         
         # Generate report
         report_file = os.path.join(args.output_dir, f'training_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json')
@@ -325,7 +820,11 @@ def main():
         logger.info("Training completed successfully!")
         logger.info(f"Model saved to: {model_file}")
         logger.info(f"Report saved to: {report_file}")
-        logger.info(f"Test accuracy: {results['test_accuracy']:.4f}")
+        if args.incremental:
+            logger.info(f"Model {version} updated from {trainer.training_info['parent_version']}: "
+                        f"{trainer.training_info['total_rounds']} rounds")
+        else:
+            logger.info(f"Test accuracy: {results['test_accuracy']:.4f}")
         
     except Exception as e:
         logger.error(f"Training failed: {e}")
@@ -8,7 +8,12 @@ set -e
 API_URL="http://localhost:4000"
 OUTPUT_DIR="../prediction-model/models"
 MIN_MATCHES=10
-MODEL_VERSION="1.0.0"
+MODEL_VERSION=""
+INCREMENTAL=""
+OUT_OF_CORE=""
+BACKTEST=""
+FROM_RESULTS=""
+INCREMENTAL_MODE="continue"
 
 # Colors for output
 RED='\033[0;31m'
@@ -44,12 +49,17 @@ Usage: $0 [OPTIONS]
 Options:
   --api-url URL           FootDash API base URL (default: http://localhost:4000)
   --auth-token TOKEN      JWT authentication token for API access
-  --data-file FILE        Path to local training data JSON file
+  --data-file FILE        Local training data: JSON export, NDJSON file or column cache
   --output-dir DIR        Output directory for trained model (default: ../prediction-model/models)
-  --model-version VER     Model version string (default: 1.0.0)
+  --model-version VER     Model version string (default: 1.0.0, or bumped from the base model with --incremental)
   --seasons SEASONS       Comma-separated list of seasons (e.g., "2023,2024")
   --leagues LEAGUES       Comma-separated list of league IDs (e.g., "39,140,78")
   --min-matches NUM       Minimum matches per team (default: 10)
+  --from-results          Data file holds raw match results; compute the rolling features from them
+  --backtest              Walk-forward backtest by month before training (scores per league and season)
+  --out-of-core           Train from an on-disk column cache in chunks instead of in memory
+  --incremental           Update the existing model with new rows instead of retraining
+  --mode MODE             Incremental update: continue (add boosting rounds) or refresh (default: continue)
   --help                  Show this help message
 
 Examples:
@@ -58,7 +68,22 @@ Examples:
   
   # Train with local data file
   $0 --data-file "training_data.json"
+
+  # Retrain from the column cache saved by an earlier API run
+  $0 --data-file "../prediction-model/models/training_data_20250101_120000"
   
+  # Train from raw results (team ids, match_date, home_score, away_score)
+  $0 --data-file "results.ndjson" --from-results
+
+  # Backtest chronologically, then train
+  $0 --data-file "training_data.json" --backtest
+
+  # Train on more data than fits in memory, streaming the column cache from disk
+  $0 --data-file "../prediction-model/models/training_data_20250101_120000" --out-of-core
+
+  # Add boosting rounds for the matches played since the current model was trained
+  $0 --data-file "new_matches.json" --incremental
+
   # Train with specific parameters
   $0 --auth-token "token" --min-matches 15 --model-version "1.1.0"
 
@@ -101,6 +126,26 @@ while [[ $# -gt 0 ]]; do
             MIN_MATCHES="$2"
             shift 2
             ;;
+        --from-results)
+            FROM_RESULTS=1
+            shift
+            ;;
+        --backtest)
+            BACKTEST=1
+            shift
+            ;;
+        --out-of-core)
+            OUT_OF_CORE=1
+            shift
+            ;;
+        --incremental)
+            INCREMENTAL=1
+            shift
+            ;;
+        --mode)
+            INCREMENTAL_MODE="$2"
+            shift 2
+            ;;
         --help)
             show_usage
             exit 0
@@ -160,10 +205,29 @@ mkdir -p "${OUTPUT_DIR}"
 PYTHON_ARGS=(
     "--api-url" "${API_URL}"
     "--output-dir" "${OUTPUT_DIR}"
-    "--model-version" "${MODEL_VERSION}"
     "--min-matches" "${MIN_MATCHES}"
 )
 
+if [[ -n "${MODEL_VERSION}" ]]; then
+    PYTHON_ARGS+=("--model-version" "${MODEL_VERSION}")
+fi
+
+if [[ -n "${FROM_RESULTS}" ]]; then
+    PYTHON_ARGS+=("--from-results")
+fi
+
+if [[ -n "${BACKTEST}" ]]; then
+    PYTHON_ARGS+=("--backtest")
+fi
+
+if [[ -n "${OUT_OF_CORE}" ]]; then
+    PYTHON_ARGS+=("--out-of-core")
+fi
+
+if [[ -n "${INCREMENTAL}" ]]; then
+    PYTHON_ARGS+=("--incremental" "--mode" "${INCREMENTAL_MODE}")
+fi
+
 if [[ -n "${AUTH_TOKEN}" ]]; then
     PYTHON_ARGS+=("--auth-token" "${AUTH_TOKEN}")
 fi
@@ -188,7 +252,7 @@ fi
 log_info "Starting model training..."
 log_info "API URL: ${API_URL}"
 log_info "Output directory: ${OUTPUT_DIR}"
-log_info "Model version: ${MODEL_VERSION}"
+log_info "Model version: ${MODEL_VERSION:-default}"
 log_info "Minimum matches per team: ${MIN_MATCHES}"
 
 if [[ -n "${SEASONS}" ]]; then
@@ -0,0 +1,406 @@
+"""
+Streaming ingestion of FootDash training data.
+
+Training exports are parsed record by record from a file or HTTP body and
+converted chunk by chunk into typed column arrays, so neither the whole raw
+document nor a list of every record dict is ever held in memory.
+
+Two input formats are understood:
+    json    The /analytics/export/training-data document,
+            {"data": [...records...], "metadata": {...}}, or a bare array of records
+    ndjson  One record object per line
+
+Parsed columns can be saved as a column cache, which later runs load in
+seconds: a directory holding one .npy file per column (memory-mapped on
+load), or a single compressed .npz file. Either way only the requested
+columns are read, and string columns are stored dictionary-encoded.
+"""
+
+import codecs
+import json
+import logging
+import os
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Records converted to columns at a time
+DEFAULT_CHUNK_ROWS = 10000
+# Bytes read from a file or response per step
+READ_BYTES = 1 << 16
+
+NDJSON_SUFFIXES = ('.ndjson', '.jsonl')
+
+CACHE_FORMAT_VERSION = 1
+CACHE_MANIFEST = 'manifest.json'
+# Key of the manifest inside a compressed .npz cache
+NPZ_MANIFEST_KEY = '__manifest__'
+
+
+def detect_format(name: str = '', content_type: str = '') -> str:
+    """'ndjson' for NDJSON file names or content types, 'json' otherwise."""
+    if name.lower().endswith(NDJSON_SUFFIXES) or 'ndjson' in content_type or 'jsonlines' in content_type:
+        return 'ndjson'
+    return 'json'
+
+
+def iter_file_chunks(file: BinaryIO, size: int = READ_BYTES) -> Iterator[bytes]:
+    """Read a binary file in fixed-size chunks."""
+    while True:
+        chunk = file.read(size)
+        if not chunk:
+            return
+        yield chunk
+
+
+class _JsonStream:
+    """Decodes one JSON value at a time from a UTF-8 byte stream."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ""
+        self._position = 0
+        self._open = True
+
+    def _read(self) -> None:
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self._open = False
+            tail = self._text.decode(b"", final=True)
+        else:
+            tail = self._text.decode(chunk)
+        self._buffer = self._buffer[self._position:] + tail
+        self._position = 0
+
+    def peek(self) -> Optional[str]:
+        """Next non-whitespace character, or None at the end of the input."""
+        while True:
+            while self._position < len(self._buffer) and self._buffer[self._position].isspace():
+                self._position += 1
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+            if not self._open:
+                return None
+            self._read()
+
+    def expect(self, chars: str) -> str:
+        """Consume the next character, which must be one of chars."""
+        char = self.peek()
+        if char is None or char not in chars:
+            raise ValueError(f"Expected one of {chars!r} in JSON input, got {char!r}")
+        self._position += 1
+        return char
+
+    def value(self) -> Any:
+        """Decode the next complete JSON value."""
+        if self.peek() is None:
+            raise ValueError("Unexpected end of JSON input")
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._position)
+            except json.JSONDecodeError:
+                end = None
+            # A value touching the end of the buffer may continue in the next chunk
+            if end is not None and (end < len(self._buffer) or not self._open):
+                self._position = end
+                return value
+            if not self._open:
+                raise ValueError("Malformed JSON value in training data")
+            self._read()
+
+    def array_items(self) -> Iterator[Any]:
+        """Decode the elements of the array starting at the current position."""
+        self.expect('[')
+        if self.peek() == ']':
+            self.expect(']')
+            return
+        while True:
+            yield self.value()
+            if self.expect(',]') == ']':
+                return
+
+
+def iter_json_records(chunks: Iterable[bytes], metadata: Optional[Dict] = None) -> Iterator[Dict]:
+    """
+    Yield the records of a training export as they are parsed.
+
+    Args:
+        chunks: UTF-8 bytes of the export document
+        metadata: Filled with the document's other top-level keys (such as
+            "metadata") once they have been read
+
+    Raises:
+        ValueError: If the input is not a well-formed export document
+    """
+    stream = _JsonStream(chunks)
+    if stream.peek() == '[':
+        yield from stream.array_items()
+    else:
+        stream.expect('{')
+        if stream.peek() == '}':
+            stream.expect('}')
+        else:
+            while True:
+                key = stream.value()
+                stream.expect(':')
+                if key == 'data':
+                    yield from stream.array_items()
+                else:
+                    value = stream.value()
+                    if metadata is not None:
+                        metadata[key] = value
+                if stream.expect(',}') == '}':
+                    break
+    if stream.peek() is not None:
+        raise ValueError("Unexpected data after the training export")
+
+
+def iter_ndjson_records(chunks: Iterable[bytes]) -> Iterator[Dict]:
+    """
+    Yield one record per non-empty line of NDJSON input.
+
+    Raises:
+        ValueError: If a line is not valid JSON
+    """
+    buffer = b""
+    line_number = 0
+    for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield _loads_line(line, line_number)
+    if buffer.strip():
+        yield _loads_line(buffer, line_number + 1)
+
+
+def _loads_line(line: bytes, line_number: int) -> Dict:
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        raise ValueError(f"Invalid JSON on line {line_number}: {e}") from e
+
+
+def iter_record_chunks(records: Iterable[Dict], size: int = DEFAULT_CHUNK_ROWS) -> Iterator[List[Dict]]:
+    """Group records into lists of at most size."""
+    chunk: List[Dict] = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class ColumnBuilder:
+    """
+    Accumulates record chunks as typed column arrays.
+
+    Numbers and booleans become float64 columns with NaN for missing values;
+    strings become fixed-width unicode columns with '' for missing values.
+    Columns keep the order in which their keys first appear, as a pandas
+    DataFrame built from the same records would.
+    """
+
+    def __init__(self):
+        # Per column: converted chunk arrays, or ints counting rows still missing
+        self._parts: Dict[str, List[Union[np.ndarray, int]]] = {}
+        self._kinds: Dict[str, str] = {}
+        self.n_rows = 0
+
+    def add(self, records: List[Dict]) -> None:
+        """Convert a chunk of records into column arrays."""
+        n = len(records)
+        keys = dict.fromkeys(key for record in records for key in record)
+        for key in keys:
+            parts = self._parts.setdefault(key, [self.n_rows] if self.n_rows else [])
+            parts.append(self._convert(key, [record.get(key) for record in records]))
+        for key, parts in self._parts.items():
+            if key not in keys:
+                parts.append(n)
+        self.n_rows += n
+
+    def _convert(self, key: str, values: List[Any]) -> Union[np.ndarray, int]:
+        kind = self._kinds.get(key)
+        if kind is None:
+            sample = next((value for value in values if value is not None), None)
+            if sample is None:
+                return len(values)
+            kind = self._kinds[key] = 'str' if isinstance(sample, str) else 'float'
+
+        try:
+            if kind == 'str':
+                return np.array(['' if value is None else value for value in values], dtype=str)
+            return np.array(values, dtype=np.float64)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Column {key!r} mixes value types: {e}") from e
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Concatenate every column; the builder is emptied."""
+        columns = {}
+        for key in list(self._parts):
+            kind = self._kinds.get(key, 'float')
+            parts = [
+                part if isinstance(part, np.ndarray)
+                else np.full(part, '' if kind == 'str' else np.nan, dtype=str if kind == 'str' else np.float64)
+                for part in self._parts.pop(key)
+            ]
+            columns[key] = np.concatenate(parts) if parts else np.empty(0)
+        self.n_rows = 0
+        return columns
+
+
+def read_columns(records: Iterable[Dict], chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Dict[str, np.ndarray]:
+    """Convert a record stream into column arrays, chunk_rows records at a time."""
+    builder = ColumnBuilder()
+    for chunk in iter_record_chunks(records, chunk_rows):
+        builder.add(chunk)
+    logger.info(f"Read {builder.n_rows} training records")
+    return builder.columns()
+
+
+def read_training_columns(chunks: Iterable[bytes], data_format: str = 'json',
+                          chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Tuple[Dict[str, np.ndarray], Dict]:
+    """
+    Parse a training export stream straight into column arrays.
+
+    Args:
+        chunks: Raw bytes of the export
+        data_format: 'json' (export document or array) or 'ndjson'
+        chunk_rows: Records converted per step
+
+    Returns:
+        (columns, metadata); metadata is empty for NDJSON input
+    """
+    metadata: Dict = {}
+    if data_format == 'ndjson':
+        records = iter_ndjson_records(chunks)
+    else:
+        records = iter_json_records(chunks, metadata)
+    columns = read_columns(records, chunk_rows)
+    return columns, metadata.get('metadata', metadata)
+
+
+# ── Column cache ─────────────────────────────────────────────────────────────
+
+def is_column_cache(path: str) -> bool:
+    """Whether path is a column cache written by save_column_cache."""
+    return path.endswith('.npz') or os.path.isfile(os.path.join(path, CACHE_MANIFEST))
+
+
+def save_column_cache(columns: Dict[str, np.ndarray], path: str,
+                      metadata: Optional[Dict] = None) -> str:
+    """
+    Save column arrays as a column cache.
+
+    String columns are dictionary-encoded: the distinct values go in the
+    manifest and the column holds the smallest unsigned integer codes.
+
+    Args:
+        columns: Column arrays, as returned by read_training_columns
+        path: A directory for an uncompressed, memory-mappable cache, or a
+            file ending in .npz for a compressed one
+        metadata: Export metadata kept in the manifest
+
+    Returns:
+        path
+    """
+    manifest = {'format_version': CACHE_FORMAT_VERSION, 'metadata': metadata or {}, 'columns': []}
+    arrays = {}
+    for position, (name, values) in enumerate(columns.items()):
+        entry = {'name': name, 'file': f"c{position}"}
+        if values.dtype.kind == 'U':
+            categories, codes = np.unique(values, return_inverse=True)
+            entry['categories'] = categories.tolist()
+            values = codes.astype(np.min_scalar_type(max(len(categories) - 1, 0)))
+        entry['dtype'] = values.dtype.str
+        manifest['columns'].append(entry)
+        arrays[entry['file']] = values
+
+    if path.endswith('.npz'):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        np.savez_compressed(path, **arrays, **{NPZ_MANIFEST_KEY: np.array(json.dumps(manifest))})
+    else:
+        os.makedirs(path, exist_ok=True)
+        for file, values in arrays.items():
+            np.save(os.path.join(path, f"{file}.npy"), values)
+        # Written last, so a cache without a manifest is recognisably incomplete
+        with open(os.path.join(path, CACHE_MANIFEST), 'w') as f:
+            json.dump(manifest, f)
+
+    logger.info(f"Saved {len(columns)} columns to column cache {path}")
+    return path
+
+
+def _read_manifest(path: str) -> Dict:
+    if path.endswith('.npz'):
+        with np.load(path) as archive:
+            manifest = json.loads(str(archive[NPZ_MANIFEST_KEY]))
+    else:
+        with open(os.path.join(path, CACHE_MANIFEST)) as f:
+            manifest = json.load(f)
+    if manifest.get('format_version') != CACHE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported column cache version {manifest.get('format_version')}")
+    return manifest
+
+
+def cache_column_names(path: str) -> List[str]:
+    """Column names stored in a column cache, in their original order."""
+    return [entry['name'] for entry in _read_manifest(path)['columns']]
+
+
+def cache_categories(path: str) -> Dict[str, List[str]]:
+    """Distinct values of each dictionary-encoded string column, in code order."""
+    return {entry['name']: entry['categories']
+            for entry in _read_manifest(path)['columns'] if 'categories' in entry}
+
+
+def load_column_cache(path: str, names: Optional[Sequence[str]] = None,
+                      decode: bool = True) -> Tuple[Dict[str, np.ndarray], Dict]:
+    """
+    Load columns from a column cache.
+
+    Only the requested columns are read. Numeric columns of a directory cache
+    are memory-mapped read-only; string columns are decoded into arrays.
+
+    Args:
+        path: Cache directory or .npz file
+        names: Columns to load (all when None)
+        decode: Decode string columns. When False they are returned as their
+            integer codes (memory-mapped like numeric columns) and
+            cache_categories maps the codes back to values
+
+    Returns:
+        (columns, metadata)
+
+    Raises:
+        KeyError: If a requested column is not in the cache
+    """
+    manifest = _read_manifest(path)
+    entries = {entry['name']: entry for entry in manifest['columns']}
+    missing = [name for name in names or () if name not in entries]
+    if missing:
+        raise KeyError(f"Columns not in cache {path}: {missing}")
+    wanted = [entries[name] for name in names] if names is not None else manifest['columns']
+
+    columns = {}
+    archive = np.load(path) if path.endswith('.npz') else None
+    try:
+        for entry in wanted:
+            if archive is not None:
+                values = archive[entry['file']]
+            else:
+                values = np.load(os.path.join(path, f"{entry['file']}.npy"), mmap_mode='r')
+            if decode and 'categories' in entry:
+                values = np.asarray(entry['categories'], dtype=str)[values]
+            columns[entry['name']] = values
+    finally:
+        if archive is not None:
+            archive.close()
+    return columns, manifest['metadata']